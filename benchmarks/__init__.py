@@ -0,0 +1 @@
+"""Benchmarks de escala do mega-engine sobre historicos sinteticos (`python -m benchmarks`)."""
@@ -0,0 +1,51 @@
+"""Roda a suite de benchmarks e imprime o JSON de resultados.
+
+    python -m benchmarks
+    python -m benchmarks --sizes 3000,30000 --only run_backtest,build_features --repeats 3 --out out/bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+from benchmarks.suite import BENCHMARKS, DEFAULT_SIZES, run_suite
+
+
+def _log(row: dict[str, Any]) -> None:
+    peak = row["peak_bytes"]
+    peak_text = f" peak={peak / 2**20:.1f}MiB" if peak is not None else ""
+    print(f"[BENCH] {row['benchmark']} size={row['size']} {row['seconds_median']:.3f}s{peak_text}", file=sys.stderr)
+
+
+def main(argv: list[str] | None = None) -> dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Benchmarks de escala do mega-engine em historicos sinteticos.")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES))
+    parser.add_argument("--only", help="Benchmarks separados por virgula: " + ", ".join(b.name for b in BENCHMARKS))
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="Pula a execucao extra sob tracemalloc.")
+    parser.add_argument("--out", type=Path, help="Tambem grava o JSON neste arquivo.")
+    args = parser.parse_args(argv)
+
+    report = run_suite(
+        [int(size) for size in args.sizes.split(",") if size.strip()],
+        names=[name.strip() for name in args.only.split(",") if name.strip()] if args.only else None,
+        repeats=args.repeats,
+        memory=not args.no_memory,
+        seed=args.seed,
+        progress=_log,
+    )
+    payload = json.dumps(report, indent=2)
+    if args.out is not None:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(payload + "\n", encoding="utf-8")
+    print(payload)
+    return report
+
+
+if __name__ == "__main__":
+    main()
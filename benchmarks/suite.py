@@ -0,0 +1,224 @@
+"""Benchmarks de `core` por tamanho de historico: tempo, pico de memoria e vazao.
+
+Cada benchmark recebe um historico sintetico ja montado e devolve uma funcao
+sem argumentos (o trabalho medido) e as unidades processadas por chamada
+(`draws` e/ou `candidates`), usadas para a vazao. Os benchmarks walk-forward
+so avaliam a cauda do historico, com `eval_draws(size)` passos: o numero cresce
+com o logaritmo do tamanho (20 em 3k, 40 em 30k, 60 em 300k) e vai no campo
+`walk_forward_steps` de cada linha. O tempo vem de
+`repeats` execucoes sem tracemalloc; o pico de memoria, de uma execucao
+extra sob tracemalloc (que deixa o codigo mais lento e nao entra no tempo).
+"""
+
+from __future__ import annotations
+
+import gc
+import platform
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_history
+from core.backtest import build_probability_cache, build_weak_pair_cache, run_backtest
+from core.features_megasena import build_features
+from core.generator import build_probabilities_from_history, generate_games_from_probs
+from core.optimize import run_optimization
+
+DEFAULT_SIZES = (3_000, 30_000, 300_000)
+# Os passos walk-forward custam O(historico) cada; medir so a cauda mantem o de 300k em segundos.
+# EVAL_DRAWS passos no tamanho base e mais EVAL_DRAWS a cada decada acima dele.
+EVAL_DRAWS = 20
+EVAL_BASE_SIZE = 3_000
+WINDOW = 100
+N_SIM = 5_000
+BACKTEST_N_SIM = 20
+BOTTOM_PAIRS = 60
+BENCH_CONFIG: dict[str, Any] = {
+    "parameters": {
+        "window": WINDOW,
+        "num_games": 5,
+        "ticket_size": 9,
+        "max_intersection": 4,
+        "bottom_pairs": BOTTOM_PAIRS,
+    }
+}
+
+Work = tuple[Callable[[], Any], dict[str, int]]
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    name: str
+    setup: Callable[[pd.DataFrame], Work]
+    walk_forward: bool = False
+
+
+def eval_draws(size: int) -> int:
+    """Passos walk-forward avaliados em um historico de `size` sorteios."""
+    decades = max(0.0, float(np.log10(max(size, 1) / EVAL_BASE_SIZE)))
+    return int(round(EVAL_DRAWS * (1 + decades)))
+
+
+def _generate_games(history: pd.DataFrame) -> Work:
+    probs = build_probabilities_from_history(history, window=WINDOW, config=BENCH_CONFIG)
+
+    def work() -> Any:
+        return generate_games_from_probs(probs, seed=1, n_sim=N_SIM, max_seq=5, min_diff=8)
+
+    return work, {"candidates": N_SIM}
+
+
+def _build_features(history: pd.DataFrame) -> Work:
+    return (lambda: build_features(history, window=WINDOW)), {"draws": len(history)}
+
+
+def _tail_start(history: pd.DataFrame) -> int:
+    return max(len(history) - eval_draws(len(history)), WINDOW)
+
+
+def _build_probability_cache(history: pd.DataFrame) -> Work:
+    start = _tail_start(history)
+
+    def work() -> Any:
+        return build_probability_cache(history, windows=[WINDOW], min_history=start, config=BENCH_CONFIG)
+
+    return work, {"draws": len(history) - start}
+
+
+def _build_weak_pair_cache(history: pd.DataFrame) -> Work:
+    start = _tail_start(history)
+
+    def work() -> Any:
+        return build_weak_pair_cache(history, min_history=start, bottom_pairs=BOTTOM_PAIRS)
+
+    # percorre o historico inteiro para contar pares; so a cauda gera entradas
+    return work, {"draws": len(history)}
+
+
+def _run_backtest(history: pd.DataFrame) -> Work:
+    start = _tail_start(history)
+
+    def work() -> Any:
+        return run_backtest(
+            history,
+            window=WINDOW,
+            min_history=start,
+            n_sim=BACKTEST_N_SIM,
+            config=BENCH_CONFIG,
+            include_per_draw=False,
+        )
+
+    steps = len(history) - start
+    return work, {"draws": steps, "candidates": steps * BACKTEST_N_SIM}
+
+
+def _run_optimization(history: pd.DataFrame) -> Work:
+    steps_per_backtest = len(history) - _tail_start(history)
+    grid = {"window": [50, WINDOW], "num_games": [5], "max_intersection": [3, 4]}
+    config = {
+        "parameters": {
+            **BENCH_CONFIG["parameters"],
+            "min_history": WINDOW,
+            "optimization_history_limit": WINDOW + steps_per_backtest,
+            "backtest_n_sim": BACKTEST_N_SIM,
+            "optimization_grid": grid,
+        }
+    }
+    combinations = len(grid["window"]) * len(grid["num_games"]) * len(grid["max_intersection"])
+    steps = (combinations + 1) * steps_per_backtest
+    return (lambda: run_optimization(history, config)), {"draws": steps, "candidates": steps * BACKTEST_N_SIM}
+
+
+BENCHMARKS = (
+    Benchmark("generate_games_from_probs", _generate_games),
+    Benchmark("build_features", _build_features),
+    Benchmark("build_probability_cache", _build_probability_cache, walk_forward=True),
+    Benchmark("build_weak_pair_cache", _build_weak_pair_cache, walk_forward=True),
+    Benchmark("run_backtest", _run_backtest, walk_forward=True),
+    Benchmark("run_optimization", _run_optimization, walk_forward=True),
+)
+
+
+def peak_memory(work: Callable[[], Any]) -> int:
+    """Pico de bytes alocados (Python e NumPy) durante uma chamada."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        work()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(
+    benchmark: Benchmark,
+    history: pd.DataFrame,
+    *,
+    repeats: int = 1,
+    memory: bool = True,
+) -> dict[str, Any]:
+    work, units = benchmark.setup(history)
+    seconds = []
+    for _ in range(repeats):
+        gc.collect()
+        started = time.perf_counter()
+        work()
+        seconds.append(time.perf_counter() - started)
+    median = float(np.median(seconds))
+    row: dict[str, Any] = {
+        "benchmark": benchmark.name,
+        "size": len(history),
+        "walk_forward_steps": len(history) - _tail_start(history) if benchmark.walk_forward else None,
+        "repeats": repeats,
+        "seconds": [round(value, 6) for value in seconds],
+        "seconds_median": round(median, 6),
+        "peak_bytes": peak_memory(work) if memory else None,
+        "throughput": {f"{unit}_per_s": round(count / median, 2) if median > 0 else None for unit, count in units.items()},
+    }
+    return row
+
+
+def environment() -> dict[str, Any]:
+    from core.pipeline import code_version
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "code_version": code_version(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def run_suite(
+    sizes: tuple[int, ...] | list[int] = DEFAULT_SIZES,
+    *,
+    names: tuple[str, ...] | list[str] | None = None,
+    repeats: int = 1,
+    memory: bool = True,
+    seed: int = 0,
+    progress: Callable[[dict[str, Any]], None] | None = None,
+) -> dict[str, Any]:
+    """Roda os benchmarks escolhidos em cada tamanho e devolve `{"environment", "results"}`."""
+    selected = [benchmark for benchmark in BENCHMARKS if names is None or benchmark.name in names]
+    unknown = sorted(set(names or ()) - {benchmark.name for benchmark in BENCHMARKS})
+    if unknown:
+        raise ValueError(f"Benchmarks desconhecidos: {unknown}")
+
+    results = []
+    for size in sizes:
+        history = synthetic_history(int(size), seed=seed)
+        for benchmark in selected:
+            row = measure(benchmark, history, repeats=repeats, memory=memory)
+            results.append(row)
+            if progress is not None:
+                progress(row)
+    return {"environment": environment(), "results": results}
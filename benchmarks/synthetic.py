@@ -0,0 +1,33 @@
+"""Historicos sinteticos deterministicos no formato de `data/results/megasena.csv`."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from core.config import DEFAULT_DRAW_SIZE, MAX_NUMBER, MIN_NUMBER
+
+CHUNK_SIZE = 50_000
+FIRST_DATE = "1996-03-11"
+
+
+def synthetic_draws(n_draws: int, *, seed: int = 0) -> np.ndarray:
+    """(n_draws, 6) dezenas distintas e ordenadas, uniformes em 1..60; mesma seed, mesmas dezenas."""
+    rng = np.random.default_rng(seed)
+    n_numbers = MAX_NUMBER - MIN_NUMBER + 1
+    draws = np.empty((n_draws, DEFAULT_DRAW_SIZE), dtype=np.int64)
+    for start in range(0, n_draws, CHUNK_SIZE):
+        stop = min(start + CHUNK_SIZE, n_draws)
+        keys = rng.random((stop - start, n_numbers))
+        picked = np.argpartition(keys, DEFAULT_DRAW_SIZE, axis=1)[:, :DEFAULT_DRAW_SIZE]
+        draws[start:stop] = np.sort(picked, axis=1) + MIN_NUMBER
+    return draws
+
+
+def synthetic_history(n_draws: int, *, seed: int = 0) -> pd.DataFrame:
+    """DataFrame `concurso, data, d1..d6` com um sorteio a cada 3 dias."""
+    draws = synthetic_draws(n_draws, seed=seed)
+    frame = pd.DataFrame(draws, columns=[f"d{i}" for i in range(1, DEFAULT_DRAW_SIZE + 1)])
+    frame.insert(0, "data", pd.date_range(FIRST_DATE, periods=n_draws, freq="3D").strftime("%d/%m/%Y"))
+    frame.insert(0, "concurso", np.arange(1, n_draws + 1))
+    return frame
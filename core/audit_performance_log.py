@@ -1,16 +1,23 @@
 from __future__ import annotations
 
+import argparse
+import hashlib
 import json
+import os
 import subprocess
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO
 
 from core.compare_results import compute_hits
-from core.config import OUT_HISTORY_DIR, OUT_GAMES_PATH, PERFORMANCE_LOG_PATH, REPO_ROOT
+from core.config import OUT_HISTORY_ARCHIVE_PATH, OUT_HISTORY_DIR, OUT_GAMES_PATH, PERFORMANCE_LOG_PATH, REPO_ROOT
+from core.history_archive import archive_snapshots, export_snapshots, snapshot_filename
+from core.jsonl_log import encode_jsonl_line, locked, parse_jsonl_line, tail_crc32
+from core.performance_index import PerformanceLogIndex
 from core.time_utils import iso_utc_to_brt_text, utc_now_pair
 
 AUDIT_REPORT_PATH = REPO_ROOT / "out" / "performance_audit.json"
+COPY_CHUNK_SIZE = 1024 * 1024
 LEGACY_INFERRED_SHA = {
     2974: "2c6c1a9ced68d91abf3037666c36590ad0f07df5",
 }
@@ -30,9 +37,97 @@ def _normalize_git_sha(value: Any) -> str | None:
     return sha
 
 
-def _git_show_json(sha: str, rel_path: str) -> dict[str, Any]:
-    raw = subprocess.check_output(["git", "show", f"{sha}:{rel_path}"], cwd=REPO_ROOT, text=True)
-    return json.loads(raw)
+class GitBatchReader:
+    """Le arquivos de commits antigos por processos `git cat-file` de longa duracao.
+
+    `--batch-check` resolve `sha:path` para o id do blob e `--batch` entrega o
+    conteudo; o mesmo blob referenciado por varios commits e lido e parseado uma vez.
+    Os payloads em cache sao compartilhados entre chamadas e nao devem ser alterados.
+    """
+
+    def __init__(self, repo_root: Path = REPO_ROOT) -> None:
+        self.repo_root = repo_root
+        self._check: subprocess.Popen | None = None
+        self._batch: subprocess.Popen | None = None
+        self._blob_by_ref: dict[str, str | None] = {}
+        self._payload_by_blob: dict[str, dict[str, Any]] = {}
+        self.blobs_read = 0
+
+    def __enter__(self) -> "GitBatchReader":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    def _spawn(self, mode: str) -> subprocess.Popen | None:
+        try:
+            return subprocess.Popen(
+                ["git", "cat-file", mode],
+                cwd=self.repo_root,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError:
+            return None
+
+    def _request(self, process: subprocess.Popen | None, name: str) -> tuple[str, int] | None:
+        if process is None or process.poll() is not None:
+            return None
+        try:
+            process.stdin.write(name.encode("utf-8") + b"\n")
+            process.stdin.flush()
+        except OSError:
+            return None
+        line = process.stdout.readline().decode("utf-8").rstrip("\n")
+        # "<id> <tipo> <tamanho>" ou "<nome> missing" / "<nome> ambiguous" (o nome pode ter espacos)
+        if not line or line.endswith((" missing", " ambiguous")):
+            return None
+        header = line.split()
+        if len(header) != 3 or not header[2].isdigit():
+            return None
+        if header[1] != "blob":
+            # So o --batch manda o conteudo depois do cabecalho; o --batch-check nao tem corpo.
+            if process is self._batch:
+                process.stdout.read(int(header[2]) + 1)
+            return None
+        return header[0], int(header[2])
+
+    def blob_id(self, sha: str, rel_path: str) -> str | None:
+        ref = f"{sha}:{rel_path}"
+        if ref not in self._blob_by_ref:
+            if self._check is None:
+                self._check = self._spawn("--batch-check")
+            found = self._request(self._check, ref)
+            self._blob_by_ref[ref] = found[0] if found else None
+        return self._blob_by_ref[ref]
+
+    def read_json(self, sha: str, rel_path: str) -> dict[str, Any] | None:
+        blob = self.blob_id(sha, rel_path)
+        if blob is None:
+            return None
+        if blob not in self._payload_by_blob:
+            if self._batch is None:
+                self._batch = self._spawn("--batch")
+            found = self._request(self._batch, blob)
+            if found is None:
+                return None
+            raw = self._batch.stdout.read(found[1] + 1)[:-1]
+            self.blobs_read += 1
+            self._payload_by_blob[blob] = json.loads(raw.decode("utf-8"))
+        return self._payload_by_blob[blob]
+
+    def close(self) -> None:
+        for process in (self._check, self._batch):
+            if process is None:
+                continue
+            if process.stdin:
+                process.stdin.close()
+            process.wait()
+            if process.stdout:
+                process.stdout.close()
+        self._check = None
+        self._batch = None
 
 
 def _event_games_to_compare_input(event: dict[str, Any]) -> list[tuple[str, list[int]]]:
@@ -65,111 +160,273 @@ def _draw_date_to_timestamp_utc(draw_date: str | None) -> str | None:
     return parsed.replace(tzinfo=timezone.utc).isoformat()
 
 
-def audit_and_repair() -> dict[str, Any]:
-    entries = [json.loads(line) for line in PERFORMANCE_LOG_PATH.read_text(encoding="utf-8").splitlines() if line.strip()]
-    repaired_entries = []
-    audit_rows = []
-    OUT_HISTORY_DIR.mkdir(parents=True, exist_ok=True)
-
-    for event in entries:
-        concurso = int(event["concurso"])
-        meta = dict(event.get("meta", {}) if isinstance(event.get("meta"), dict) else {})
-        sha = _normalize_git_sha(meta.get("git_sha")) or LEGACY_INFERRED_SHA.get(concurso)
-        source = "log_only"
-        payload = None
-
-        if sha:
-            try:
-                payload = _git_show_json(sha, "out/jogos_gerados.json")
-                source = "git_show"
-            except subprocess.CalledProcessError:
-                payload = None
-
-        if payload is None:
-            payload = {
-                "game": event.get("game", "megasena"),
-                "ticket_size": event.get("ticket_size", 9),
-                "draw_size": 6,
-                "n_games": event.get("n_games", len(event.get("games", []))),
-                "objective": "maximize_hit_rate_ge4",
-                "games": _payload_games({"games": event.get("games", [])}),
-                "metadata": {},
-            }
-            source = "performance_log"
-
-        snapshot_payload = _build_snapshot_payload(event, payload, sha)
-        snapshot_path = OUT_HISTORY_DIR / f"jogos_concurso_{concurso}.json"
-        snapshot_path.write_text(json.dumps(snapshot_payload, indent=2, ensure_ascii=False), encoding="utf-8")
-
-        compare_input = [(g["id"], [int(n) for n in g["numbers"]]) for g in snapshot_payload["games"]]
-        draw_set = {int(n) for n in event["dezenas_sorteadas"]}
-        recomputed = compute_hits(draw_set, compare_input)
-        summary = recomputed["summary"]
-
-        existing_games = _payload_games({"games": event.get("games", [])})
-        snapshot_games = snapshot_payload["games"]
-        games_match_snapshot = existing_games == snapshot_games
-
-        repaired = dict(event)
-        repaired_timestamp = _draw_date_to_timestamp_utc(event.get("data_sorteio"))
-        if repaired_timestamp:
-            repaired["timestamp_utc"] = repaired_timestamp
-            repaired["timestamp_brt"] = f"{event.get('data_sorteio')} 00:00:00"
-        repaired["ticket_size"] = int(snapshot_payload.get("ticket_size", event.get("ticket_size", 9)))
-        repaired["n_games"] = len(snapshot_games)
-        repaired["games"] = recomputed["per_game"]
-        repaired.update(summary)
-
-        repaired_meta = dict(meta)
-        if sha:
-            repaired_meta["git_sha"] = sha
-        else:
-            repaired_meta["git_sha"] = None
-        repaired_meta.setdefault("strategy", snapshot_payload["metadata"].get("strategy_name") or "megasena_v1")
-        repaired_meta["model_version"] = snapshot_payload["metadata"].get("model_version")
-        repaired_meta["generated_at_utc"] = snapshot_payload["metadata"].get("generated_at_utc")
-        repaired_meta["generated_at_brt"] = snapshot_payload["metadata"].get("generated_at_brt") or iso_utc_to_brt_text(
-            snapshot_payload["metadata"].get("generated_at_utc")
-        )
-        repaired_meta["target_concurso"] = snapshot_payload["metadata"].get("target_concurso")
-        repaired_meta["snapshot_source"] = source
-        repaired_meta["snapshot_path"] = str(snapshot_path.relative_to(REPO_ROOT))
-        repaired_meta.setdefault("logged_at_utc", event.get("meta", {}).get("logged_at_utc") if isinstance(event.get("meta"), dict) else None)
-        if repaired_meta.get("logged_at_utc") is None:
-            repaired_meta["logged_at_utc"] = event.get("timestamp_utc")
-        repaired_meta["logged_at_brt"] = repaired_meta.get("logged_at_brt") or iso_utc_to_brt_text(repaired_meta.get("logged_at_utc"))
-        repaired["meta"] = repaired_meta
-
-        repaired_entries.append(repaired)
-        audit_rows.append(
-            {
-                "concurso": concurso,
-                "data_sorteio": event.get("data_sorteio"),
-                "git_sha": sha,
-                "snapshot_source": source,
-                "games_match_snapshot": games_match_snapshot,
-                "max_hits": repaired["max_hits"],
-                "score": repaired["score"],
-                "snapshot_path": str(snapshot_path.relative_to(REPO_ROOT)),
-            }
-        )
+def _repair_event(
+    event: dict[str, Any],
+    git_reader: GitBatchReader,
+) -> tuple[dict[str, Any], dict[str, Any], dict[str, Any]]:
+    concurso = int(event["concurso"])
+    meta = dict(event.get("meta", {}) if isinstance(event.get("meta"), dict) else {})
+    sha = _normalize_git_sha(meta.get("git_sha")) or LEGACY_INFERRED_SHA.get(concurso)
+    source = "log_only"
+    payload = None
+
+    if sha:
+        payload = git_reader.read_json(sha, "out/jogos_gerados.json")
+        if payload is not None:
+            source = "git_show"
+
+    if payload is None:
+        payload = {
+            "game": event.get("game", "megasena"),
+            "ticket_size": event.get("ticket_size", 9),
+            "draw_size": 6,
+            "n_games": event.get("n_games", len(event.get("games", []))),
+            "objective": "maximize_hit_rate_ge4",
+            "games": _payload_games({"games": event.get("games", [])}),
+            "metadata": {},
+        }
+        source = "performance_log"
+
+    snapshot_payload = _build_snapshot_payload(event, payload, sha)
+    snapshot_path = OUT_HISTORY_DIR / snapshot_filename(concurso)
+
+    compare_input = [(g["id"], [int(n) for n in g["numbers"]]) for g in snapshot_payload["games"]]
+    draw_set = {int(n) for n in event["dezenas_sorteadas"]}
+    recomputed = compute_hits(draw_set, compare_input)
+    summary = recomputed["summary"]
+
+    existing_games = _payload_games({"games": event.get("games", [])})
+    snapshot_games = snapshot_payload["games"]
+    games_match_snapshot = existing_games == snapshot_games
+
+    repaired = dict(event)
+    repaired_timestamp = _draw_date_to_timestamp_utc(event.get("data_sorteio"))
+    if repaired_timestamp:
+        repaired["timestamp_utc"] = repaired_timestamp
+        repaired["timestamp_brt"] = f"{event.get('data_sorteio')} 00:00:00"
+    repaired["ticket_size"] = int(snapshot_payload.get("ticket_size", event.get("ticket_size", 9)))
+    repaired["n_games"] = len(snapshot_games)
+    repaired["games"] = recomputed["per_game"]
+    repaired.update(summary)
+
+    repaired_meta = dict(meta)
+    if sha:
+        repaired_meta["git_sha"] = sha
+    else:
+        repaired_meta["git_sha"] = None
+    repaired_meta.setdefault("strategy", snapshot_payload["metadata"].get("strategy_name") or "megasena_v1")
+    repaired_meta["model_version"] = snapshot_payload["metadata"].get("model_version")
+    repaired_meta["generated_at_utc"] = snapshot_payload["metadata"].get("generated_at_utc")
+    repaired_meta["generated_at_brt"] = snapshot_payload["metadata"].get("generated_at_brt") or iso_utc_to_brt_text(
+        snapshot_payload["metadata"].get("generated_at_utc")
+    )
+    repaired_meta["target_concurso"] = snapshot_payload["metadata"].get("target_concurso")
+    repaired_meta["snapshot_source"] = source
+    repaired_meta["snapshot_path"] = str(snapshot_path.relative_to(REPO_ROOT))
+    repaired_meta.setdefault("logged_at_utc", event.get("meta", {}).get("logged_at_utc") if isinstance(event.get("meta"), dict) else None)
+    if repaired_meta.get("logged_at_utc") is None:
+        repaired_meta["logged_at_utc"] = event.get("timestamp_utc")
+    repaired_meta["logged_at_brt"] = repaired_meta.get("logged_at_brt") or iso_utc_to_brt_text(repaired_meta.get("logged_at_utc"))
+    repaired["meta"] = repaired_meta
+
+    row = {
+        "concurso": concurso,
+        "data_sorteio": event.get("data_sorteio"),
+        "git_sha": sha,
+        "snapshot_source": source,
+        "games_match_snapshot": games_match_snapshot,
+        "max_hits": repaired["max_hits"],
+        "score": repaired["score"],
+        "snapshot_path": str(snapshot_path.relative_to(REPO_ROOT)),
+    }
+    return repaired, row, snapshot_payload
+
+
+def _chain_digest(digest: str, line: bytes) -> str:
+    """Digest encadeado por linha: pode ser retomado a partir do checkpoint sem reler o prefixo."""
+    return hashlib.sha256(bytes.fromhex(digest) + line).hexdigest()
+
+
+def load_checkpoint(report_path: Path | None = None) -> dict[str, Any] | None:
+    """Checkpoint do relatorio anterior com os totais acumulados (sem as linhas por entrada)."""
+    report_path = report_path or AUDIT_REPORT_PATH
+    try:
+        report = _load_json(report_path)
+    except (OSError, json.JSONDecodeError):
+        return None
+    checkpoint = report.get("checkpoint") if isinstance(report, dict) else None
+    if not isinstance(checkpoint, dict) or checkpoint.get("log_path") != _rel(PERFORMANCE_LOG_PATH):
+        return None
+    # relatorios anteriores so tinham os totais no topo
+    return {
+        "entries_audited": report.get("entries_audited", 0),
+        "all_entries_match_snapshots": report.get("all_entries_match_snapshots", True),
+        "invalid_line_offsets": [],
+        **checkpoint,
+    }
 
-    PERFORMANCE_LOG_PATH.write_text(
-        "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in repaired_entries),
-        encoding="utf-8",
+
+def _rel(path: Path) -> str:
+    try:
+        return str(path.relative_to(REPO_ROOT))
+    except ValueError:
+        return str(path)
+
+
+def _checkpoint_is_valid(log: BinaryIO, log_size: int, checkpoint: dict[str, Any] | None) -> bool:
+    if checkpoint is None:
+        return False
+    try:
+        offset = int(checkpoint["log_offset"])
+        tail_crc = int(checkpoint["tail_crc32"])
+        bytes.fromhex(str(checkpoint["digest"]))
+    except (KeyError, TypeError, ValueError):
+        return False
+    return 0 <= offset <= log_size and tail_crc32(log, offset) == tail_crc
+
+
+def _copy_range(src: BinaryIO, dst: BinaryIO, start: int, end: int) -> None:
+    src.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        chunk = src.read(min(COPY_CHUNK_SIZE, remaining))
+        if not chunk:
+            break
+        dst.write(chunk)
+        remaining -= len(chunk)
+
+
+def audit_and_repair(*, full: bool = False) -> dict[str, Any]:
+    """Audita apenas as linhas novas desde o checkpoint; `full=True` refaz o log inteiro.
+
+    As linhas reparadas vao para um arquivo temporario que substitui o log por
+    rename atomico, sob o lock do proprio log; `append_jsonl_many` confere depois
+    de obter o lock se o arquivo aberto ainda e o do caminho e, se nao, reabre,
+    entao um append que esperava o lock cai no log novo. Um checkpoint que nao
+    confere com o log (reescrita externa) forca a auditoria completa.
+
+    O checkpoint guarda so totais (entradas, se todas conferem, digest), e `rows`
+    traz as entradas verificadas nesta execucao. Linhas que nao sao JSON valido
+    ficam no lugar e tem o offset listado em `invalid_line_offsets`; uma linha
+    final incompleta tambem e preservada e aparece em `torn_tail`.
+    """
+    previous = None if full else load_checkpoint()
+    snapshots: list[tuple[int, dict[str, Any]]] = []
+    new_rows: list[dict[str, Any]] = []
+    invalid_offsets: list[int] = []
+    torn_tail: dict[str, int] | None = None
+
+    PERFORMANCE_LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+    PERFORMANCE_LOG_PATH.touch(exist_ok=True)
+    tmp_path = PERFORMANCE_LOG_PATH.with_name(PERFORMANCE_LOG_PATH.name + ".audit.tmp")
+    with PERFORMANCE_LOG_PATH.open("rb") as log, locked(log), GitBatchReader() as git_reader:
+        log_size = os.fstat(log.fileno()).st_size
+        if not _checkpoint_is_valid(log, log_size, previous):
+            previous = None
+        start = int(previous["log_offset"]) if previous else 0
+        digest = str(previous["digest"]) if previous else hashlib.sha256(b"").hexdigest()
+
+        changed = False
+        with tmp_path.open("wb") as tail:
+            log.seek(start)
+            position = start
+            while position < log_size:
+                raw = log.readline()
+                if not raw.endswith(b"\n"):
+                    # escritor interrompido: a linha fica como esta, fora do trecho auditado
+                    torn_tail = {"offset": start + tail.tell(), "bytes": log_size - position}
+                    break
+                position += len(raw)
+                event = parse_jsonl_line(raw)
+                if event is None:
+                    if raw.strip():
+                        invalid_offsets.append(start + tail.tell())
+                    tail.write(raw)
+                    digest = _chain_digest(digest, raw)
+                    continue
+                repaired, row, snapshot_payload = _repair_event(event, git_reader)
+                line = encode_jsonl_line(repaired)
+                changed = changed or line != raw
+                tail.write(line)
+                digest = _chain_digest(digest, line)
+                new_rows.append(row)
+                snapshots.append((row["concurso"], snapshot_payload))
+            tail_size = tail.tell()
+
+        if changed:
+            rewrite_path = PERFORMANCE_LOG_PATH.with_name(PERFORMANCE_LOG_PATH.name + ".tmp")
+            with rewrite_path.open("wb") as out, tmp_path.open("rb") as tail:
+                _copy_range(log, out, 0, start)
+                _copy_range(tail, out, 0, tail_size)
+                _copy_range(log, out, position, log_size)
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(rewrite_path, PERFORMANCE_LOG_PATH)
+        tmp_path.unlink(missing_ok=True)
+
+    entries_audited = (int(previous["entries_audited"]) if previous else 0) + len(new_rows)
+    all_match = (bool(previous["all_entries_match_snapshots"]) if previous else True) and all(
+        row["games_match_snapshot"] for row in new_rows
     )
+    invalid_line_offsets = (list(previous["invalid_line_offsets"]) if previous else []) + invalid_offsets
+    with PERFORMANCE_LOG_PATH.open("rb") as log:
+        offset = start + tail_size
+        checkpoint = {
+            "log_path": _rel(PERFORMANCE_LOG_PATH),
+            "log_offset": offset,
+            "tail_crc32": tail_crc32(log, offset),
+            "digest": digest,
+            "mode": "incremental" if previous else "full",
+            "entries_verified": len(new_rows),
+            "entries_audited": entries_audited,
+            "all_entries_match_snapshots": all_match,
+            "invalid_line_offsets": invalid_line_offsets,
+        }
+    if changed:
+        PerformanceLogIndex(PERFORMANCE_LOG_PATH).rebuild()
+
+    # Um unico append no arquivo compactado; a exportacao so regrava arquivos que mudaram.
+    archive_snapshots(snapshots, OUT_HISTORY_ARCHIVE_PATH)
+    if snapshots:
+        export_snapshots(
+            OUT_HISTORY_DIR,
+            OUT_HISTORY_ARCHIVE_PATH,
+            start=min(concurso for concurso, _ in snapshots),
+            end=max(concurso for concurso, _ in snapshots),
+        )
 
     report = {
         **utc_now_pair("generated_at"),
-        "entries_audited": len(audit_rows),
-        "all_entries_match_snapshots": all(row["games_match_snapshot"] for row in audit_rows),
-        "rows": audit_rows,
+        "entries_audited": entries_audited,
+        "all_entries_match_snapshots": all_match,
+        "invalid_line_offsets": invalid_line_offsets,
+        "torn_tail": torn_tail,
+        "checkpoint": checkpoint,
+        "rows": new_rows,
     }
     AUDIT_REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
     AUDIT_REPORT_PATH.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
     return report
 
 
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Audita e repara data/performance_log.jsonl.")
+    parser.add_argument("--full", action="store_true", help="Ignora o checkpoint e reaudita o log inteiro.")
+    args = parser.parse_args(argv)
+
+    report = audit_and_repair(full=args.full)
+    print(
+        "[AUDIT] OK:",
+        f"entries={report['entries_audited']}",
+        f"verified={report['checkpoint']['entries_verified']}",
+        f"mode={report['checkpoint']['mode']}",
+        f"all_match={report['all_entries_match_snapshots']}",
+        f"invalid_lines={len(report['invalid_line_offsets'])}",
+        f"torn_tail={report['torn_tail'] is not None}",
+    )
+
+
 if __name__ == "__main__":
-    report = audit_and_repair()
-    print("[AUDIT] OK:", f"entries={report['entries_audited']}", f"all_match={report['all_entries_match_snapshots']}")
+    from core.profiling import run_main
+
+    run_main(main)
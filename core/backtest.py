@@ -1,29 +1,50 @@
 from __future__ import annotations
 
+import argparse
 import json
-from itertools import combinations
-from typing import Any
+import time
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Any
 
+import numpy as np
 import pandas as pd
 
-from core.compare_results import compute_hits
 from core.config import (
     BACKTEST_REPORT_PATH as OUT_PATH,
-    DEFAULT_BACKTEST_N_SIM,
+    BACKTEST_N_SIM_SWEEP_REPORT_PATH,
+    BACKTEST_VARIANCE_REPORT_PATH,
+    BACKTEST_WARM_START_REPORT_PATH,
     DEFAULT_MAX_INTERSECTION,
     DEFAULT_MIN_HISTORY,
     DEFAULT_N_SIM,
+    DEFAULT_KEY_SAMPLER,
     DEFAULT_NUM_GAMES,
+    DEFAULT_OPTIMIZER,
+    DEFAULT_SAMPLER,
     DEFAULT_TICKET_SIZE,
     DEFAULT_WINDOW,
-    RESULTS_PATH,
+    MIN_NUMBER,
     get_structural_rules,
     get_parameters,
-    load_config,
 )
-from core.generator import build_probabilities_from_history, generate_games_from_probs, pair_key
+from core.generator import (
+    ANNEAL_ITERATIONS,
+    KEY_SAMPLERS,
+    WARM_START_REFRESH,
+    available_key_samplers,
+    build_probabilities_from_history,
+    generate_games_from_probs,
+    unique_weighted_samples,
+    warm_start_pool,
+)
+from core import metrics
+from core.backtest_cache import N_PAIRS, PAIR_INDEX, ProbabilityBlock, WeakPairMasks
+from core.hit_matrix import evaluate_paired
 from core.versioning import _config_hash
 
+if TYPE_CHECKING:
+    from core.engine import Engine
+
 DRAW_SIZE = 6
 
 
@@ -43,56 +64,79 @@ def slice_results_for_backtest(
     return results_df.tail(keep_rows).reset_index(drop=True)
 
 
+@metrics.timed("backtest.probability_cache")
 def build_probability_cache(
     results_df: pd.DataFrame,
     *,
     windows: list[int],
     min_history: int,
     config: dict[str, Any] | None = None,
-) -> dict[int, dict[int, Any]]:
-    caches: dict[int, dict[int, Any]] = {}
+    dtype: Any = np.float64,
+) -> ProbabilityBlock:
+    """Probabilidades walk-forward de cada janela em um unico bloco (ver `core.backtest_cache`)."""
     unique_windows = sorted({int(window) for window in windows})
+    starts = [max(int(min_history), window) for window in unique_windows]
+    block = ProbabilityBlock(unique_windows, starts, base=min(starts, default=0), stop=len(results_df), dtype=dtype)
 
-    for window in unique_windows:
-        start_idx = max(int(min_history), window)
-        window_cache: dict[int, Any] = {}
+    for window, start_idx in zip(unique_windows, starts):
         for idx in range(start_idx, len(results_df)):
             history = results_df.iloc[:idx].copy()
-            window_cache[idx] = build_probabilities_from_history(history, window=window, config=config)
-        caches[window] = window_cache
+            block.set(window, idx, build_probabilities_from_history(history, window=window, config=config))
 
-    return caches
+    return block
 
 
+@metrics.timed("backtest.weak_pair_cache")
 def build_weak_pair_cache(
     results_df: pd.DataFrame,
     *,
     min_history: int,
     bottom_pairs: int,
-) -> dict[int, set[tuple[int, int]]]:
-    if bottom_pairs <= 0:
-        return {}
-
-    pair_counts: dict[tuple[int, int], int] = {}
-    caches: dict[int, set[tuple[int, int]]] = {}
-
-    for idx in range(len(results_df)):
-        if idx >= int(min_history):
-            ranked = sorted(
-                ((pair, count) for pair, count in pair_counts.items() if count > 0),
-                key=lambda item: (item[1], item[0]),
-            )
-            caches[idx] = {pair for pair, _count in ranked[:bottom_pairs]}
-
-        row = results_df.iloc[idx]
-        nums = sorted(int(row[f"d{i}"]) for i in range(1, DRAW_SIZE + 1))
-        for a, b in combinations(nums, 2):
-            key = pair_key(a, b)
-            pair_counts[key] = pair_counts.get(key, 0) + 1
+) -> WeakPairMasks:
+    """Para cada sorteio a partir de `min_history`, os `bottom_pairs` pares menos frequentes ate ali.
 
-    return caches
+    Mesma ordem de `generator.build_weak_pair_set` (contagem e depois o par),
+    sem contar pares que ainda nao sairam.
+    """
+    start = max(min(int(min_history), len(results_df)), 0)
+    if bottom_pairs <= 0:
+        return WeakPairMasks(start, start)
+
+    draws = np.sort(results_df[[f"d{i}" for i in range(1, DRAW_SIZE + 1)]].to_numpy(dtype=np.int64), axis=1) - MIN_NUMBER
+    first, second = np.triu_indices(DRAW_SIZE, k=1)
+    pairs = PAIR_INDEX[draws[:, first], draws[:, second]]
+    counts = np.bincount(pairs[:start].ravel(), minlength=N_PAIRS)
+    masks = WeakPairMasks(start, len(results_df))
+
+    for idx in range(start, len(results_df)):
+        seen = np.flatnonzero(counts)
+        masks.set(idx, seen[np.argsort(counts[seen], kind="stable")[:bottom_pairs]])
+        counts[pairs[idx]] += 1
+
+    return masks
+
+
+def _aggregate_summaries(summaries: list[dict[str, Any]]) -> dict[str, Any]:
+    total_draws = len(summaries)
+    sum_max_hits = sum(float(summary["max_hits"]) for summary in summaries)
+    sum_score = sum(float(summary["score"]) for summary in summaries)
+    sum_coverage_rate = sum(float(summary.get("coverage_rate", 0.0)) for summary in summaries)
+    sum_neglected = sum(float(len(summary.get("neglected_draw_numbers", []))) for summary in summaries)
+    count_ge4_draws = sum(int(summary["count_ge4"] > 0) for summary in summaries)
+    count_ge5_draws = sum(int(summary["count_ge5"] > 0) for summary in summaries)
+    total_eq6 = sum(int(summary["count_eq6"]) for summary in summaries)
+    return {
+        "avg_max_hits": round(sum_max_hits / total_draws, 4),
+        "avg_score": round(sum_score / total_draws, 4),
+        "rate_ge4": round(count_ge4_draws / total_draws, 4),
+        "rate_ge5": round(count_ge5_draws / total_draws, 4),
+        "total_eq6": total_eq6,
+        "avg_coverage_rate": round(sum_coverage_rate / total_draws, 4),
+        "avg_neglected_draw_numbers": round(sum_neglected / total_draws, 4),
+    }
 
 
+@metrics.timed("backtest.run")
 def run_backtest(
     results_df: pd.DataFrame,
     *,
@@ -104,23 +148,46 @@ def run_backtest(
     max_intersection: int = DEFAULT_MAX_INTERSECTION,
     seed_base: int = 10_000,
     config: dict | None = None,
-    probability_cache: dict[int, Any] | None = None,
+    probability_cache: Mapping[int, Any] | None = None,
     include_per_draw: bool = True,
-    weak_pair_cache: dict[int, set[tuple[int, int]]] | None = None,
+    weak_pair_cache: Mapping[int, set[tuple[int, int]]] | None = None,
+    key_sampler: str | None = None,
+    warm_start: float | None = None,
+    n_sim_sweep: list[int] | tuple[int, ...] | None = None,
 ) -> dict:
+    """Backtest walk-forward: para cada sorteio, gera jogos so com o historico anterior.
+
+    `warm_start` (fracao renovada por passo, ex.: 0.2) liga a reutilizacao do
+    lote de candidatos: o lote do sorteio anterior e reavaliado sob as novas
+    probabilidades e so essa fracao e sorteada de novo (ver `warm_start_pool`).
+    Vale para `sampler = weighted` com `optimizer = greedy`.
+
+    `n_sim_sweep` avalia varios `n_sim` com uma unica amostragem por sorteio: o
+    lote do maior valor e sorteado uma vez e cada valor seleciona jogos a partir
+    do seu prefixo, que e exatamente o lote que aquele `n_sim` teria sorteado
+    (so com `key_sampler = iid`). O relatorio ganha a tabela `n_sim_sweep`.
+    """
     if len(results_df) <= min_history:
         raise ValueError("Historico insuficiente para backtest.")
 
     per_draw = []
-    total_draws = 0
-    sum_max_hits = 0.0
-    sum_score = 0.0
-    sum_coverage_rate = 0.0
-    sum_neglected = 0.0
-    count_ge4_draws = 0
-    count_ge5_draws = 0
-    total_eq6 = 0
     structural_rules = get_structural_rules(config or {})
+    params = get_parameters(config or {})
+    sampler = str(params.get("sampler", DEFAULT_SAMPLER))
+    key_sampler = key_sampler or str(params.get("key_sampler", DEFAULT_KEY_SAMPLER))
+    optimizer = str(params.get("optimizer", DEFAULT_OPTIMIZER))
+    anneal_iterations = int(params.get("anneal_iterations", ANNEAL_ITERATIONS))
+    if (warm_start is not None or n_sim_sweep) and (sampler != "weighted" or optimizer != "greedy"):
+        raise ValueError("warm_start e n_sim_sweep so valem para sampler='weighted' e optimizer='greedy'.")
+    if n_sim_sweep and (warm_start is not None or key_sampler != "iid"):
+        raise ValueError("n_sim_sweep requer key_sampler='iid' e nao combina com warm_start.")
+    sweep = sorted({int(value) for value in n_sim_sweep or ()} | {int(n_sim)}) if n_sim_sweep else [int(n_sim)]
+    if sweep[0] <= 0:
+        raise ValueError("n_sim deve ser maior que zero")
+    pool = None
+    candidates_sampled = 0
+    games_by_n_sim: dict[int, list[list[list[int]]]] = {value: [] for value in sweep}
+    draws: list[list[int]] = []
     for idx in range(min_history, len(results_df)):
         target = results_df.iloc[idx]
 
@@ -133,113 +200,257 @@ def run_backtest(
             weak_pairs = weak_pair_cache[idx]
         else:
             weak_pairs = set()
-        games = generate_games_from_probs(
-            probs,
-            seed=seed_base + idx,
-            n_games=n_games,
-            ticket_size=ticket_size,
-            n_sim=n_sim,
-            max_intersection=max_intersection,
-            weak_pairs=weak_pairs,
-            max_seq=int(structural_rules["max_seq"]),
-            min_diff=int(structural_rules["min_diff"]),
-            penalty_weak_pair=float(structural_rules["penalty_weak_pair"]),
-        )
-
-        draw_numbers = [int(target[f"d{i}"]) for i in range(1, DRAW_SIZE + 1)]
-        compare_input = [(f"J{str(i + 1).zfill(2)}", game) for i, game in enumerate(games)]
-        result = compute_hits(set(draw_numbers), compare_input)
-        summary = result["summary"]
-        total_draws += 1
-        sum_max_hits += float(summary["max_hits"])
-        sum_score += float(summary["score"])
-        sum_coverage_rate += float(summary.get("coverage_rate", 0.0))
-        sum_neglected += float(len(summary.get("neglected_draw_numbers", [])))
-        count_ge4_draws += int(summary["count_ge4"] > 0)
-        count_ge5_draws += int(summary["count_ge5"] > 0)
-        total_eq6 += int(summary["count_eq6"])
-
-        if include_per_draw:
+        pool_rng = np.random.default_rng(seed_base + idx)
+        if warm_start is not None:
+            if pool is None:
+                pool, drawn = unique_weighted_samples(probs, ticket_size, n_sim, pool_rng, key_sampler=key_sampler)
+            else:
+                pool, drawn = warm_start_pool(
+                    pool,
+                    probs,
+                    ticket_size,
+                    n_sim,
+                    pool_rng,
+                    refresh=warm_start,
+                    key_sampler=key_sampler,
+                    weak_pairs=weak_pairs,
+                    penalty_weak_pair=float(structural_rules["penalty_weak_pair"]),
+                )
+            candidates_sampled += drawn
+        elif n_sim_sweep:
+            # mesmo rng que generate_games_from_probs(seed=...) usaria para o maior n_sim
+            pool, drawn = unique_weighted_samples(probs, ticket_size, sweep[-1], pool_rng, key_sampler=key_sampler)
+            candidates_sampled += drawn
+        for value in sweep:
+            games = generate_games_from_probs(
+                probs,
+                seed=seed_base + idx,
+                n_games=n_games,
+                ticket_size=ticket_size,
+                n_sim=value,
+                max_intersection=max_intersection,
+                weak_pairs=weak_pairs,
+                max_seq=int(structural_rules["max_seq"]),
+                min_diff=int(structural_rules["min_diff"]),
+                penalty_weak_pair=float(structural_rules["penalty_weak_pair"]),
+                sampler=sampler,
+                key_sampler=key_sampler,
+                optimizer=optimizer,
+                anneal_iterations=anneal_iterations,
+                candidate_pool=pool[:value] if n_sim_sweep else pool,
+            )
+            games_by_n_sim[value].append(games)
+        draws.append([int(target[f"d{i}"]) for i in range(1, DRAW_SIZE + 1)])
+
+    # Todos os sorteios avaliados de uma vez; cada resumo equivale ao de compute_hits.
+    games_per_draw = games_by_n_sim[int(n_sim)]
+    with metrics.timer("backtest.evaluate"):
+        hits_per_draw, summaries = evaluate_paired(games_per_draw, draws)
+    if include_per_draw:
+        for offset, summary in enumerate(summaries):
+            target = results_df.iloc[min_history + offset]
             per_draw.append(
                 {
                     "concurso": int(target["concurso"]),
                     "data": str(target["data"]),
-                    "dezenas_sorteadas": draw_numbers,
+                    "dezenas_sorteadas": draws[offset],
                     **summary,
-                    "games": result["per_game"],
+                    "games": [
+                        {"id": f"J{str(i + 1).zfill(2)}", "numbers": game, "hits": int(hits)}
+                        for i, (game, hits) in enumerate(zip(games_per_draw[offset], hits_per_draw[offset]))
+                    ],
                 }
             )
 
-    avg_max_hits = sum_max_hits / total_draws
-    avg_score = sum_score / total_draws
-    rate_ge4 = count_ge4_draws / total_draws
-    rate_ge5 = count_ge5_draws / total_draws
-    avg_coverage_rate = sum_coverage_rate / total_draws
-    avg_neglected = sum_neglected / total_draws
-
-    return {
+    report = {
         "summary": {
-            "draws_evaluated": total_draws,
+            "draws_evaluated": len(summaries),
             "window": window,
             "min_history": min_history,
             "n_games": n_games,
             "ticket_size": ticket_size,
             "n_sim": n_sim,
             "max_intersection": max_intersection,
-            "avg_max_hits": round(avg_max_hits, 4),
-            "avg_score": round(avg_score, 4),
-            "rate_ge4": round(rate_ge4, 4),
-            "rate_ge5": round(rate_ge5, 4),
-            "total_eq6": total_eq6,
-            "avg_coverage_rate": round(avg_coverage_rate, 4),
-            "avg_neglected_draw_numbers": round(avg_neglected, 4),
+            **_aggregate_summaries(summaries),
         },
         "per_draw": per_draw if include_per_draw else [],
     }
+    if warm_start is not None:
+        report["summary"]["warm_start"] = warm_start
+        report["summary"]["candidates_sampled"] = candidates_sampled
+    if n_sim_sweep:
+        report["summary"]["candidates_sampled"] = candidates_sampled
+        report["n_sim_sweep"] = [
+            {"n_sim": value, **_aggregate_summaries(evaluate_paired(games_by_n_sim[value], draws)[1])}
+            for value in sweep
+        ]
+    return report
 
 
-def main() -> None:
-    config = load_config()
-    params = get_parameters(config)
+VARIANCE_METRICS = ("avg_max_hits", "avg_score", "rate_ge4", "avg_coverage_rate")
+
 
-    raw_results_df = pd.read_csv(RESULTS_PATH)
-    window = int(params.get("window", DEFAULT_WINDOW))
-    min_history = max(int(params.get("min_history", DEFAULT_MIN_HISTORY)), window)
-    backtest_history_limit = params.get("backtest_history_limit")
-    results_df = slice_results_for_backtest(
-        raw_results_df,
-        min_history=min_history,
-        max_draws=int(backtest_history_limit) if backtest_history_limit is not None else None,
+def measure_key_sampler_variance(
+    results_df: pd.DataFrame,
+    *,
+    key_samplers: list[str] | tuple[str, ...] = KEY_SAMPLERS,
+    repeats: int = 5,
+    seed_stride: int = 1_000_003,
+    **backtest_kwargs: Any,
+) -> dict:
+    """Repete o backtest com seeds diferentes para cada key_sampler e mede a dispersao das metricas.
+
+    Os sorteios e as probabilidades sao os mesmos em todas as repeticoes; so muda
+    a amostragem dos candidatos, entao o desvio padrao mede o ruido do proprio sampler.
+    """
+    if repeats < 2:
+        raise ValueError("repeats deve ser >= 2 para estimar variancia.")
+    backtest_kwargs = {**backtest_kwargs, "include_per_draw": False}
+    seed_base = int(backtest_kwargs.pop("seed_base", 10_000))
+
+    rows = []
+    for key_sampler in key_samplers:
+        values: dict[str, list[float]] = {metric: [] for metric in VARIANCE_METRICS}
+        for repeat in range(repeats):
+            summary = run_backtest(
+                results_df,
+                seed_base=seed_base + repeat * seed_stride,
+                key_sampler=key_sampler,
+                **backtest_kwargs,
+            )["summary"]
+            for metric in VARIANCE_METRICS:
+                values[metric].append(float(summary[metric]))
+        row: dict[str, Any] = {"key_sampler": key_sampler, "repeats": repeats}
+        for metric, samples in values.items():
+            row[f"{metric}_mean"] = round(float(np.mean(samples)), 6)
+            row[f"{metric}_std"] = round(float(np.std(samples, ddof=1)), 6)
+        rows.append(row)
+
+    baseline = next((row for row in rows if row["key_sampler"] == "iid"), None)
+    if baseline is not None:
+        for row in rows:
+            for metric in VARIANCE_METRICS:
+                base_std = baseline[f"{metric}_std"]
+                # variancia relativa ao iid: < 1 significa que o sampler precisa de menos n_sim
+                row[f"{metric}_variance_ratio"] = (
+                    round((row[f"{metric}_std"] / base_std) ** 2, 4) if base_std > 0 else None
+                )
+    return {"n_sim": backtest_kwargs.get("n_sim", DEFAULT_N_SIM), "rows": rows}
+
+
+def compare_warm_start(
+    results_df: pd.DataFrame,
+    *,
+    refresh: float = WARM_START_REFRESH,
+    **backtest_kwargs: Any,
+) -> dict:
+    """Roda o mesmo backtest a frio e com warm start e mede a deriva das metricas."""
+    backtest_kwargs = {**backtest_kwargs, "include_per_draw": False}
+    runs = {}
+    for mode, warm_start in (("cold", None), ("warm", refresh)):
+        started = time.perf_counter()
+        summary = run_backtest(results_df, warm_start=warm_start, **backtest_kwargs)["summary"]
+        runs[mode] = (summary, time.perf_counter() - started)
+
+    (cold, cold_seconds), (warm, warm_seconds) = runs["cold"], runs["warm"]
+    n_sim = int(backtest_kwargs.get("n_sim", DEFAULT_N_SIM))
+    return {
+        "refresh": refresh,
+        "n_sim": n_sim,
+        "draws_evaluated": cold["draws_evaluated"],
+        "cold_seconds": round(cold_seconds, 4),
+        "warm_seconds": round(warm_seconds, 4),
+        # a frio cada passo sorteia ao menos n_sim candidatos
+        "candidates_sampled": {"cold": cold["draws_evaluated"] * n_sim, "warm": warm["candidates_sampled"]},
+        "metrics": {
+            metric: {"cold": cold[metric], "warm": warm[metric], "drift": round(warm[metric] - cold[metric], 4)}
+            for metric in VARIANCE_METRICS
+        },
+    }
+
+
+def main(argv: list[str] | None = None, *, engine: Engine | None = None) -> None:
+    from core.engine import Engine
+
+    parser = argparse.ArgumentParser(description="Backtest walk-forward da estrategia atual.")
+    parser.add_argument(
+        "--variance",
+        action="store_true",
+        help="Mede a variancia das metricas por key_sampler em vez de gerar o relatorio padrao.",
     )
-    n_games = int(params.get("num_games", DEFAULT_NUM_GAMES))
-    ticket_size = int(params.get("ticket_size", DEFAULT_TICKET_SIZE))
-    n_sim = int(params.get("backtest_n_sim", min(int(params.get("n_sim", DEFAULT_N_SIM)), DEFAULT_BACKTEST_N_SIM)))
-    max_intersection = int(params.get("max_intersection", DEFAULT_MAX_INTERSECTION))
-    structural_rules = get_structural_rules(config)
-    weak_pair_cache = build_weak_pair_cache(
-        results_df,
-        min_history=min_history,
-        bottom_pairs=int(structural_rules["bottom_pairs"]),
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--key-samplers", default=",".join(available_key_samplers()))
+    parser.add_argument(
+        "--warm-start-drift",
+        action="store_true",
+        help="Compara o backtest com warm start contra o backtest a frio.",
     )
-
-    report = run_backtest(
-        results_df,
-        window=window,
-        min_history=min_history,
-        n_games=n_games,
-        ticket_size=ticket_size,
-        n_sim=n_sim,
-        max_intersection=max_intersection,
-        config=config,
-        weak_pair_cache=weak_pair_cache,
+    parser.add_argument(
+        "--n-sim-sweep",
+        help="Lista de n_sim separados por virgula avaliados com uma unica amostragem (ex.: 20,100,500).",
     )
-    report["strategy"] = {
-        "strategy_name": config.get("strategy_name"),
-        "model_version": config.get("model_version"),
-        "config_hash": _config_hash(config),
-        "source_draws_available": len(raw_results_df),
-        "source_draws_used": len(results_df),
-    }
+    args = parser.parse_args(argv)
+
+    engine = engine or Engine()
+    config = engine.config
+    params = get_parameters(config)
+    results_df = engine.backtest_history(config)
+    backtest_kwargs = engine.backtest_kwargs(config)
+
+    if args.variance:
+        key_samplers = [name.strip() for name in args.key_samplers.split(",") if name.strip()]
+        variance_report = measure_key_sampler_variance(
+            results_df,
+            key_samplers=key_samplers,
+            repeats=args.repeats,
+            **backtest_kwargs,
+        )
+        variance_report["config_hash"] = _config_hash(config)
+        BACKTEST_VARIANCE_REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with BACKTEST_VARIANCE_REPORT_PATH.open("w", encoding="utf-8") as f:
+            json.dump(variance_report, f, indent=2, ensure_ascii=False)
+        for row in variance_report["rows"]:
+            print(
+                "[BACKTEST] variance:",
+                f"key_sampler={row['key_sampler']}",
+                f"avg_score={row['avg_score_mean']}+-{row['avg_score_std']}",
+                f"rate_ge4={row['rate_ge4_mean']}+-{row['rate_ge4_std']}",
+            )
+        return
+
+    if args.n_sim_sweep:
+        n_sim_sweep = [int(value) for value in args.n_sim_sweep.split(",") if value.strip()]
+        sweep_report = run_backtest(results_df, include_per_draw=False, n_sim_sweep=n_sim_sweep, **backtest_kwargs)
+        sweep_report["config_hash"] = _config_hash(config)
+        BACKTEST_N_SIM_SWEEP_REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with BACKTEST_N_SIM_SWEEP_REPORT_PATH.open("w", encoding="utf-8") as f:
+            json.dump(sweep_report, f, indent=2, ensure_ascii=False)
+        for row in sweep_report["n_sim_sweep"]:
+            print(
+                "[BACKTEST] n_sim sweep:",
+                f"n_sim={row['n_sim']}",
+                f"avg_max_hits={row['avg_max_hits']}",
+                f"avg_score={row['avg_score']}",
+                f"rate_ge4={row['rate_ge4']}",
+            )
+        return
+
+    warm_start = params.get("backtest_warm_start")
+    if args.warm_start_drift:
+        drift_report = compare_warm_start(
+            results_df,
+            refresh=float(warm_start) if warm_start is not None else WARM_START_REFRESH,
+            **backtest_kwargs,
+        )
+        drift_report["config_hash"] = _config_hash(config)
+        BACKTEST_WARM_START_REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with BACKTEST_WARM_START_REPORT_PATH.open("w", encoding="utf-8") as f:
+            json.dump(drift_report, f, indent=2, ensure_ascii=False)
+        for metric, values in drift_report["metrics"].items():
+            print("[BACKTEST] warm start:", f"{metric} cold={values['cold']} warm={values['warm']}")
+        return
+
+    report = engine.backtest()
 
     OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
     with OUT_PATH.open("w", encoding="utf-8") as f:
@@ -253,4 +464,6 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    from core.profiling import run_main
+
+    run_main(main)
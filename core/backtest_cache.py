@@ -0,0 +1,205 @@
+"""Caches compactos do backtest em arrays NumPy contiguos.
+
+`ProbabilityBlock` guarda as probabilidades de todas as janelas em um unico
+bloco `(n_janelas, n_sorteios, 60)` (float64; float32 opcional);
+`WeakPairMasks` guarda os pares fracos de cada sorteio como uma mascara de
+1770 bits (um bit por par, na ordem de `np.triu_indices(60, 1)`). Os dois se
+comportam como os dicts antigos do ponto de vista de `run_backtest`:
+`block[window][idx]` devolve o vetor de 60 probabilidades (em float64) e
+`masks[idx]` o `set` de pares `(a, b)`.
+
+Como o conteudo e um array so, passar o cache para outro processo custa uma
+copia de bytes (pickle) ou nada: `share()` copia os arrays para
+`multiprocessing.shared_memory` e devolve um descritor pequeno que o worker
+abre com `attach()`.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator, Mapping
+from multiprocessing import shared_memory
+from typing import Any
+
+import numpy as np
+
+from core.config import MAX_NUMBER, MIN_NUMBER
+
+N_NUMBERS = MAX_NUMBER - MIN_NUMBER + 1
+PAIR_FIRST, PAIR_SECOND = np.triu_indices(N_NUMBERS, k=1)
+N_PAIRS = len(PAIR_FIRST)
+# PAIR_INDEX[a, b] = posicao do par (a, b), a < b, ambos 0-based.
+PAIR_INDEX = np.full((N_NUMBERS, N_NUMBERS), -1, dtype=np.int64)
+PAIR_INDEX[PAIR_FIRST, PAIR_SECOND] = np.arange(N_PAIRS)
+MASK_BYTES = (N_PAIRS + 7) // 8
+
+
+def _to_shared(array: np.ndarray) -> tuple[shared_memory.SharedMemory, dict[str, Any]]:
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    return shm, {"name": shm.name, "shape": list(array.shape), "dtype": array.dtype.str}
+
+
+def _from_shared(descriptor: dict[str, Any]) -> tuple[shared_memory.SharedMemory, np.ndarray]:
+    shm = shared_memory.SharedMemory(name=descriptor["name"])
+    array = np.ndarray(tuple(descriptor["shape"]), dtype=np.dtype(descriptor["dtype"]), buffer=shm.buf)
+    array.flags.writeable = False
+    return shm, array
+
+
+class WindowProbabilities(Mapping[int, np.ndarray]):
+    """Probabilidades de uma janela, indexadas pelo sorteio (`idx`) como no dict antigo."""
+
+    def __init__(self, values: np.ndarray, *, base: int, start: int, stop: int) -> None:
+        self._values = values
+        self._base = base
+        self.start = start
+        self.stop = stop
+
+    def __getitem__(self, idx: int) -> np.ndarray:
+        if not isinstance(idx, (int, np.integer)) or not self.start <= idx < self.stop:
+            raise KeyError(idx)
+        return self._values[idx - self._base].astype(np.float64)
+
+    def __contains__(self, idx: object) -> bool:
+        return isinstance(idx, (int, np.integer)) and self.start <= idx < self.stop
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(self.start, self.stop))
+
+    def __len__(self) -> int:
+        return max(self.stop - self.start, 0)
+
+
+class ProbabilityBlock(Mapping[int, WindowProbabilities]):
+    """Bloco `(n_janelas, stop - base, 60)`; `block[window]` e a vista de uma janela.
+
+    A janela `w` so tem linhas validas a partir de `starts[w]` (o resto fica NaN).
+    O padrao float64 reproduz o caminho sem cache; `dtype=np.float32` usa metade
+    da memoria, mas o arredondamento pode mudar um sorteio ponderado que caia
+    exatamente na fronteira, entao fica fora do backtest e da otimizacao publicados.
+    """
+
+    def __init__(
+        self,
+        windows: list[int],
+        starts: list[int],
+        *,
+        base: int,
+        stop: int,
+        values: np.ndarray | None = None,
+        dtype: Any = np.float64,
+    ) -> None:
+        self.windows = [int(window) for window in windows]
+        self.starts = [int(start) for start in starts]
+        self.base = int(base)
+        self.stop = int(stop)
+        shape = (len(self.windows), max(self.stop - self.base, 0), N_NUMBERS)
+        if values is None:
+            values = np.full(shape, np.nan, dtype=dtype)
+        elif values.shape != shape:
+            raise ValueError(f"Bloco com formato {values.shape}, esperado {shape}.")
+        self.values = values
+        self._position = {window: position for position, window in enumerate(self.windows)}
+        self._shm: shared_memory.SharedMemory | None = None
+
+    def __getitem__(self, window: int) -> WindowProbabilities:
+        position = self._position[int(window)]
+        return WindowProbabilities(
+            self.values[position], base=self.base, start=self.starts[position], stop=self.stop
+        )
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.windows)
+
+    def __len__(self) -> int:
+        return len(self.windows)
+
+    def set(self, window: int, idx: int, probs: np.ndarray) -> None:
+        self.values[self._position[int(window)], idx - self.base] = probs
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.values.nbytes)
+
+    def share(self) -> tuple[shared_memory.SharedMemory, dict[str, Any]]:
+        """Copia o bloco para memoria compartilhada.
+
+        Quem chama fica dono do segmento (`close()` + `unlink()` ao terminar);
+        o descritor e picklable e vai para os workers, que usam `attach`.
+        """
+        shm, descriptor = _to_shared(self.values)
+        descriptor.update(windows=self.windows, starts=self.starts, base=self.base, stop=self.stop)
+        return shm, descriptor
+
+    @classmethod
+    def attach(cls, descriptor: dict[str, Any]) -> ProbabilityBlock:
+        """Vista somente-leitura sobre o segmento de `share()`, sem copiar."""
+        shm, values = _from_shared(descriptor)
+        block = cls(
+            descriptor["windows"], descriptor["starts"], base=descriptor["base"], stop=descriptor["stop"], values=values
+        )
+        block._shm = shm
+        return block
+
+
+class WeakPairMasks(Mapping[int, set[tuple[int, int]]]):
+    """Uma mascara de 1770 bits por sorteio em `[start, stop)`; `masks[idx]` devolve o set de pares."""
+
+    def __init__(self, start: int, stop: int, *, bits: np.ndarray | None = None) -> None:
+        self.start = int(start)
+        self.stop = int(stop)
+        shape = (max(self.stop - self.start, 0), MASK_BYTES)
+        if bits is None:
+            bits = np.zeros(shape, dtype=np.uint8)
+        elif bits.shape != shape:
+            raise ValueError(f"Mascaras com formato {bits.shape}, esperado {shape}.")
+        self.bits = bits
+        self._shm: shared_memory.SharedMemory | None = None
+
+    def pair_indices(self, idx: int) -> np.ndarray:
+        """Posicoes (em `PAIR_FIRST`/`PAIR_SECOND`) dos pares fracos do sorteio `idx`."""
+        if idx not in self:
+            raise KeyError(idx)
+        return np.flatnonzero(np.unpackbits(self.bits[idx - self.start], count=N_PAIRS))
+
+    def matrix(self, idx: int) -> np.ndarray:
+        """Matriz booleana 60x60 simetrica (0-based) dos pares fracos do sorteio `idx`."""
+        positions = self.pair_indices(idx)
+        weak = np.zeros((N_NUMBERS, N_NUMBERS), dtype=bool)
+        weak[PAIR_FIRST[positions], PAIR_SECOND[positions]] = True
+        return weak | weak.T
+
+    def __getitem__(self, idx: int) -> set[tuple[int, int]]:
+        positions = self.pair_indices(idx)
+        return set(zip((PAIR_FIRST[positions] + MIN_NUMBER).tolist(), (PAIR_SECOND[positions] + MIN_NUMBER).tolist()))
+
+    def __contains__(self, idx: object) -> bool:
+        return isinstance(idx, (int, np.integer)) and self.start <= idx < self.stop
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(self.start, self.stop))
+
+    def __len__(self) -> int:
+        return max(self.stop - self.start, 0)
+
+    def set(self, idx: int, positions: np.ndarray) -> None:
+        row = np.zeros(N_PAIRS, dtype=bool)
+        row[positions] = True
+        self.bits[idx - self.start] = np.packbits(row)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.bits.nbytes)
+
+    def share(self) -> tuple[shared_memory.SharedMemory, dict[str, Any]]:
+        """Como `ProbabilityBlock.share`."""
+        shm, descriptor = _to_shared(self.bits)
+        descriptor.update(start=self.start, stop=self.stop)
+        return shm, descriptor
+
+    @classmethod
+    def attach(cls, descriptor: dict[str, Any]) -> WeakPairMasks:
+        shm, bits = _from_shared(descriptor)
+        masks = cls(descriptor["start"], descriptor["stop"], bits=bits)
+        masks._shm = shm
+        return masks
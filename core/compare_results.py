@@ -15,14 +15,20 @@ from core.config import (
     MAX_NUMBER,
     MIN_NUMBER,
     OUT_GAMES_PATH,
+    OUT_HISTORY_ARCHIVE_PATH,
     OUT_HISTORY_DIR,
     PERFORMANCE_LOG_PATH,
     RESULTS_PATH,
 )
+from core.event_store import PERFORMANCE_STREAM, open_event_store, record_events
+from core.history_archive import load_snapshots, read_snapshot
+from core.jsonl_log import read_jsonl_tail, read_last_jsonl
+from core.performance_index import PerformanceLogIndex
 from core.time_utils import iso_utc_to_brt_text, utc_now_pair
 
 OUT_JOGOS = OUT_GAMES_PATH
 OUT_HISTORY = OUT_HISTORY_DIR
+HISTORY_ARCHIVE = OUT_HISTORY_ARCHIVE_PATH
 PERF_LOG = PERFORMANCE_LOG_PATH
 LAST_RESULT = LAST_RESULT_PATH
 RESULTS_CSV = RESULTS_PATH
@@ -30,6 +36,7 @@ MIN_N = MIN_NUMBER
 MAX_N = MAX_NUMBER
 DEFAULT_DRAW_SIZE = 6
 DEFAULT_TICKET_SIZE = 9
+ROLLING_WINDOW = 20
 
 
 @dataclass(frozen=True)
@@ -44,12 +51,6 @@ def _load_json(path: Path) -> Any:
         return json.load(f)
 
 
-def _append_jsonl(path: Path, obj: dict[str, Any]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(obj, ensure_ascii=False) + "\n")
-
-
 def _draw_date_to_timestamp_utc(draw_date: str) -> str:
     parsed = datetime.strptime(str(draw_date), "%d/%m/%Y")
     return parsed.replace(tzinfo=timezone.utc).isoformat()
@@ -142,10 +143,25 @@ def _payload_to_runtime(payload: dict[str, Any]) -> tuple[dict[str, Any], list[t
     return info, out
 
 
-def load_generated_games(concurso: int) -> tuple[dict[str, Any], list[tuple[str, list[int]]]]:
-    history_path = OUT_HISTORY / f"jogos_concurso_{int(concurso)}.json"
-    if history_path.exists():
-        payload = _load_json(history_path)
+def load_archived_snapshots(concursos: list[int]) -> dict[int, dict[str, Any]]:
+    """Le de uma vez, no arquivo compactado, os snapshots de um lote de concursos."""
+    if not concursos:
+        return {}
+    return load_snapshots(min(concursos), max(concursos), HISTORY_ARCHIVE)
+
+
+def load_generated_games(
+    concurso: int,
+    archived: dict[int, dict[str, Any]] | None = None,
+) -> tuple[dict[str, Any], list[tuple[str, list[int]]]]:
+    """Snapshot do concurso: arquivo em out/history, depois o arquivo compactado, depois os jogos atuais.
+
+    O arquivo em disco tem prioridade porque pode ter sido editado ou regenerado
+    depois do ultimo arquivamento; o arquivo compactado cobre os concursos cujo
+    JSON nao existe mais.
+    """
+    payload = read_snapshot(int(concurso), out_dir=OUT_HISTORY, archived=archived, path=HISTORY_ARCHIVE)
+    if payload is not None:
         return _payload_to_runtime(payload)
 
     payload = _load_json(OUT_JOGOS)
@@ -159,60 +175,45 @@ def load_generated_games(concurso: int) -> tuple[dict[str, Any], list[tuple[str,
 
 
 def already_logged(concurso: int) -> bool:
-    if not PERF_LOG.exists():
-        return False
+    store = open_event_store(PERFORMANCE_STREAM, PERF_LOG)
+    if store is not None:
+        with store:
+            return store.has_concurso(PERFORMANCE_STREAM, concurso)
+    return PerformanceLogIndex(PERF_LOG).contains(concurso)
 
-    with PERF_LOG.open("r", encoding="utf-8") as f:
-        for line in f:
-            if not line.strip():
-                continue
-            try:
-                event = json.loads(line)
-            except json.JSONDecodeError:
-                continue
-            if int(event.get("concurso", -1)) == concurso:
-                return True
-    return False
+
+def latest_logged_concurso() -> int | None:
+    store = open_event_store(PERFORMANCE_STREAM, PERF_LOG)
+    if store is not None:
+        with store:
+            return store.latest_concurso(PERFORMANCE_STREAM)
+    return PerformanceLogIndex(PERF_LOG).latest_concurso()
 
 
 def load_logged_concursos() -> set[int]:
-    if not PERF_LOG.exists():
-        return set()
+    store = open_event_store(PERFORMANCE_STREAM, PERF_LOG)
+    if store is not None:
+        with store:
+            return set(store.concursos(PERFORMANCE_STREAM))
+    return set(PerformanceLogIndex(PERF_LOG).concursos())
 
-    concursos: set[int] = set()
-    with PERF_LOG.open("r", encoding="utf-8") as f:
-        for line in f:
-            if not line.strip():
-                continue
-            try:
-                event = json.loads(line)
-            except json.JSONDecodeError:
-                continue
-            try:
-                concursos.add(int(event.get("concurso", -1)))
-            except (TypeError, ValueError):
-                continue
-    return concursos
+
+def load_recent_events(window: int = 20) -> list[dict[str, Any]]:
+    store = open_event_store(PERFORMANCE_STREAM, PERF_LOG)
+    if store is not None:
+        with store:
+            return [event.payload for event in store.tail(PERFORMANCE_STREAM, window)]
+    return read_jsonl_tail(PERF_LOG, window)
 
 
 def summarize_recent_events(window: int = 20) -> dict[str, Any] | None:
-    if not PERF_LOG.exists():
-        return None
+    return summarize_events(load_recent_events(window))
 
-    events: list[dict[str, Any]] = []
-    with PERF_LOG.open("r", encoding="utf-8") as f:
-        for line in f:
-            if not line.strip():
-                continue
-            try:
-                events.append(json.loads(line))
-            except json.JSONDecodeError:
-                continue
 
-    if not events:
+def summarize_events(sample: list[dict[str, Any]]) -> dict[str, Any] | None:
+    if not sample:
         return None
 
-    sample = events[-window:]
     draws = len(sample)
     return {
         "avg_max_hits": round(sum(float(e.get("max_hits", 0)) for e in sample) / draws, 4),
@@ -266,69 +267,84 @@ def main() -> None:
         print(f"[COMPARE] Skip: {exc}")
         return
 
-    logged_concursos = load_logged_concursos()
-    latest_logged_concurso = max(logged_concursos, default=0)
+    # Caminho rapido dos polls repetidos: a ultima linha do log ja cobre o concurso publicado.
+    last_event = read_last_jsonl(PERF_LOG)
+    if last_event is not None and int(last_event.get("concurso", -1)) >= latest.concurso:
+        print(f"[COMPARE] Concurso {latest.concurso} ja logado.")
+        return
+
+    last_logged = latest_logged_concurso() or 0
     pending_draws = [
         draw
         for draw in load_pending_draws(latest)
-        if draw.concurso > latest_logged_concurso and draw.concurso not in logged_concursos
+        if draw.concurso > last_logged and not already_logged(draw.concurso)
     ]
     if not pending_draws:
         print(f"[COMPARE] Concurso {latest.concurso} ja logado.")
         return
 
-    logged_count = 0
-    for draw in pending_draws:
-        try:
-            generated_meta, games = load_generated_games(draw.concurso)
-        except (FileNotFoundError, ValueError) as exc:
-            print(f"[COMPARE] Skip concurso={draw.concurso}: {exc}")
-            continue
+    recent_events = load_recent_events(window=ROLLING_WINDOW)
+    archived = load_archived_snapshots([draw.concurso for draw in pending_draws])
+    new_events: list[dict[str, Any]] = []
+    try:
+        for draw in pending_draws:
+            try:
+                generated_meta, games = load_generated_games(draw.concurso, archived)
+            except (FileNotFoundError, ValueError) as exc:
+                print(f"[COMPARE] Skip concurso={draw.concurso}: {exc}")
+                continue
 
-        draw_set = set(draw.dezenas)
-        result = compute_hits(draw_set, games)
-        rolling_20 = summarize_recent_events(window=20)
-        logged_pair = utc_now_pair("logged_at")
-        event = {
-            "timestamp_utc": _draw_date_to_timestamp_utc(draw.data),
-            "timestamp_brt": f"{draw.data} 00:00:00",
-            "game": GAME_NAME,
-            "concurso": draw.concurso,
-            "data_sorteio": draw.data,
-            "dezenas_sorteadas": list(draw.dezenas),
-            "ticket_size": generated_meta["ticket_size"],
-            "n_games": generated_meta["n_games"],
-            "meta": {
-                "git_sha": os.getenv("GITHUB_SHA", "").strip() or None,
-                "strategy": generated_meta["metadata"].get("strategy_name")
-                or os.getenv("STRATEGY_NAME", "").strip()
-                or "megasena_v1",
-                "model_version": generated_meta["metadata"].get("model_version"),
-                "generated_at_utc": generated_meta["metadata"].get("generated_at_utc"),
-                "generated_at_brt": generated_meta["metadata"].get("generated_at_brt")
-                or iso_utc_to_brt_text(generated_meta["metadata"].get("generated_at_utc")),
-                "target_concurso": generated_meta["metadata"].get("target_concurso"),
-                **logged_pair,
-            },
-            **result["summary"],
-            "games": result["per_game"],
-        }
-        if rolling_20 is not None:
-            event["rolling_20"] = rolling_20
-
-        _append_jsonl(PERF_LOG, event)
-        logged_count += 1
+            draw_set = set(draw.dezenas)
+            result = compute_hits(draw_set, games)
+            rolling_20 = summarize_events(recent_events[-ROLLING_WINDOW:])
+            logged_pair = utc_now_pair("logged_at")
+            event = {
+                "timestamp_utc": _draw_date_to_timestamp_utc(draw.data),
+                "timestamp_brt": f"{draw.data} 00:00:00",
+                "game": GAME_NAME,
+                "concurso": draw.concurso,
+                "data_sorteio": draw.data,
+                "dezenas_sorteadas": list(draw.dezenas),
+                "ticket_size": generated_meta["ticket_size"],
+                "n_games": generated_meta["n_games"],
+                "meta": {
+                    "git_sha": os.getenv("GITHUB_SHA", "").strip() or None,
+                    "strategy": generated_meta["metadata"].get("strategy_name")
+                    or os.getenv("STRATEGY_NAME", "").strip()
+                    or "megasena_v1",
+                    "model_version": generated_meta["metadata"].get("model_version"),
+                    "generated_at_utc": generated_meta["metadata"].get("generated_at_utc"),
+                    "generated_at_brt": generated_meta["metadata"].get("generated_at_brt")
+                    or iso_utc_to_brt_text(generated_meta["metadata"].get("generated_at_utc")),
+                    "target_concurso": generated_meta["metadata"].get("target_concurso"),
+                    **logged_pair,
+                },
+                **result["summary"],
+                "games": result["per_game"],
+            }
+            if rolling_20 is not None:
+                event["rolling_20"] = rolling_20
+
+            recent_events.append(event)
+            new_events.append(event)
+    finally:
+        # Catch-up de varios concursos vira um unico append com lock; se um concurso
+        # falhar no meio, os ja processados sao gravados antes de o erro subir.
+        record_events(PERFORMANCE_STREAM, new_events, path=PERF_LOG)
+    for event in new_events:
         print(
             "[COMPARE] OK:",
-            f"concurso={draw.concurso}",
-            f"n_games={generated_meta['n_games']}",
+            f"concurso={event['concurso']}",
+            f"n_games={event['n_games']}",
             f"max_hits={event['max_hits']}",
             f"score={event['score']}",
         )
 
-    if logged_count == 0:
+    if not new_events:
         print("[COMPARE] Nenhum concurso pendente com snapshot canonico disponivel.")
 
 
 if __name__ == "__main__":
-    main()
+    from core.profiling import run_main
+
+    run_main(main)
@@ -15,9 +15,16 @@ MODEL_HISTORY_PATH = REPO_ROOT / "data" / "model_history.jsonl"
 CONFIG_PROMOTION_LOG_PATH = REPO_ROOT / "data" / "config_promotion_log.jsonl"
 LEARNING_LOG_PATH = REPO_ROOT / "data" / "learning_log.jsonl"
 PERFORMANCE_LOG_PATH = REPO_ROOT / "data" / "performance_log.jsonl"
+METRICS_LOG_PATH = REPO_ROOT / "data" / "metrics_log.jsonl"
+EVENT_STORE_PATH = REPO_ROOT / "data" / "events.sqlite"
+SUBSET_INDEX_DIR = REPO_ROOT / "data" / "subset_index"
 OUT_GAMES_PATH = REPO_ROOT / "out" / "jogos_gerados.json"
 OUT_HISTORY_DIR = REPO_ROOT / "out" / "history"
+OUT_HISTORY_ARCHIVE_PATH = REPO_ROOT / "out" / "history_archive.jsonl"
 BACKTEST_REPORT_PATH = REPO_ROOT / "out" / "backtest_report.json"
+BACKTEST_N_SIM_SWEEP_REPORT_PATH = REPO_ROOT / "out" / "backtest_n_sim_sweep.json"
+BACKTEST_VARIANCE_REPORT_PATH = REPO_ROOT / "out" / "backtest_variance.json"
+BACKTEST_WARM_START_REPORT_PATH = REPO_ROOT / "out" / "backtest_warm_start.json"
 OPTIMIZATION_REPORT_PATH = REPO_ROOT / "out" / "optimization_report.json"
 RECOMMENDED_CONFIG_PATH = REPO_ROOT / "out" / "recommended_strategy_config.json"
 PROMOTION_DECISION_PATH = REPO_ROOT / "out" / "config_promotion_decision.json"
@@ -26,6 +33,10 @@ NEXT_STRATEGY_CONFIG_PATH = REPO_ROOT / "out" / "next_strategy_config.json"
 MONITOR_REPORT_PATH = REPO_ROOT / "out" / "performance_monitor.json"
 RECALIBRATION_SIGNAL_PATH = REPO_ROOT / "out" / "recalibration_signal.json"
 IMAGE_OUTPUT_DIR = REPO_ROOT / "out" / "images"
+PIPELINE_STAMPS_DIR = REPO_ROOT / "out" / ".stamps"
+PROFILES_DIR = REPO_ROOT / "out" / "profiles"
+PERF_BASELINE_DIR = REPO_ROOT / "out" / "perf"
+PERF_REPORT_PATH = REPO_ROOT / "out" / "perf_regression_report.json"
 
 GAME_NAME = "megasena"
 MIN_NUMBER = 1
@@ -42,6 +53,9 @@ DEFAULT_BOTTOM_PAIRS = 60
 DEFAULT_MAX_SEQ = 5
 DEFAULT_MIN_DIFF = 8
 DEFAULT_PENALTY_WEAK_PAIR = 5.0
+DEFAULT_SAMPLER = "weighted"
+DEFAULT_KEY_SAMPLER = "iid"
+DEFAULT_OPTIMIZER = "greedy"
 DEFAULT_BAYESIAN = {
     "alpha_prior": 1.0,
     "beta_prior": 9.0,
@@ -0,0 +1,307 @@
+"""Estado carregado uma vez so e reutilizado por gerador, backtest e avaliacao.
+
+Cada CLI relia a config, reparseava `megasena.csv` e recontava os pares do
+historico inteiro a cada chamada. O `Engine` guarda config, resultados,
+features e a matriz de coocorrencia 60x60 e so os recarrega quando o arquivo
+de origem muda (`st_mtime_ns` + tamanho). Tudo o que e derivado dos resultados
+(sorteios, coocorrencia, caches do backtest, features por indice) e descartado
+junto com eles.
+
+    engine = Engine()
+    games = engine.generate(seed=123)
+    report = engine.backtest({"n_sim": 50})
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from core.config import (
+    CONFIG_PATH,
+    DEFAULT_BACKTEST_N_SIM,
+    DEFAULT_MAX_INTERSECTION,
+    DEFAULT_MIN_HISTORY,
+    DEFAULT_N_SIM,
+    DEFAULT_NUM_GAMES,
+    DEFAULT_TICKET_SIZE,
+    DEFAULT_WINDOW,
+    FEATURES_PATH,
+    MAX_NUMBER,
+    MIN_NUMBER,
+    RESULTS_PATH,
+    get_bayesian,
+    get_feature_weights,
+    get_parameters,
+    get_structural_rules,
+    load_config,
+)
+from core import metrics
+from core.hit_matrix import N_NUMBERS, summarize_draws, to_incidence
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from core.backtest_cache import WeakPairMasks, WindowProbabilities
+
+DRAW_COLUMNS = [f"d{i}" for i in range(1, 7)]
+FileSignature = tuple[int, int] | None
+
+
+def file_signature(path: Path) -> FileSignature:
+    """(mtime_ns, tamanho) do arquivo, ou None se ele nao existe."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def weak_pairs_from_cooccurrence(cooccurrence: np.ndarray, bottom_pairs: int) -> set[tuple[int, int]]:
+    """Os `bottom_pairs` pares menos frequentes (com ao menos uma ocorrencia).
+
+    Mesma ordem de `generator.build_weak_pair_set`: contagem e depois o par.
+    """
+    if bottom_pairs <= 0:
+        return set()
+    first, second = np.triu_indices(N_NUMBERS, k=1)
+    counts = cooccurrence[first, second]
+    seen = counts > 0
+    first, second, counts = first[seen], second[seen], counts[seen]
+    order = np.lexsort((second, first, counts))[:bottom_pairs]
+    return {(int(first[i]) + MIN_NUMBER, int(second[i]) + MIN_NUMBER) for i in order}
+
+
+class Engine:
+    """Config, resultados, features e coocorrencia carregados sob demanda e invalidados por arquivo."""
+
+    def __init__(
+        self,
+        config: dict[str, Any] | None = None,
+        *,
+        config_path: Path = CONFIG_PATH,
+        results_path: Path = RESULTS_PATH,
+        features_path: Path = FEATURES_PATH,
+    ) -> None:
+        self._fixed_config = config
+        self.config_path = config_path
+        self.results_path = results_path
+        self.features_path = features_path
+        self._loaded: dict[str, tuple[FileSignature, Any]] = {}
+        self._derived: dict[Any, Any] = {}
+
+    def _load(self, name: str, path: Path, loader: Any) -> Any:
+        signature = file_signature(path)
+        cached = self._loaded.get(name)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        with metrics.timer(f"io.read_{name}"):
+            value = loader(path)
+        self._loaded[name] = (signature, value)
+        if name == "results":
+            self._derived.clear()
+        return value
+
+    def invalidate(self) -> None:
+        """Descarta tudo; a proxima leitura volta ao disco mesmo sem mudanca de mtime."""
+        self._loaded.clear()
+        self._derived.clear()
+
+    @property
+    def config(self) -> dict[str, Any]:
+        if self._fixed_config is not None:
+            return self._fixed_config
+        return self._load("config", self.config_path, load_config)
+
+    @property
+    def results_df(self) -> pd.DataFrame:
+        import pandas as pd
+
+        return self._load("results", self.results_path, pd.read_csv)
+
+    @property
+    def features_df(self) -> pd.DataFrame | None:
+        def read_features(path: Path) -> pd.DataFrame | None:
+            import pandas as pd
+
+            return pd.read_csv(path) if path.exists() else None
+
+        return self._load("features", self.features_path, read_features)
+
+    def _memo(self, key: Any, build: Any) -> Any:
+        # Chamado so depois de `results_df`, que limpa `_derived` quando o CSV muda.
+        if key not in self._derived:
+            self._derived[key] = build()
+        return self._derived[key]
+
+    @property
+    def draws(self) -> np.ndarray:
+        """Dezenas sorteadas, (n_sorteios, 6) int64 na ordem do CSV."""
+        results_df = self.results_df
+        return self._memo("draws", lambda: results_df[DRAW_COLUMNS].to_numpy(dtype=np.int64))
+
+    @property
+    def cooccurrence(self) -> np.ndarray:
+        """Quantas vezes cada par de dezenas saiu junto (60x60, diagonal = frequencia)."""
+        draws = self.draws
+
+        def build() -> np.ndarray:
+            incidence = to_incidence(draws).astype(np.int64)
+            return incidence.T @ incidence
+
+        return self._memo("cooccurrence", build)
+
+    def weak_pairs(self, bottom_pairs: int) -> set[tuple[int, int]]:
+        return weak_pairs_from_cooccurrence(self.cooccurrence, int(bottom_pairs))
+
+    def probs(self, config: dict[str, Any] | None = None) -> np.ndarray:
+        from core.generator import scores_from_features
+
+        features_df = self.features_df
+        if features_df is None:
+            return np.ones(MAX_NUMBER) / MAX_NUMBER
+        return scores_from_features(features_df, config=config or self.config)
+
+    def generate(
+        self,
+        seed: int | None = None,
+        *,
+        config: dict[str, Any] | None = None,
+        stats: dict[str, Any] | None = None,
+    ) -> list[list[int]]:
+        """Mesmos jogos de `generator.generate_games`, sem reler CSVs nem recontar pares."""
+        from core.generator import generate_games_from_probs, generation_kwargs
+
+        config = config or self.config
+        bottom_pairs = int(get_structural_rules(config)["bottom_pairs"])
+        weak_pairs = self.weak_pairs(bottom_pairs) if len(self.results_df) else set()
+        return generate_games_from_probs(
+            self.probs(config),
+            seed=seed,
+            weak_pairs=weak_pairs,
+            stats=stats,
+            **generation_kwargs(config),
+        )
+
+    def backtest_history(self, config: dict[str, Any] | None = None) -> pd.DataFrame:
+        """Historico usado pelo backtest: recortado por `backtest_history_limit`."""
+        from core.backtest import slice_results_for_backtest
+
+        params = get_parameters(config or self.config)
+        limit = params.get("backtest_history_limit")
+        return slice_results_for_backtest(
+            self.results_df,
+            min_history=self._min_history(params),
+            max_draws=int(limit) if limit is not None else None,
+        )
+
+    @staticmethod
+    def _min_history(params: dict[str, Any]) -> int:
+        window = int(params.get("window", DEFAULT_WINDOW))
+        return max(int(params.get("min_history", DEFAULT_MIN_HISTORY)), window)
+
+    def backtest_caches(
+        self,
+        history: pd.DataFrame,
+        *,
+        window: int,
+        min_history: int,
+        config: dict[str, Any] | None = None,
+    ) -> tuple[WindowProbabilities, WeakPairMasks]:
+        """Caches de probabilidades (da janela) e pares fracos de `run_backtest`, reaproveitados entre chamadas.
+
+        `history` tem que ser um recorte final de `results_df` (como os de
+        `slice_results_for_backtest`), que fica identificado pelo tamanho. As
+        probabilidades por sorteio dependem so da janela, do recorte e dos
+        pesos/priors; os pares fracos, so do recorte e de `bottom_pairs`.
+        """
+        from core.backtest import build_probability_cache, build_weak_pair_cache
+
+        config = config or self.config
+        window = int(window)
+        min_history = int(min_history)
+        bottom_pairs = int(get_structural_rules(config)["bottom_pairs"])
+        history_key = (len(history), min_history)
+        weak_pair_cache = self._memo(
+            ("weak_pair_cache", history_key, bottom_pairs),
+            lambda: build_weak_pair_cache(history, min_history=min_history, bottom_pairs=bottom_pairs),
+        )
+        scoring = json.dumps({"weights": get_feature_weights(config), "bayesian": get_bayesian(config)}, sort_keys=True)
+        probability_cache = self._memo(
+            ("probability_cache", history_key, window, scoring),
+            lambda: build_probability_cache(history, windows=[window], min_history=min_history, config=config)[window],
+        )
+        return probability_cache, weak_pair_cache
+
+    def backtest_kwargs(self, config: dict[str, Any] | None = None) -> dict[str, Any]:
+        """Argumentos de `run_backtest` definidos pela config, com os caches de `backtest_caches`."""
+        config = config or self.config
+        params = get_parameters(config)
+        window = int(params.get("window", DEFAULT_WINDOW))
+        min_history = self._min_history(params)
+        probability_cache, weak_pair_cache = self.backtest_caches(
+            self.backtest_history(config), window=window, min_history=min_history, config=config
+        )
+        return {
+            "window": window,
+            "min_history": min_history,
+            "n_games": int(params.get("num_games", DEFAULT_NUM_GAMES)),
+            "ticket_size": int(params.get("ticket_size", DEFAULT_TICKET_SIZE)),
+            "n_sim": int(params.get("backtest_n_sim", min(int(params.get("n_sim", DEFAULT_N_SIM)), DEFAULT_BACKTEST_N_SIM))),
+            "max_intersection": int(params.get("max_intersection", DEFAULT_MAX_INTERSECTION)),
+            "config": config,
+            "weak_pair_cache": weak_pair_cache,
+            "probability_cache": probability_cache,
+        }
+
+    def with_parameters(self, params: dict[str, Any] | None) -> dict[str, Any]:
+        """Config atual com `params` sobrescrevendo `parameters`."""
+        config = self.config
+        if not params:
+            return config
+        return {**config, "parameters": {**get_parameters(config), **params}}
+
+    def backtest(self, params: dict[str, Any] | None = None, **kwargs: Any) -> dict[str, Any]:
+        """Backtest walk-forward da config atual com `params` sobrescritos; `kwargs` vao para `run_backtest`."""
+        from core.backtest import run_backtest
+        from core.versioning import _config_hash
+
+        config = self.with_parameters(params)
+        warm_start = get_parameters(config).get("backtest_warm_start")
+        kwargs.setdefault("warm_start", float(warm_start) if warm_start is not None else None)
+        history = self.backtest_history(config)
+        report = run_backtest(history, **{**self.backtest_kwargs(config), **kwargs})
+        report["strategy"] = {
+            "strategy_name": config.get("strategy_name"),
+            "model_version": config.get("model_version"),
+            "config_hash": _config_hash(config),
+            "source_draws_available": len(self.results_df),
+            "source_draws_used": len(history),
+        }
+        return report
+
+    def evaluate(self, tickets: Any, draws: Any = None) -> list[dict[str, Any]]:
+        """Resumo de `compare_results.compute_hits` de cada sorteio (todo o historico por padrao)."""
+        return summarize_draws(tickets, self.draws if draws is None else draws)
+
+    def features_at(self, idx: int, window: int | None = None) -> pd.DataFrame:
+        """Features como seriam calculadas so com os `idx` primeiros sorteios."""
+        from core.features_megasena import build_features
+
+        config = self.config
+        window = int(window if window is not None else get_parameters(config).get("window", DEFAULT_WINDOW))
+        bayesian = get_bayesian(config)
+        results_df = self.results_df
+        key = ("features_at", int(idx), window, bayesian["alpha_prior"], bayesian["beta_prior"])
+        return self._memo(
+            key,
+            lambda: build_features(
+                results_df.iloc[: int(idx)],
+                window=window,
+                alpha_prior=float(bayesian["alpha_prior"]),
+                beta_prior=float(bayesian["beta_prior"]),
+            ),
+        )
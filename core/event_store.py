@@ -0,0 +1,416 @@
+"""Espelho SQLite opcional dos logs JSONL de eventos.
+
+Os arquivos JSONL continuam sendo a fonte canonica (versionados e lidos pelo
+n8n). Quando `MEGA_EVENT_STORE` esta definido, o store importa as linhas novas
+de forma incremental e atende consultas por concurso, config_hash e janelas
+recentes com leituras indexadas. `export_jsonl` regenera os arquivos byte a byte.
+
+`open_event_store` devolve uma conexao por processo (e thread), reaproveitada
+entre chamadas; cada stream guarda o tamanho e o CRC do fim do arquivo ja
+espelhado, entao um sync sem linhas novas nao toca o SQLite. Uma linha final
+incompleta (escritor interrompido) nao e importada: o store avisa no stderr,
+registra o offset em `torn_tails` e a preserva no `export_jsonl`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from core.config import (
+    CONFIG_PROMOTION_LOG_PATH,
+    EVENT_STORE_PATH,
+    LEARNING_LOG_PATH,
+    MODEL_HISTORY_PATH,
+    PERFORMANCE_LOG_PATH,
+)
+from core.jsonl_log import append_jsonl_many, file_lock, parse_jsonl_line, tail_crc32
+from core.performance_index import is_canonical_event
+
+EVENT_STORE_ENV = "MEGA_EVENT_STORE"
+
+PERFORMANCE_STREAM = "performance"
+MODEL_HISTORY_STREAM = "model_history"
+LEARNING_STREAM = "learning"
+PROMOTION_STREAM = "promotion"
+
+STREAM_PATHS: dict[str, Path] = {
+    PERFORMANCE_STREAM: PERFORMANCE_LOG_PATH,
+    MODEL_HISTORY_STREAM: MODEL_HISTORY_PATH,
+    LEARNING_STREAM: LEARNING_LOG_PATH,
+    PROMOTION_STREAM: CONFIG_PROMOTION_LOG_PATH,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    stream TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    valid INTEGER NOT NULL,
+    concurso INTEGER,
+    config_hash TEXT,
+    timestamp_utc TEXT,
+    canonical INTEGER NOT NULL DEFAULT 0,
+    line BLOB NOT NULL,
+    PRIMARY KEY (stream, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_events_concurso ON events (stream, concurso);
+CREATE INDEX IF NOT EXISTS idx_events_config_hash ON events (stream, config_hash);
+CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events (stream, timestamp_utc);
+CREATE TABLE IF NOT EXISTS sources (
+    stream TEXT PRIMARY KEY,
+    synced_size INTEGER NOT NULL,
+    tail_crc INTEGER NOT NULL
+);
+"""
+
+
+@dataclass(frozen=True)
+class StoredEvent:
+    stream: str
+    seq: int
+    concurso: int | None
+    config_hash: str | None
+    timestamp_utc: str | None
+    canonical: bool
+    payload: dict[str, Any]
+
+
+def _event_columns(stream: str, event: dict[str, Any]) -> tuple[int | None, str | None, str | None, int]:
+    try:
+        concurso = int(event["concurso"]) if event.get("concurso") is not None else None
+    except (TypeError, ValueError):
+        concurso = None
+    config_hash = event.get("config_hash") or event.get("next_config_hash") or event.get("recommended_config_hash")
+    timestamp = event.get("timestamp_utc") or event.get("timestamp")
+    canonical = int(stream == PERFORMANCE_STREAM and is_canonical_event(event))
+    return concurso, config_hash, timestamp, canonical
+
+
+class EventStore:
+    def __init__(
+        self,
+        db_path: Path = EVENT_STORE_PATH,
+        stream_paths: dict[str, Path] | None = None,
+        *,
+        shared: bool = False,
+    ) -> None:
+        self.db_path = db_path
+        self.stream_paths = dict(stream_paths or STREAM_PATHS)
+        self.shared = shared
+        # stream -> (tamanho, CRC do fim) do arquivo na ultima sincronizacao deste processo
+        self._cursors: dict[str, tuple[int, int]] = {}
+        # stream -> (offset, bytes) da linha final incompleta que ficou fora do store
+        self.torn_tails: dict[str, tuple[int, int]] = {}
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self) -> EventStore:
+        return self
+
+    def __exit__(self, *_exc: Any) -> None:
+        # o store compartilhado de `open_event_store` vive ate o fim do processo
+        if not self.shared:
+            self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def _stream_path(self, stream: str) -> Path:
+        if stream not in self.stream_paths:
+            raise ValueError(f"Stream de eventos desconhecido: {stream}")
+        return self.stream_paths[stream]
+
+    def _unchanged(self, stream: str) -> bool:
+        cursor = self._cursors.get(stream)
+        if cursor is None:
+            return False
+        try:
+            with self._stream_path(stream).open("rb") as f:
+                size = f.seek(0, 2)
+                return size == cursor[0] and tail_crc32(f, size) == cursor[1]
+        except FileNotFoundError:
+            return False
+
+    def sync(self, stream: str | None = None) -> int:
+        """Importa as linhas completas ainda nao espelhadas. Retorna quantas entraram."""
+        streams = [stream] if stream is not None else list(self.stream_paths)
+        pending = [name for name in streams if not self._unchanged(name)]
+        imported = 0
+        if not pending:
+            return 0
+        with file_lock(self.db_path.with_name(self.db_path.name + ".lock")):
+            for name in pending:
+                imported += self._sync_stream(name)
+        return imported
+
+    def _sync_stream(self, stream: str) -> int:
+        path = self._stream_path(stream)
+        row = self.conn.execute("SELECT synced_size, tail_crc FROM sources WHERE stream = ?", (stream,)).fetchone()
+        synced_size, synced_crc = (int(row[0]), int(row[1])) if row else (0, 0)
+
+        if not path.exists():
+            self._cursors.pop(stream, None)
+            self.torn_tails.pop(stream, None)
+            if row:
+                with self.conn:
+                    self.conn.execute("DELETE FROM events WHERE stream = ?", (stream,))
+                    self.conn.execute("DELETE FROM sources WHERE stream = ?", (stream,))
+            return 0
+
+        with path.open("rb") as f:
+            f.seek(0, 2)
+            size = f.tell()
+            if size == synced_size and tail_crc32(f, synced_size) == synced_crc:
+                self._cursors[stream] = (size, synced_crc)
+                self.torn_tails.pop(stream, None)
+                return 0
+
+            reset = synced_size > size or tail_crc32(f, synced_size) != synced_crc
+            start = 0 if reset else synced_size
+            next_seq = 0
+            if not reset:
+                last = self.conn.execute("SELECT MAX(seq) FROM events WHERE stream = ?", (stream,)).fetchone()[0]
+                next_seq = int(last) + 1 if last is not None else 0
+
+            f.seek(start)
+            consumed = start
+            rows = []
+            while True:
+                raw = f.readline()
+                if not raw or not raw.endswith(b"\n"):
+                    break
+                consumed += len(raw)
+                line = raw[:-1]
+                event = parse_jsonl_line(line)
+                if event is None:
+                    rows.append((stream, next_seq, 0, None, None, None, 0, line))
+                else:
+                    rows.append((stream, next_seq, 1, *_event_columns(stream, event), line))
+                next_seq += 1
+            crc = tail_crc32(f, consumed)
+            self._cursors[stream] = (size, tail_crc32(f, size))
+        self._note_torn_tail(stream, path, consumed, size)
+
+        with self.conn:
+            if reset:
+                self.conn.execute("DELETE FROM events WHERE stream = ?", (stream,))
+            self.conn.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sources (stream, synced_size, tail_crc) VALUES (?, ?, ?)",
+                (stream, consumed, crc),
+            )
+        return len(rows)
+
+    def _note_torn_tail(self, stream: str, path: Path, offset: int, size: int) -> None:
+        if offset >= size:
+            self.torn_tails.pop(stream, None)
+            return
+        if self.torn_tails.get(stream) != (offset, size - offset):
+            print(
+                f"[EVENT_STORE] Aviso: linha final incompleta em {path} (offset {offset}, {size - offset} bytes) "
+                "nao foi importada.",
+                file=sys.stderr,
+            )
+        self.torn_tails[stream] = (offset, size - offset)
+
+    def _rows_to_events(self, rows: list[tuple]) -> list[StoredEvent]:
+        return [
+            StoredEvent(
+                stream=row[0],
+                seq=int(row[1]),
+                concurso=row[2],
+                config_hash=row[3],
+                timestamp_utc=row[4],
+                canonical=bool(row[5]),
+                payload=json.loads(bytes(row[6]).decode("utf-8")),
+            )
+            for row in rows
+        ]
+
+    def _query(self, stream: str, where: str = "", params: tuple = (), order: str = "seq", limit: int | None = None) -> list[StoredEvent]:
+        self.sync(stream)
+        sql = (
+            "SELECT stream, seq, concurso, config_hash, timestamp_utc, canonical, line "
+            f"FROM events WHERE stream = ? AND valid = 1 {where} ORDER BY {order}"
+        )
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return self._rows_to_events(self.conn.execute(sql, (stream, *params)).fetchall())
+
+    def append(self, stream: str, event: dict[str, Any]) -> None:
+        self.append_many(stream, [event])
+
+    def append_many(self, stream: str, events: list[dict[str, Any]], *, fsync: bool | None = None) -> None:
+        append_jsonl_many(self._stream_path(stream), events, fsync=fsync)
+        self.sync(stream)
+
+    def count(self, stream: str, *, canonical_only: bool = False) -> int:
+        self.sync(stream)
+        where = " AND canonical = 1" if canonical_only else ""
+        return int(self.conn.execute(f"SELECT COUNT(*) FROM events WHERE stream = ? AND valid = 1{where}", (stream,)).fetchone()[0])
+
+    def latest(self, stream: str) -> StoredEvent | None:
+        events = self._query(stream, order="seq DESC", limit=1)
+        return events[0] if events else None
+
+    def tail(self, stream: str, n: int, *, canonical_only: bool = False, by_concurso: bool = False) -> list[StoredEvent]:
+        if n <= 0:
+            return []
+        where = "AND canonical = 1" if canonical_only else ""
+        order = "concurso DESC, seq DESC" if by_concurso else "seq DESC"
+        events = self._query(stream, where, order=order, limit=n)
+        events.reverse()
+        return events
+
+    def has_concurso(self, stream: str, concurso: int) -> bool:
+        self.sync(stream)
+        row = self.conn.execute(
+            "SELECT 1 FROM events WHERE stream = ? AND concurso = ? AND valid = 1 LIMIT 1",
+            (stream, int(concurso)),
+        ).fetchone()
+        return row is not None
+
+    def latest_concurso(self, stream: str) -> int | None:
+        self.sync(stream)
+        row = self.conn.execute("SELECT MAX(concurso) FROM events WHERE stream = ? AND valid = 1", (stream,)).fetchone()
+        return int(row[0]) if row and row[0] is not None else None
+
+    def concursos(self, stream: str) -> list[int]:
+        self.sync(stream)
+        rows = self.conn.execute(
+            "SELECT DISTINCT concurso FROM events WHERE stream = ? AND valid = 1 AND concurso IS NOT NULL ORDER BY concurso",
+            (stream,),
+        ).fetchall()
+        return [int(row[0]) for row in rows]
+
+    def by_concurso(self, stream: str, concurso: int) -> list[StoredEvent]:
+        return self._query(stream, "AND concurso = ?", (int(concurso),))
+
+    def by_config_hash(self, stream: str, config_hash: str) -> list[StoredEvent]:
+        return self._query(stream, "AND config_hash = ?", (config_hash,))
+
+    def between(self, stream: str, start_utc: str | None = None, end_utc: str | None = None) -> list[StoredEvent]:
+        where = ""
+        params: list[str] = []
+        if start_utc is not None:
+            where += " AND timestamp_utc >= ?"
+            params.append(start_utc)
+        if end_utc is not None:
+            where += " AND timestamp_utc < ?"
+            params.append(end_utc)
+        return self._query(stream, where, tuple(params), order="timestamp_utc, seq")
+
+    def export_jsonl(self, stream: str, path: Path | None = None) -> Path:
+        """Regenera o JSONL do stream com as linhas originais, na ordem original."""
+        self.sync(stream)
+        out_path = path or self._stream_path(stream)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = out_path.with_name(out_path.name + ".tmp")
+        torn = self.torn_tails.get(stream)
+        with tmp_path.open("wb") as f:
+            for (line,) in self.conn.execute("SELECT line FROM events WHERE stream = ? ORDER BY seq", (stream,)):
+                f.write(bytes(line) + b"\n")
+            if torn is not None:
+                # a linha incompleta nao esta no store; copia os bytes do arquivo fonte para nao perde-los
+                with self._stream_path(stream).open("rb") as source:
+                    source.seek(torn[0])
+                    f.write(source.read(torn[1]))
+        os.replace(tmp_path, out_path)
+        return out_path
+
+
+def event_store_path_from_env() -> Path | None:
+    value = os.environ.get(EVENT_STORE_ENV, "").strip()
+    if not value or value.lower() in {"0", "false", "no", "off"}:
+        return None
+    if value.lower() in {"1", "true", "yes", "on"}:
+        return EVENT_STORE_PATH
+    return Path(value)
+
+
+_open_stores: dict[tuple[Path, int, int], EventStore] = {}
+
+
+def open_event_store(stream: str | None = None, path: Path | None = None) -> EventStore | None:
+    """Store do processo se habilitado e se `path` (quando informado) for o log espelhado do stream.
+
+    A conexao SQLite e os cursores de sync ficam abertos entre chamadas (uma
+    instancia por processo e thread); `with store:` nao a fecha.
+    """
+    db_path = event_store_path_from_env()
+    if db_path is None:
+        return None
+    if stream is not None and path is not None and path != STREAM_PATHS[stream]:
+        return None
+    key = (db_path, os.getpid(), threading.get_ident())
+    store = _open_stores.get(key)
+    if store is None:
+        store = _open_stores[key] = EventStore(db_path, shared=True)
+    return store
+
+
+def close_event_stores() -> None:
+    """Fecha as conexoes compartilhadas deste processo (testes, fim de servidor)."""
+    for key, store in list(_open_stores.items()):
+        if key[1] == os.getpid():
+            store.close()
+        del _open_stores[key]
+
+
+def record_events(
+    stream: str,
+    events: list[dict[str, Any]],
+    *,
+    path: Path | None = None,
+    fsync: bool | None = None,
+) -> None:
+    """Ponto unico de escrita dos logs de eventos; espelha no store quando habilitado.
+
+    Todos os eventos vao em um unico append com lock (group commit).
+    """
+    if not events:
+        return
+    target = path or STREAM_PATHS[stream]
+    append_jsonl_many(target, events, fsync=fsync)
+    store = open_event_store(stream, target)
+    if store is not None:
+        store.sync(stream)
+
+
+def record_event(stream: str, event: dict[str, Any], *, path: Path | None = None, fsync: bool | None = None) -> None:
+    record_events(stream, [event], path=path, fsync=fsync)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Espelho SQLite dos logs JSONL de eventos.")
+    parser.add_argument("command", choices=["sync", "export"])
+    parser.add_argument("--stream", choices=sorted(STREAM_PATHS), default=None)
+    parser.add_argument("--db", type=Path, default=None)
+    args = parser.parse_args()
+
+    db_path = args.db or event_store_path_from_env() or EVENT_STORE_PATH
+    streams = [args.stream] if args.stream else sorted(STREAM_PATHS)
+    with EventStore(db_path) as store:
+        if args.command == "sync":
+            imported = store.sync(args.stream)
+            print("[EVENT_STORE] OK:", f"db={db_path}", f"imported={imported}")
+        else:
+            for stream in streams:
+                out_path = store.export_jsonl(stream)
+                print("[EVENT_STORE] Exportado:", f"stream={stream}", f"path={out_path}")
+
+
+if __name__ == "__main__":
+    from core.profiling import run_main
+
+    run_main(main)
@@ -1,6 +1,12 @@
 from core.generator import export_json, generate_games, load_config
 
 
-if __name__ == "__main__":
+def main() -> None:
     config = load_config()
     export_json(generate_games(config=config), config=config)
+
+
+if __name__ == "__main__":
+    from core.profiling import run_main
+
+    run_main(main)
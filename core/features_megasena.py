@@ -5,6 +5,7 @@ from pathlib import Path
 import numpy as np
 import pandas as pd
 
+from core import metrics
 from core.bayes_megasena import build_beta_binomial_posterior
 from core.config import DEFAULT_WINDOW, FEATURES_PATH as OUT_PATH, RESULTS_PATH, get_bayesian, get_parameters, load_config
 
@@ -41,6 +42,7 @@ def _build_atraso(df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
     return atraso_draws, atraso_score
 
 
+@metrics.timed("features.build")
 def build_features(
     df: pd.DataFrame,
     window: int = WINDOW,
@@ -89,19 +91,30 @@ def generate_features(
     *,
     alpha_prior: float = 1.0,
     beta_prior: float = 9.0,
+    results_df: pd.DataFrame | None = None,
 ) -> pd.DataFrame:
-    df = pd.read_csv(results_path)
-    features = build_features(df, window=window, alpha_prior=alpha_prior, beta_prior=beta_prior)
+    if results_df is None:
+        with metrics.timer("io.csv_read"):
+            results_df = pd.read_csv(results_path)
+    features = build_features(results_df, window=window, alpha_prior=alpha_prior, beta_prior=beta_prior)
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    features.to_csv(out_path, index=False)
+    with metrics.timer("io.csv_write"):
+        features.to_csv(out_path, index=False)
     return features
 
 
-if __name__ == "__main__":
-    config = load_config()
+def main(*, config: dict | None = None, results_df: pd.DataFrame | None = None) -> pd.DataFrame:
+    config = config or load_config()
     bayesian = get_bayesian(config)
-    generate_features(
+    return generate_features(
         window=int(get_parameters(config).get("window", WINDOW)),
         alpha_prior=float(bayesian["alpha_prior"]),
         beta_prior=float(bayesian["beta_prior"]),
+        results_df=results_df,
     )
+
+
+if __name__ == "__main__":
+    from core.profiling import run_main
+
+    run_main(main)
@@ -2,25 +2,35 @@
 Mega-Engine - Generator (Mega-Sena)
 
 Gera jogos estatisticos preservando o contrato JSON usado pela automacao.
+
+O numpy e importado no topo de proposito: `main`, `Engine.generate` e o
+backtest sempre sorteiam, entao nao existe saida rapida que dispense o numpy,
+e quem so precisa de um helper leve (pipeline, serve, engine) ja importa este
+modulo de forma preguicosa. pandas, scipy, features e versioning continuam
+restritos aos caminhos que os usam.
 """
 
 from __future__ import annotations
 
 import hashlib
+import importlib.util
 import json
+import time
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 from itertools import combinations
 
 import numpy as np
-import pandas as pd
 
 from core.config import (
     CONFIG_PATH,
     DEFAULT_MAX_INTERSECTION,
     DEFAULT_N_SIM,
+    DEFAULT_KEY_SAMPLER,
     DEFAULT_NUM_GAMES,
+    DEFAULT_OPTIMIZER,
+    DEFAULT_SAMPLER,
     DEFAULT_TICKET_SIZE,
     FEATURES_PATH,
     GAME_NAME,
@@ -28,9 +38,9 @@ from core.config import (
     MAX_NUMBER,
     MIN_NUMBER,
     OUT_GAMES_PATH,
+    OUT_HISTORY_ARCHIVE_PATH,
     OUT_HISTORY_DIR,
     REPO_ROOT,
-    RESULTS_PATH,
     get_bayesian,
     get_draw_size,
     get_feature_weights,
@@ -38,9 +48,15 @@ from core.config import (
     get_structural_rules,
     load_config,
 )
-from core.features_megasena import build_features
+from core import metrics
+from core.history_archive import archive_snapshot, render_snapshot, snapshot_filename
+from core.hit_matrix import to_bitmask
 from core.time_utils import iso_utc_to_brt_text, utc_now_pair
-from core.versioning import register_strategy
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from core.engine import Engine
 
 OUT_PATH = OUT_GAMES_PATH
 
@@ -51,6 +67,15 @@ N_SIM = DEFAULT_N_SIM
 MIN_N = MIN_NUMBER
 MAX_N = MAX_NUMBER
 MAX_INTERSECTION = DEFAULT_MAX_INTERSECTION
+SAMPLERS = ("weighted", "constrained")
+KEY_SAMPLERS = ("iid", "stratified", "sobol", "antithetic")
+OPTIMIZERS = ("greedy", "anneal")
+ANNEAL_ITERATIONS = 4000
+ANNEAL_VIOLATION_PENALTY = 1e3
+CONSTRAINED_MAX_ATTEMPTS = 20
+MAX_FALLBACK_DRAWS = 10_000
+CANDIDATE_TOPUP_FACTOR = 4
+WARM_START_REFRESH = 0.2
 
 
 def weighted_sample(probs: np.ndarray, k: int, rng: np.random.Generator) -> list[int]:
@@ -60,20 +85,161 @@ def weighted_sample(probs: np.ndarray, k: int, rng: np.random.Generator) -> list
     if k <= 0 or k > len(probs):
         raise ValueError(f"ticket_size invalido: {k}")
 
-    safe_probs = np.where(np.isfinite(probs), probs, 0.0)
-    safe_probs = np.maximum(safe_probs, 0.0)
-
-    if float(safe_probs.sum()) <= 0:
-        safe_probs = np.ones(len(probs), dtype=float) / len(probs)
-    else:
-        safe_probs = safe_probs / safe_probs.sum()
-
+    safe_probs = _sampling_weights(probs)
     u = np.clip(rng.random(len(safe_probs)), 1e-12, 1.0)
     keys = -np.log(u) / np.maximum(safe_probs, 1e-12)
     idx = np.argsort(keys)[:k] + 1
     return sorted(int(x) for x in idx)
 
 
+def key_uniforms(n: int, rng: np.random.Generator, method: str = DEFAULT_KEY_SAMPLER) -> np.ndarray:
+    """Uniformes (n, 60) para as chaves Efraimidis-Spirakis de `n` candidatos.
+
+    - `iid`: sorteios independentes (mesma sequencia de `weighted_sample` em laco);
+    - `stratified`: cada dezena recebe um uniforme por estrato 1/n (hipercubo latino);
+    - `sobol`: sequencia de Sobol embaralhada (requer scipy);
+    - `antithetic`: pares u e 1 - u.
+    """
+    if method not in KEY_SAMPLERS:
+        raise ValueError(f"key_sampler invalido: {method}")
+    if method == "iid":
+        u = rng.random((n, MAX_N))
+    elif method == "stratified":
+        strata = rng.permuted(np.tile(np.arange(n), (MAX_N, 1)), axis=1).T
+        u = (strata + rng.random((n, MAX_N))) / n
+    elif method == "antithetic":
+        half = rng.random(((n + 1) // 2, MAX_N))
+        u = np.empty((2 * len(half), MAX_N))
+        u[0::2] = half
+        u[1::2] = 1.0 - half
+        u = u[:n]
+    else:
+        # scipy.stats leva quase 1 s para importar: so carrega quando o sobol e pedido.
+        try:
+            from scipy.stats import qmc
+        except ImportError as exc:  # pragma: no cover - scipy e opcional (extra "qmc")
+            raise ImportError("key_sampler='sobol' requer scipy (pip install mega-engine[qmc]).") from exc
+        seed = int(rng.integers(2**63))
+        try:
+            engine = qmc.Sobol(d=MAX_N, scramble=True, rng=seed)
+        except TypeError:  # scipy < 1.15
+            engine = qmc.Sobol(d=MAX_N, scramble=True, seed=seed)
+        u = engine.random_base2(max(0, int(np.ceil(np.log2(max(n, 1))))))[:n]
+    return np.clip(u, 1e-12, 1.0)
+
+
+def available_key_samplers() -> tuple[str, ...]:
+    has_scipy = importlib.util.find_spec("scipy") is not None
+    return tuple(method for method in KEY_SAMPLERS if method != "sobol" or has_scipy)
+
+
+def weighted_samples(
+    probs: np.ndarray,
+    k: int,
+    n: int,
+    rng: np.random.Generator,
+    *,
+    key_sampler: str = DEFAULT_KEY_SAMPLER,
+) -> list[list[int]]:
+    """`n` amostras de `weighted_sample` de uma vez, com as chaves vindas de `key_uniforms`."""
+    return _weighted_sample_array(probs, k, n, rng, key_sampler).tolist()
+
+
+def _weighted_sample_array(
+    probs: np.ndarray,
+    k: int,
+    n: int,
+    rng: np.random.Generator,
+    key_sampler: str,
+) -> np.ndarray:
+    if len(probs) != MAX_N:
+        raise ValueError(f"Probabilidades invalidas: esperado vetor com {MAX_N} posicoes.")
+    if k <= 0 or k > len(probs):
+        raise ValueError(f"ticket_size invalido: {k}")
+
+    safe_probs = _sampling_weights(probs)
+    keys = -np.log(key_uniforms(n, rng, key_sampler)) / np.maximum(safe_probs, 1e-12)
+    return np.sort(np.argsort(keys, axis=1)[:, :k], axis=1) + 1
+
+
+@metrics.timed("generator.sample")
+def unique_weighted_samples(
+    probs: np.ndarray,
+    k: int,
+    n: int,
+    rng: np.random.Generator,
+    *,
+    key_sampler: str = DEFAULT_KEY_SAMPLER,
+    max_draws: int | None = None,
+    initial: np.ndarray | None = None,
+) -> tuple[np.ndarray, int]:
+    """Ate `n` candidatos distintos (m, k), na ordem em que aparecem no fluxo de `weighted_samples`.
+
+    Repetidos saem por bitmask com `np.unique` e o lote e completado com novos
+    sorteios ate `n` distintos ou `max_draws` sorteios no total (padrao:
+    `CANDIDATE_TOPUP_FACTOR * n`). `initial` entra na frente do fluxo (lote
+    reaproveitado) e nao conta como sorteio. Devolve tambem quantos sorteios foram feitos.
+    """
+    max_draws = CANDIDATE_TOPUP_FACTOR * n if max_draws is None else max(int(max_draws), n)
+    batches: list[np.ndarray] = []
+    masks = np.empty(0, dtype=np.uint64)
+    keep = np.empty(0, dtype=np.int64)
+    if initial is not None and len(initial):
+        batches.append(np.asarray(initial, dtype=np.int64))
+        masks = to_bitmask(batches[0])
+        keep = np.sort(np.unique(masks, return_index=True)[1])
+    drawn = 0
+    while len(keep) < n and drawn < max_draws:
+        size = min(n - len(keep), max_draws - drawn)
+        batch = _weighted_sample_array(probs, k, size, rng, key_sampler)
+        batches.append(batch)
+        masks = np.concatenate([masks, to_bitmask(batch)])
+        drawn += size
+        _unique, first = np.unique(masks, return_index=True)
+        keep = np.sort(first)
+    candidates = np.concatenate(batches) if batches else np.empty((0, k), dtype=np.int64)
+    return candidates[keep[:n]], drawn
+
+
+def warm_start_pool(
+    previous: np.ndarray,
+    probs: np.ndarray,
+    k: int,
+    n: int,
+    rng: np.random.Generator,
+    *,
+    refresh: float = WARM_START_REFRESH,
+    key_sampler: str = DEFAULT_KEY_SAMPLER,
+    weak_pairs: set[tuple[int, int]] | None = None,
+    penalty_weak_pair: float = 0.0,
+) -> tuple[np.ndarray, int]:
+    """Lote de `n` candidatos que reaproveita o lote anterior sob as novas probabilidades.
+
+    Os `(1 - refresh) * n` candidatos anteriores com melhor `score_game` sob
+    `probs` (o mesmo objetivo do seletor) sao mantidos e o restante vem de
+    sorteios novos (`unique_weighted_samples`).
+    """
+    if not 0.0 <= refresh <= 1.0:
+        raise ValueError("refresh deve estar em [0, 1].")
+    previous = np.asarray(previous, dtype=np.int64)
+    keep_count = min(len(previous), int(round((1.0 - refresh) * n)))
+    scores = np.array(
+        [score_game(game, probs, weak_pairs=weak_pairs, penalty_weak_pair=penalty_weak_pair) for game in previous.tolist()],
+        dtype=float,
+    )
+    order = np.argsort(-scores, kind="stable")[:keep_count]
+    return unique_weighted_samples(probs, k, n, rng, key_sampler=key_sampler, initial=previous[order])
+
+
+def _sampling_weights(probs: np.ndarray) -> np.ndarray:
+    safe_probs = np.where(np.isfinite(probs), probs, 0.0)
+    safe_probs = np.maximum(safe_probs, 0.0)
+
+    if float(safe_probs.sum()) <= 0:
+        return np.ones(len(probs), dtype=float) / len(probs)
+    return safe_probs / safe_probs.sum()
+
+
 def validate_game(game: list[int], *, ticket_size: int = TICKET_SIZE) -> None:
     if len(game) != ticket_size:
         raise ValueError(f"Jogo invalido: esperado {ticket_size}, obtido {len(game)}")
@@ -131,6 +297,75 @@ def diff_count(game_a: list[int], game_b: list[int]) -> int:
     return len(game_a) - inter
 
 
+def overlap_cap(ticket_size: int, max_intersection: int, min_diff: int) -> int:
+    """Maior intersecao permitida entre dois jogos (max_intersection e min_diff combinados)."""
+    cap = int(max_intersection)
+    if min_diff > 0:
+        cap = min(cap, int(ticket_size) - int(min_diff))
+    return max(cap, 0)
+
+
+def constrained_sample(
+    probs: np.ndarray,
+    k: int,
+    rng: np.random.Generator,
+    *,
+    max_seq: int = 0,
+    selected: list[list[int]] | None = None,
+    cap: int | None = None,
+    max_attempts: int = CONSTRAINED_MAX_ATTEMPTS,
+) -> tuple[list[int], int]:
+    """Amostra ponderada que ja respeita `max_seq` e o limite de intersecao com `selected`.
+
+    Percorre a permutacao das chaves Efraimidis-Spirakis e pula dezenas que
+    violariam alguma regra; como as mascaras so crescem, o resultado segue a
+    amostragem ponderada sucessiva restrita as dezenas permitidas. Se uma
+    passada termina sem `k` dezenas, tenta de novo; esgotadas as tentativas,
+    relaxa primeiro o limite de intersecao e depois a sequencia, o que garante
+    termino. Devolve o jogo e o numero de passadas descartadas.
+    """
+    if len(probs) != MAX_N:
+        raise ValueError(f"Probabilidades invalidas: esperado vetor com {MAX_N} posicoes.")
+    if k <= 0 or k > len(probs):
+        raise ValueError(f"ticket_size invalido: {k}")
+
+    weights = np.maximum(_sampling_weights(probs), 1e-12)
+    members = [set(game) for game in (selected or [])]
+    limit = len(probs) if cap is None else int(cap)
+    rejected = 0
+
+    for attempt in range(max_attempts + 2):
+        use_overlap = attempt < max_attempts
+        use_seq = attempt <= max_attempts and max_seq > 0
+        u = np.clip(rng.random(len(weights)), 1e-12, 1.0)
+        order = np.argsort(-np.log(u) / weights) + 1
+
+        chosen: set[int] = set()
+        overlaps = [0] * len(members)
+        for n in order:
+            n = int(n)
+            if use_seq:
+                left = 0
+                while n - left - 1 in chosen:
+                    left += 1
+                right = 0
+                while n + right + 1 in chosen:
+                    right += 1
+                if left + right + 1 > max_seq:
+                    continue
+            if use_overlap and any(n in game and overlaps[i] >= limit for i, game in enumerate(members)):
+                continue
+            chosen.add(n)
+            for i, game in enumerate(members):
+                if n in game:
+                    overlaps[i] += 1
+            if len(chosen) == k:
+                return sorted(chosen), rejected
+        rejected += 1
+
+    raise AssertionError("inalcancavel: a ultima passada nao tem restricoes")
+
+
 def score_game(
     game: list[int],
     probs: np.ndarray,
@@ -157,6 +392,8 @@ def load_probs(features_path: Path = FEATURES_PATH, config: dict[str, Any] | Non
     if not features_path.exists():
         return np.ones(MAX_N) / MAX_N
 
+    import pandas as pd
+
     df = pd.read_csv(features_path)
     return scores_from_features(df, config=config)
 
@@ -202,6 +439,8 @@ def build_probabilities_from_history(
     *,
     config: dict[str, Any] | None = None,
 ) -> np.ndarray:
+    from core.features_megasena import build_features
+
     config = config or load_config()
     bayesian = get_bayesian(config)
     features_df = build_features(
@@ -225,37 +464,168 @@ def generate_games_from_probs(
     max_seq: int = 0,
     min_diff: int = 0,
     penalty_weak_pair: float = 0.0,
+    sampler: str = DEFAULT_SAMPLER,
+    key_sampler: str = DEFAULT_KEY_SAMPLER,
+    optimizer: str = DEFAULT_OPTIMIZER,
+    anneal_iterations: int = ANNEAL_ITERATIONS,
+    time_budget: float | None = None,
+    candidate_pool: np.ndarray | None = None,
+    stats: dict[str, Any] | None = None,
 ) -> list[list[int]]:
+    """Gera `n_games` jogos a partir das probabilidades por dezena.
+
+    `sampler="weighted"` sorteia `n_sim` candidatos livres e distintos (repetidos
+    sao repostos ate um teto), ordena por score e filtra por diversidade (`key_sampler` escolhe a reducao de variancia das
+    chaves desse lote); `sampler="constrained"` gasta o mesmo orcamento
+    sorteando candidatos que ja respeitam as regras estruturais para cada vaga.
+    `optimizer="anneal"` ignora `n_sim`: parte de um conjunto valido e otimiza o
+    conjunto inteiro por simulated annealing (`anneal_iterations` trocas, ou ate
+    `time_budget` segundos, o que vier antes; so o limite de iteracoes e reprodutivel).
+    `candidate_pool` (so `weighted`/`greedy`) entra na frente do lote, que e
+    completado ate `n_sim` com sorteios novos (ver `warm_start_pool`).
+    Se `stats` for informado, recebe contagens de candidatos descartados e a
+    fracao de sorteios repetidos (`duplicate_ratio`).
+    """
     if n_games <= 0:
         raise ValueError("n_games deve ser maior que zero")
     if ticket_size <= 0 or ticket_size > MAX_N:
         raise ValueError("ticket_size invalido")
     if n_sim <= 0:
         raise ValueError("n_sim deve ser maior que zero")
+    if sampler not in SAMPLERS:
+        raise ValueError(f"sampler invalido: {sampler}")
+    if key_sampler not in KEY_SAMPLERS:
+        raise ValueError(f"key_sampler invalido: {key_sampler}")
+    if optimizer not in OPTIMIZERS:
+        raise ValueError(f"optimizer invalido: {optimizer}")
+    if candidate_pool is not None and (sampler != "weighted" or optimizer != "greedy"):
+        raise ValueError("candidate_pool so vale para sampler='weighted' e optimizer='greedy'.")
 
     rng = np.random.default_rng(seed)
-    candidates = [weighted_sample(probs, ticket_size, rng) for _ in range(n_sim)]
-    seen_candidates: set[tuple[int, ...]] = set()
+    score_kwargs = {"weak_pairs": weak_pairs, "penalty_weak_pair": penalty_weak_pair}
+    counters = {"sampler": sampler, "candidates": 0, "rejected": 0, "duplicates": 0, "fallback": 0}
+    if optimizer == "anneal":
+        counters["sampler"] = "constrained"
+        cap = overlap_cap(ticket_size, max_intersection, min_diff)
+        initial = _select_constrained(
+            probs,
+            rng,
+            n_games=n_games,
+            ticket_size=ticket_size,
+            n_sim=n_games,
+            cap=cap,
+            max_seq=max_seq,
+            score_kwargs=score_kwargs,
+            counters=counters,
+        )
+        selected = anneal_ticket_set(
+            initial,
+            probs,
+            rng,
+            cap=cap,
+            max_seq=max_seq,
+            weak_pairs=weak_pairs,
+            penalty_weak_pair=penalty_weak_pair,
+            iterations=anneal_iterations,
+            time_budget=time_budget,
+            counters=counters,
+        )
+    elif sampler == "constrained":
+        selected = _select_constrained(
+            probs,
+            rng,
+            n_games=n_games,
+            ticket_size=ticket_size,
+            n_sim=n_sim,
+            cap=overlap_cap(ticket_size, max_intersection, min_diff),
+            max_seq=max_seq,
+            score_kwargs=score_kwargs,
+            counters=counters,
+        )
+    else:
+        selected = _select_weighted(
+            probs,
+            rng,
+            n_games=n_games,
+            ticket_size=ticket_size,
+            n_sim=n_sim,
+            max_intersection=max_intersection,
+            max_seq=max_seq,
+            min_diff=min_diff,
+            key_sampler=key_sampler,
+            candidate_pool=candidate_pool,
+            score_kwargs=score_kwargs,
+            counters=counters,
+        )
+
+    for game in selected:
+        validate_game(game, ticket_size=ticket_size)
+
+    metrics.count("generator.candidates", counters["candidates"])
+    metrics.count("generator.rejected", counters["rejected"])
+    metrics.count("generator.duplicates", counters["duplicates"])
+    if stats is not None:
+        attempts = counters["candidates"] + counters["rejected"]
+        stats.update(counters)
+        stats["rejection_rate"] = round(counters["rejected"] / attempts, 6) if attempts else 0.0
+        stats["duplicate_ratio"] = round(counters["duplicates"] / attempts, 6) if attempts else 0.0
+
+    return selected[:n_games]
+
+
+def _select_weighted(
+    probs: np.ndarray,
+    rng: np.random.Generator,
+    *,
+    n_games: int,
+    ticket_size: int,
+    n_sim: int,
+    max_intersection: int,
+    max_seq: int,
+    min_diff: int,
+    key_sampler: str,
+    candidate_pool: np.ndarray | None,
+    score_kwargs: dict[str, Any],
+    counters: dict[str, Any],
+) -> list[list[int]]:
+    candidates, drawn = unique_weighted_samples(
+        probs, ticket_size, n_sim, rng, key_sampler=key_sampler, initial=candidate_pool
+    )
+    drawn += 0 if candidate_pool is None else len(candidate_pool)
     ranked_candidates: list[tuple[float, list[int]]] = []
-    for game in candidates:
-        key = tuple(game)
-        if key in seen_candidates:
-            continue
-        seen_candidates.add(key)
-        if not check_max_consecutive(game, max_seq):
-            continue
-        ranked_candidates.append(
-            (
-                score_game(
-                    game,
-                    probs,
-                    weak_pairs=weak_pairs,
-                    penalty_weak_pair=penalty_weak_pair,
-                ),
-                game,
-            )
+    with metrics.timer("generator.score"):
+        for game in candidates.tolist():
+            if not check_max_consecutive(game, max_seq):
+                continue
+            ranked_candidates.append((score_game(game, probs, **score_kwargs), game))
+    counters["candidates"] = len(ranked_candidates)
+    counters["rejected"] = drawn - len(ranked_candidates)
+    counters["duplicates"] = drawn - len(candidates)
+
+    with metrics.timer("generator.select"):
+        return _pick_diverse(
+            ranked_candidates,
+            rng,
+            n_games=n_games,
+            ticket_size=ticket_size,
+            max_intersection=max_intersection,
+            max_seq=max_seq,
+            min_diff=min_diff,
+            counters=counters,
         )
 
+
+def _pick_diverse(
+    ranked_candidates: list[tuple[float, list[int]]],
+    rng: np.random.Generator,
+    *,
+    n_games: int,
+    ticket_size: int,
+    max_intersection: int,
+    max_seq: int,
+    min_diff: int,
+    counters: dict[str, Any],
+) -> list[list[int]]:
     ranked_candidates.sort(key=lambda item: item[0], reverse=True)
 
     selected: list[list[int]] = []
@@ -281,36 +651,218 @@ def generate_games_from_probs(
                     break
 
     while len(selected) < n_games:
+        # Regras sem jogos distintos suficientes (ex.: max_seq apertado) nunca fechariam o laco.
+        counters["fallback"] += 1
+        if counters["fallback"] > MAX_FALLBACK_DRAWS:
+            raise ValueError("Nao foi possivel gerar jogos distintos com as regras informadas.")
         game = tuple(int(x) for x in sorted(rng.choice(np.arange(MIN_N, MAX_N + 1), size=ticket_size, replace=False)))
         if game not in seen and check_max_consecutive(list(game), max_seq):
             selected.append(list(game))
             seen.add(game)
 
-    for game in selected:
-        validate_game(game, ticket_size=ticket_size)
+    return selected
 
-    return selected[:n_games]
 
+@metrics.timed("generator.select_constrained")
+def _select_constrained(
+    probs: np.ndarray,
+    rng: np.random.Generator,
+    *,
+    n_games: int,
+    ticket_size: int,
+    n_sim: int,
+    cap: int,
+    max_seq: int,
+    score_kwargs: dict[str, Any],
+    counters: dict[str, Any],
+) -> list[list[int]]:
+    """Divide `n_sim` entre as vagas; cada vaga fica com o melhor candidato valido do seu lote."""
+    per_slot = max(1, n_sim // n_games)
+    selected: list[list[int]] = []
+    seen: set[tuple[int, ...]] = set()
+    for _slot in range(n_games):
+        best: tuple[float, list[int]] | None = None
+        for _ in range(per_slot):
+            game, rejected = constrained_sample(probs, ticket_size, rng, max_seq=max_seq, selected=selected, cap=cap)
+            counters["rejected"] += rejected
+            if tuple(game) in seen:
+                counters["rejected"] += 1
+                counters["duplicates"] += 1
+                continue
+            counters["candidates"] += 1
+            score = score_game(game, probs, **score_kwargs)
+            if best is None or score > best[0]:
+                best = (score, game)
+        while best is None:
+            # So acontece com cap >= ticket_size e todos os candidatos repetindo jogos ja escolhidos.
+            counters["fallback"] += 1
+            if counters["fallback"] > MAX_FALLBACK_DRAWS:
+                raise ValueError("Nao foi possivel gerar jogos distintos com as regras informadas.")
+            game, _rejected = constrained_sample(probs, ticket_size, rng, max_seq=max_seq, selected=selected, cap=cap)
+            if tuple(game) not in seen:
+                best = (score_game(game, probs, **score_kwargs), game)
+        selected.append(best[1])
+        seen.add(tuple(best[1]))
+    return selected
+
+
+def _run_excess(members: set[int], max_seq: int) -> int:
+    """Quanto as sequencias de dezenas consecutivas excedem `max_seq` (0 = jogo valido)."""
+    if max_seq <= 0:
+        return 0
+    excess = 0
+    for n in members:
+        if n - 1 in members:
+            continue
+        run = 1
+        while n + run in members:
+            run += 1
+        excess += max(0, run - max_seq)
+    return excess
 
-def generate_games(seed: int | None = None, config: dict[str, Any] | None = None) -> list[list[int]]:
-    config = config or load_config()
+
+@metrics.timed("generator.anneal")
+def anneal_ticket_set(
+    initial: list[list[int]],
+    probs: np.ndarray,
+    rng: np.random.Generator,
+    *,
+    cap: int,
+    max_seq: int = 0,
+    weak_pairs: set[tuple[int, int]] | None = None,
+    penalty_weak_pair: float = 0.0,
+    iterations: int = ANNEAL_ITERATIONS,
+    time_budget: float | None = None,
+    counters: dict[str, Any] | None = None,
+) -> list[list[int]]:
+    """Simulated annealing sobre o conjunto inteiro de jogos.
+
+    Objetivo: soma de `score_game` dos jogos (probabilidades menos penalidade de
+    pares fracos). Cada movimento troca uma dezena de um jogo por outra fora
+    dele; o delta do score, das intersecoes com os demais jogos e da sequencia
+    maxima e calculado so para o jogo alterado. Violacoes de `cap`/`max_seq`
+    entram com peso alto, e o melhor conjunto sem violacoes e o devolvido.
+    """
+    tickets = [set(game) for game in initial]
+    n_tickets = len(tickets)
+    ticket_size = len(initial[0]) if initial else 0
+    if n_tickets == 0 or ticket_size in (0, MAX_N):
+        return [sorted(game) for game in tickets]
+
+    values = np.concatenate([[0.0], np.where(np.isfinite(probs), probs, 0.0)]).tolist()
+    weak = [[False] * (MAX_N + 1) for _ in range(MAX_N + 1)]
+    for a, b in weak_pairs or set():
+        if MIN_N <= a <= MAX_N and MIN_N <= b <= MAX_N:
+            weak[a][b] = weak[b][a] = True
+
+    def pair_violation(inter: int) -> int:
+        return max(0, inter - cap) + int(inter == ticket_size)
+
+    inter = [[len(tickets[i] & tickets[j]) for j in range(n_tickets)] for i in range(n_tickets)]
+    runs = [_run_excess(game, max_seq) for game in tickets]
+    score = sum(score_game(sorted(game), probs, weak_pairs=weak_pairs, penalty_weak_pair=penalty_weak_pair) for game in tickets)
+    violations = sum(runs) + sum(pair_violation(inter[i][j]) for i in range(n_tickets) for j in range(i + 1, n_tickets))
+
+    def energy(score_value: float, violation_count: int) -> float:
+        return score_value - ANNEAL_VIOLATION_PENALTY * violation_count
+
+    # Temperatura inicial na escala das diferencas entre probabilidades; resfriamento geometrico.
+    spread = float(np.std(values[1:])) or 1e-6
+    t_start, t_end = 1.0 * spread, 1e-3 * spread
+    current = energy(score, violations)
+    best = [sorted(game) for game in tickets] if violations == 0 else None
+    best_score = score if violations == 0 else -np.inf
+    accepted = 0
+    started = time.perf_counter()
+    numbers = list(range(MIN_N, MAX_N + 1))
+
+    done = 0
+    for step in range(max(0, int(iterations))):
+        if time_budget is not None and step % 256 == 0 and time.perf_counter() - started > time_budget:
+            break
+        done = step + 1
+        temperature = t_start * (t_end / t_start) ** (step / max(1, iterations - 1))
+        t = int(rng.integers(n_tickets))
+        game = tickets[t]
+        old = sorted(game)[int(rng.integers(ticket_size))]
+        new = numbers[int(rng.integers(MAX_N))]
+        if new in game:
+            continue
+
+        others = [n for n in game if n != old]
+        delta_score = values[new] - values[old]
+        if penalty_weak_pair:
+            delta_score -= penalty_weak_pair * (sum(weak[new][n] for n in others) - sum(weak[old][n] for n in others))
+
+        delta_violations = 0
+        new_inter = inter[t][:]
+        for j in range(n_tickets):
+            if j == t:
+                continue
+            changed = inter[t][j] - (old in tickets[j]) + (new in tickets[j])
+            if changed != inter[t][j]:
+                delta_violations += pair_violation(changed) - pair_violation(inter[t][j])
+                new_inter[j] = changed
+        game.discard(old)
+        game.add(new)
+        new_run = _run_excess(game, max_seq)
+        delta_violations += new_run - runs[t]
+
+        candidate = energy(score + delta_score, violations + delta_violations)
+        if candidate >= current or rng.random() < np.exp((candidate - current) / temperature):
+            accepted += 1
+            score += delta_score
+            violations += delta_violations
+            current = candidate
+            runs[t] = new_run
+            for j in range(n_tickets):
+                inter[t][j] = inter[j][t] = new_inter[j]
+            inter[t][t] = ticket_size
+            if violations == 0 and score > best_score + 1e-12:
+                best_score = score
+                best = [sorted(g) for g in tickets]
+        else:
+            game.discard(new)
+            game.add(old)
+
+    if counters is not None:
+        counters["optimizer"] = "anneal"
+        counters["iterations"] = done
+        counters["accepted_moves"] = accepted
+        counters["objective"] = round(float(best_score), 6) if best is not None else None
+    return best if best is not None else [sorted(game) for game in tickets]
+
+
+def generation_kwargs(config: dict[str, Any]) -> dict[str, Any]:
+    """Argumentos de `generate_games_from_probs` definidos pela config (exceto probs, seed e weak_pairs)."""
     params = get_parameters(config)
     structural_rules = get_structural_rules(config)
-    probs = load_probs(config=config)
-    results_df = pd.read_csv(RESULTS_PATH)
-    weak_pairs = build_weak_pair_set(results_df, int(structural_rules["bottom_pairs"]))
-    return generate_games_from_probs(
-        probs,
-        seed=seed,
-        n_games=int(params.get("num_games", N_GAMES)),
-        ticket_size=int(params.get("ticket_size", TICKET_SIZE)),
-        n_sim=int(params.get("n_sim", N_SIM)),
-        max_intersection=int(params.get("max_intersection", MAX_INTERSECTION)),
-        weak_pairs=weak_pairs,
-        max_seq=int(structural_rules["max_seq"]),
-        min_diff=int(structural_rules["min_diff"]),
-        penalty_weak_pair=float(structural_rules["penalty_weak_pair"]),
-    )
+    return {
+        "n_games": int(params.get("num_games", N_GAMES)),
+        "ticket_size": int(params.get("ticket_size", TICKET_SIZE)),
+        "n_sim": int(params.get("n_sim", N_SIM)),
+        "max_intersection": int(params.get("max_intersection", MAX_INTERSECTION)),
+        "max_seq": int(structural_rules["max_seq"]),
+        "min_diff": int(structural_rules["min_diff"]),
+        "penalty_weak_pair": float(structural_rules["penalty_weak_pair"]),
+        "sampler": str(params.get("sampler", DEFAULT_SAMPLER)),
+        "key_sampler": str(params.get("key_sampler", DEFAULT_KEY_SAMPLER)),
+        "optimizer": str(params.get("optimizer", DEFAULT_OPTIMIZER)),
+        "anneal_iterations": int(params.get("anneal_iterations", ANNEAL_ITERATIONS)),
+    }
+
+
+def generate_games(
+    seed: int | None = None,
+    config: dict[str, Any] | None = None,
+    *,
+    stats: dict[str, Any] | None = None,
+    engine: Engine | None = None,
+) -> list[list[int]]:
+    from core.engine import Engine
+
+    engine = engine or Engine(config=config)
+    return engine.generate(seed, stats=stats)
 
 
 def _load_last_result() -> dict[str, Any] | None:
@@ -428,19 +980,36 @@ def export_json(games: list[list[int]], config: dict[str, Any] | None = None) ->
 
     target_concurso = output.get("metadata", {}).get("target_concurso")
     if target_concurso is not None:
+        archive_snapshot(int(target_concurso), output, OUT_HISTORY_ARCHIVE_PATH)
         OUT_HISTORY_DIR.mkdir(parents=True, exist_ok=True)
-        history_path = OUT_HISTORY_DIR / f"jogos_concurso_{int(target_concurso)}.json"
-        with history_path.open("w", encoding="utf-8") as f:
-            json.dump(output, f, indent=2, ensure_ascii=False)
+        history_path = OUT_HISTORY_DIR / snapshot_filename(int(target_concurso))
+        history_path.write_text(render_snapshot(output), encoding="utf-8")
 
     return output, True
 
 
-if __name__ == "__main__":
-    config = load_config()
-    games = generate_games(seed=derive_generation_seed(config), config=config)
+def main(*, engine: Engine | None = None) -> None:
+    from core.engine import Engine
+
+    engine = engine or Engine()
+    config = engine.config
+    generation_stats: dict[str, Any] = {}
+    games = engine.generate(derive_generation_seed(config), stats=generation_stats)
+    print(
+        "[GENERATOR] Candidatos:",
+        f"validos={generation_stats['candidates']}",
+        f"duplicate_ratio={generation_stats['duplicate_ratio']}",
+    )
     _output, changed = export_json(games, config=config)
     if changed:
+        from core.versioning import register_strategy
+
         register_strategy(config, execution_type="production")
     else:
         print("[VERSIONING] Rerun identico. Registro de estrategia nao atualizado.")
+
+
+if __name__ == "__main__":
+    from core.profiling import run_main
+
+    run_main(main)
@@ -0,0 +1,174 @@
+"""Arquivo compactado e indexado dos snapshots de jogos por concurso.
+
+Cada linha de `out/history_archive.jsonl` guarda `{"concurso": n, "snapshot": {...}}`.
+O arquivo so recebe acrescimos; o indice lateral (`ConcursoIndex`) resolve o
+concurso para offset em O(log n) sem abrir o restante do arquivo, e uma nova
+versao de um snapshot substitui a anterior na leitura. Os arquivos
+`out/history/jogos_concurso_<n>.json` continuam existindo como exportacao para o n8n.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+from collections.abc import Iterable, Mapping
+from pathlib import Path
+from typing import Any
+
+from core.config import OUT_HISTORY_ARCHIVE_PATH, OUT_HISTORY_DIR
+from core.jsonl_log import append_jsonl_many
+from core.performance_index import ConcursoIndex
+
+SNAPSHOT_FILE_RE = re.compile(r"^jogos_concurso_(\d+)\.json$")
+# Carimbos de quando o snapshot foi remontado; nao mudam o conteudo arquivado.
+VOLATILE_METADATA_KEYS = ("reconstructed_at_utc", "reconstructed_at_brt")
+
+
+def snapshot_filename(concurso: int) -> str:
+    return f"jogos_concurso_{int(concurso)}.json"
+
+
+def render_snapshot(payload: dict[str, Any]) -> str:
+    """Mesmo formato que o gerador sempre usou para os arquivos de out/history."""
+    return json.dumps(payload, indent=2, ensure_ascii=False)
+
+
+def _stable_content(payload: dict[str, Any] | None) -> dict[str, Any] | None:
+    if not isinstance(payload, dict) or not isinstance(payload.get("metadata"), dict):
+        return payload
+    metadata = {key: value for key, value in payload["metadata"].items() if key not in VOLATILE_METADATA_KEYS}
+    return {**payload, "metadata": metadata}
+
+
+def open_archive(path: Path = OUT_HISTORY_ARCHIVE_PATH) -> ConcursoIndex:
+    return ConcursoIndex(path)
+
+
+def archive_snapshots(
+    snapshots: Iterable[tuple[int, dict[str, Any]]],
+    path: Path = OUT_HISTORY_ARCHIVE_PATH,
+) -> int:
+    """Acrescenta snapshots em um unico write; versoes identicas a ja arquivada sao ignoradas.
+
+    A comparacao ignora `VOLATILE_METADATA_KEYS`: remontar o mesmo snapshot em
+    outra auditoria mantem a versao arquivada.
+    """
+    index = open_archive(path)
+    pending: dict[int, dict[str, Any]] = {}
+    for concurso, payload in snapshots:
+        pending[int(concurso)] = payload
+    if not pending:
+        return 0
+
+    stored = index.range(min(pending), max(pending))
+    records = [
+        {"concurso": concurso, "snapshot": payload}
+        for concurso, payload in sorted(pending.items())
+        if _stable_content(stored.get(concurso, {}).get("snapshot")) != _stable_content(payload)
+    ]
+    if records:
+        append_jsonl_many(path, records)
+        index.refresh()
+    return len(records)
+
+
+def archive_snapshot(concurso: int, payload: dict[str, Any], path: Path = OUT_HISTORY_ARCHIVE_PATH) -> bool:
+    return archive_snapshots([(concurso, payload)], path) > 0
+
+
+def load_snapshot(concurso: int, path: Path = OUT_HISTORY_ARCHIVE_PATH) -> dict[str, Any] | None:
+    if not path.exists():
+        return None
+    record = open_archive(path).get(concurso)
+    return record.get("snapshot") if record else None
+
+
+def read_snapshot(
+    concurso: int,
+    *,
+    out_dir: Path = OUT_HISTORY_DIR,
+    archived: Mapping[int, dict[str, Any]] | None = None,
+    path: Path = OUT_HISTORY_ARCHIVE_PATH,
+) -> dict[str, Any] | None:
+    """Snapshot do concurso: `out/history/jogos_concurso_<n>.json` se existir, senao a versao arquivada.
+
+    O arquivo em disco pode ter sido editado ou regenerado depois do ultimo
+    arquivamento. `archived` evita reabrir o arquivo compactado quando quem
+    chama ja carregou o lote.
+    """
+    file_path = out_dir / snapshot_filename(concurso)
+    if file_path.exists():
+        return json.loads(file_path.read_text(encoding="utf-8"))
+    if archived is not None:
+        return archived.get(int(concurso))
+    return load_snapshot(concurso, path)
+
+
+def load_snapshots(start: int, end: int, path: Path = OUT_HISTORY_ARCHIVE_PATH) -> dict[int, dict[str, Any]]:
+    """Snapshots de [start, end] em ordem de concurso, lidos em uma passada sobre o arquivo."""
+    if not path.exists():
+        return {}
+    return {concurso: record["snapshot"] for concurso, record in open_archive(path).range(start, end).items()}
+
+
+def export_snapshots(
+    out_dir: Path = OUT_HISTORY_DIR,
+    path: Path = OUT_HISTORY_ARCHIVE_PATH,
+    *,
+    start: int | None = None,
+    end: int | None = None,
+) -> list[Path]:
+    """Materializa `jogos_concurso_<n>.json`; arquivos ja identicos nao sao regravados."""
+    if not path.exists():
+        return []
+    index = open_archive(path)
+    concursos = index.concursos()
+    if not concursos:
+        return []
+    snapshots = index.range(concursos[0] if start is None else start, concursos[-1] if end is None else end)
+
+    written: list[Path] = []
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for concurso, record in snapshots.items():
+        target = out_dir / snapshot_filename(concurso)
+        content = render_snapshot(record["snapshot"])
+        if target.exists() and target.read_text(encoding="utf-8").rstrip() == content:
+            continue
+        target.write_text(content, encoding="utf-8")
+        written.append(target)
+    return written
+
+
+def import_history_dir(history_dir: Path = OUT_HISTORY_DIR, path: Path = OUT_HISTORY_ARCHIVE_PATH) -> int:
+    snapshots = []
+    for file_path in sorted(history_dir.glob("jogos_concurso_*.json")):
+        match = SNAPSHOT_FILE_RE.match(file_path.name)
+        if match is None:
+            continue
+        snapshots.append((int(match.group(1)), json.loads(file_path.read_text(encoding="utf-8"))))
+    return archive_snapshots(snapshots, path)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Arquivo indexado dos snapshots de out/history.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("import", help="Importa os arquivos jogos_concurso_<n>.json para o arquivo compactado.")
+    export = sub.add_parser("export", help="Exporta snapshots do arquivo compactado para out/history.")
+    export.add_argument("--start", type=int)
+    export.add_argument("--end", type=int)
+    export.add_argument("--out-dir", type=Path, default=OUT_HISTORY_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == "import":
+        added = import_history_dir()
+        print(f"[HISTORY] {added} snapshot(s) arquivado(s) em {OUT_HISTORY_ARCHIVE_PATH}")
+    else:
+        written = export_snapshots(args.out_dir, start=args.start, end=args.end)
+        print(f"[HISTORY] {len(written)} arquivo(s) exportado(s) para {args.out_dir}")
+
+
+if __name__ == "__main__":
+    from core.profiling import run_main
+
+    run_main(main)
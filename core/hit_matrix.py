@@ -0,0 +1,181 @@
+"""Avaliacao vetorizada de acertos para muitos jogos contra muitos sorteios.
+
+Jogos e sorteios viram matrizes de incidencia (linha x dezena) e os acertos
+saem de um produto matricial. Os resumos por sorteio reproduzem exatamente o
+`summary` de `compare_results.compute_hits`.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+
+from core.config import MAX_NUMBER, MIN_NUMBER
+
+N_NUMBERS = MAX_NUMBER - MIN_NUMBER + 1
+HIST_BINS = 10
+DEFAULT_CHUNK_SIZE = 8192
+
+TicketsLike = Sequence[Sequence[int]] | np.ndarray
+
+
+def to_incidence(rows: TicketsLike) -> np.ndarray:
+    """Converte listas de dezenas, bitmasks uint64 ou incidencia bool em contagens (linhas, 60).
+
+    Dezenas repetidas em uma linha contam duas vezes, como em `compute_hits`;
+    dezenas fora da faixa sao ignoradas.
+    """
+    if isinstance(rows, np.ndarray):
+        if rows.ndim == 2 and rows.dtype == np.bool_ and rows.shape[1] == N_NUMBERS:
+            return rows.astype(np.uint8)
+        if rows.ndim == 1 and rows.dtype == np.uint64:
+            bits = np.arange(N_NUMBERS, dtype=np.uint64)
+            return ((rows[:, None] >> bits) & np.uint64(1)).astype(np.uint8)
+
+    incidence = np.zeros((len(rows), N_NUMBERS), dtype=np.uint8)
+    try:
+        array = np.asarray(rows)
+    except ValueError:
+        array = None
+    if array is not None and array.ndim == 2 and array.dtype.kind in "iu":
+        columns = array.astype(np.int64) - MIN_NUMBER
+        inside = (columns >= 0) & (columns < N_NUMBERS)
+        row_ids = np.broadcast_to(np.arange(len(array))[:, None], columns.shape)
+        np.add.at(incidence, (row_ids[inside], columns[inside]), 1)
+        return incidence
+
+    for row, numbers in enumerate(rows):
+        for n in numbers:
+            column = int(n) - MIN_NUMBER
+            if 0 <= column < N_NUMBERS:
+                incidence[row, column] += 1
+    return incidence
+
+
+def to_bitmask(rows: Sequence[Sequence[int]]) -> np.ndarray:
+    """Uma dezena por bit (bit 0 = MIN_NUMBER), compacto para guardar e deduplicar jogos."""
+    if isinstance(rows, np.ndarray) and rows.ndim == 2 and rows.dtype.kind in "iu":
+        bits = (rows.astype(np.int64) - MIN_NUMBER).astype(np.uint64)
+        return np.bitwise_or.reduce(np.uint64(1) << bits, axis=1, initial=np.uint64(0))
+    masks = np.zeros(len(rows), dtype=np.uint64)
+    for row, numbers in enumerate(rows):
+        mask = 0
+        for n in numbers:
+            mask |= 1 << (int(n) - MIN_NUMBER)
+        masks[row] = mask
+    return masks
+
+
+def hit_matrix(tickets: TicketsLike, draws: TicketsLike, *, chunk_size: int = DEFAULT_CHUNK_SIZE) -> np.ndarray:
+    """Matriz (M jogos, D sorteios) com o numero de acertos de cada par."""
+    ticket_incidence = to_incidence(tickets)
+    draw_incidence = to_incidence(draws).astype(np.float32).T
+    hits = np.empty((ticket_incidence.shape[0], draw_incidence.shape[1]), dtype=np.uint8)
+    for start in range(0, ticket_incidence.shape[0], chunk_size):
+        block = ticket_incidence[start : start + chunk_size].astype(np.float32)
+        hits[start : start + chunk_size] = block @ draw_incidence
+    return hits
+
+
+def _summaries(
+    histogram: np.ndarray,
+    max_hits: np.ndarray,
+    draw_incidence: np.ndarray,
+    covered: np.ndarray,
+) -> list[dict[str, Any]]:
+    ge4 = histogram[:, 4:].sum(axis=1)
+    ge5 = histogram[:, 5:].sum(axis=1)
+    eq6 = histogram[:, 6]
+    numbers = np.arange(MIN_NUMBER, MAX_NUMBER + 1)
+
+    out = []
+    for d in range(draw_incidence.shape[0]):
+        drawn = draw_incidence[d] > 0
+        covered_draw_numbers = [int(n) for n in numbers[drawn & covered[d]]]
+        neglected_draw_numbers = [int(n) for n in numbers[drawn & ~covered[d]]]
+        coverage_count = len(covered_draw_numbers)
+        draw_size = int(drawn.sum())
+        out.append(
+            {
+                "max_hits": int(max_hits[d]),
+                "count_ge4": int(ge4[d]),
+                "count_ge5": int(ge5[d]),
+                "count_eq6": int(eq6[d]),
+                "score": int(ge4[d]) * 1 + int(ge5[d]) * 5 + int(eq6[d]) * 50,
+                "hist_hits_count": {str(i): int(histogram[d, i]) for i in range(HIST_BINS)},
+                "coverage_count": coverage_count,
+                "coverage_rate": round(coverage_count / draw_size, 4) if draw_size else 0.0,
+                "covered_draw_numbers": covered_draw_numbers,
+                "neglected_draw_numbers": neglected_draw_numbers,
+            }
+        )
+    return out
+
+
+def _histogram(hits: np.ndarray, rows: np.ndarray | int) -> np.ndarray:
+    """Histograma por coluna (sorteio) dos acertos 0..9 de uma matriz (jogos, sorteios).
+
+    Usa contagens cumulativas (acertos >= v) so ate o maior valor presente; `rows`
+    e o numero de jogos validos por coluna (linhas de preenchimento valem 0 acertos).
+    """
+    histogram = np.zeros((hits.shape[1], HIST_BINS), dtype=np.int64)
+    at_least = np.broadcast_to(np.asarray(rows, dtype=np.int64), (hits.shape[1],)).copy()
+    top = min(int(hits.max(initial=0)), HIST_BINS - 1)
+    for value in range(top + 1):
+        above = (hits > value).sum(axis=0, dtype=np.int64) if value < top else np.zeros_like(at_least)
+        histogram[:, value] = at_least - above
+        at_least = above
+    return histogram
+
+
+def summarize_draws(
+    tickets: TicketsLike,
+    draws: TicketsLike,
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> list[dict[str, Any]]:
+    """Resumo de cada sorteio contra o mesmo conjunto de jogos, sem materializar M x D inteiro."""
+    ticket_incidence = to_incidence(tickets)
+    draw_incidence = to_incidence(draws)
+    draw_matrix = draw_incidence.astype(np.float32).T
+    n_draws = draw_incidence.shape[0]
+
+    histogram = np.zeros((n_draws, HIST_BINS), dtype=np.int64)
+    max_hits = np.zeros(n_draws, dtype=np.int64)
+    for start in range(0, ticket_incidence.shape[0], chunk_size):
+        block = (ticket_incidence[start : start + chunk_size].astype(np.float32) @ draw_matrix).astype(np.uint8)
+        histogram += _histogram(block, block.shape[0])
+        np.maximum(max_hits, block.max(axis=0), out=max_hits)
+
+    covered = np.broadcast_to(ticket_incidence.any(axis=0), draw_incidence.shape)
+    return _summaries(histogram, max_hits, draw_incidence, covered)
+
+
+def evaluate_paired(
+    tickets_per_draw: Sequence[Sequence[Sequence[int]]],
+    draws: TicketsLike,
+) -> tuple[list[np.ndarray], list[dict[str, Any]]]:
+    """Cada sorteio d contra o seu proprio conjunto de jogos (caso do backtest walk-forward).
+
+    Devolve os acertos por jogo de cada sorteio e os resumos, em uma unica passada.
+    """
+    draw_incidence = to_incidence(draws)
+    n_draws = draw_incidence.shape[0]
+    if len(tickets_per_draw) != n_draws:
+        raise ValueError("tickets_per_draw e draws precisam ter o mesmo tamanho.")
+
+    sizes = [len(tickets) for tickets in tickets_per_draw]
+    width = max(sizes, default=0)
+    incidence = np.zeros((n_draws, width, N_NUMBERS), dtype=np.uint8)
+    for d, tickets in enumerate(tickets_per_draw):
+        if tickets:
+            incidence[d, : len(tickets)] = to_incidence(tickets)
+
+    hits = np.einsum("dmk,dk->dm", incidence, draw_incidence, dtype=np.int64)
+    histogram = _histogram(hits.T, np.asarray(sizes))
+    max_hits = hits.max(axis=1, initial=0)
+    covered = incidence.any(axis=1)
+    per_draw_hits = [hits[d, : sizes[d]] for d in range(n_draws)]
+    return per_draw_hits, _summaries(histogram, max_hits, draw_incidence, covered)
@@ -7,13 +7,9 @@ import random
 from datetime import datetime
 from io import BytesIO
 
-from openai import OpenAI
-from PIL import Image
-
 from core.config import IMAGE_OUTPUT_DIR, OUT_GAMES_PATH
 
 OUTPUT_DIR = IMAGE_OUTPUT_DIR
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
 
 def main() -> None:
@@ -26,6 +22,10 @@ def main() -> None:
         print(f"[IMAGE] Skip: arquivo ausente em {OUT_GAMES_PATH}.")
         return
 
+    # openai e PIL so carregam quando ha imagem para gerar; os skips acima saem sem importa-los.
+    from openai import OpenAI
+    from PIL import Image
+
     client = OpenAI(api_key=api_key)
 
     with OUT_GAMES_PATH.open("r", encoding="utf-8") as f:
@@ -103,6 +103,7 @@ no money, no prizes, no lottery machines, no gambling tone
     image_base64 = result.data[0].b64_json
     image_bytes = base64.b64decode(image_base64)
 
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     image = Image.open(BytesIO(image_bytes))
     image = image.resize((800, 800), Image.LANCZOS)
     image.save(current_filename, "PNG", optimize=True)
@@ -116,4 +117,6 @@ no money, no prizes, no lottery machines, no gambling tone
 
 
 if __name__ == "__main__":
-    main()
+    from core.profiling import run_main
+
+    run_main(main)
@@ -3,15 +3,9 @@ from __future__ import annotations
 import json
 import warnings
 from datetime import datetime, timezone
+from typing import TYPE_CHECKING
 
-import pandas as pd
-
-warnings.filterwarnings(
-    "ignore",
-    message=r"urllib3 .* or chardet .* doesn't match a supported version!",
-)
-import requests
-
+from core import metrics
 from core.config import LAST_RESULT_PATH as LAST_JSON, RESULTS_PATH as CSV_PATH
 from core.time_utils import utc_now_pair
 
@@ -20,9 +14,21 @@ API_HISTORICO = "https://loteriascaixa-api.herokuapp.com/api/megasena"
 REQUEST_TIMEOUT = 20
 DRAW_COLUMNS = [f"d{i}" for i in range(1, 7)]
 CSV_COLUMNS = ["concurso", "data", *DRAW_COLUMNS]
+TAIL_READ_BYTES = 4096
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import requests
 
 
 def _session() -> requests.Session:
+    # requests e pandas so carregam quando necessarios: o caminho "nenhum concurso novo" nao usa pandas.
+    warnings.filterwarnings(
+        "ignore",
+        message=r"urllib3 .* or chardet .* doesn't match a supported version!",
+    )
+    import requests
+
     session = requests.Session()
     session.headers.update({"User-Agent": "mega-engine/1.1"})
     return session
@@ -45,7 +51,25 @@ def _normalize_result(concurso: int, data: str, dezenas: list[int]) -> dict:
     }
 
 
+def last_saved_concurso() -> int:
+    """Maior concurso do CSV lendo so o final do arquivo (gravado ordenado por `save_results`)."""
+    if not CSV_PATH.exists():
+        return 0
+    with CSV_PATH.open("rb") as f:
+        f.seek(0, 2)
+        size = f.tell()
+        f.seek(max(0, size - TAIL_READ_BYTES))
+        lines = f.read().decode("utf-8").splitlines()
+    try:
+        return int(lines[-1].split(",", 1)[0])
+    except (IndexError, ValueError):
+        existing_df = read_existing()
+        return int(existing_df["concurso"].max()) if not existing_df.empty else 0
+
+
 def read_existing() -> pd.DataFrame:
+    import pandas as pd
+
     if not CSV_PATH.exists():
         return pd.DataFrame(columns=CSV_COLUMNS)
 
@@ -89,6 +113,8 @@ def merge_results(existing_df: pd.DataFrame, new_results: list[dict]) -> pd.Data
     if not new_results:
         return existing_df.copy()
 
+    import pandas as pd
+
     new_df = pd.DataFrame(
         [
             {
@@ -111,7 +137,8 @@ def merge_results(existing_df: pd.DataFrame, new_results: list[dict]) -> pd.Data
 
 def save_results(df: pd.DataFrame) -> None:
     CSV_PATH.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(CSV_PATH, index=False)
+    with metrics.timer("io.csv_write"):
+        df.to_csv(CSV_PATH, index=False)
 
 
 def save_last(result: dict) -> None:
@@ -123,8 +150,7 @@ def save_last(result: dict) -> None:
 
 
 def main() -> None:
-    existing_df = read_existing()
-    last_saved = int(existing_df["concurso"].max()) if not existing_df.empty else 0
+    last_saved = last_saved_concurso()
     print(f"[INGEST] Ultimo concurso salvo: {last_saved}")
 
     session = _session()
@@ -148,11 +174,13 @@ def main() -> None:
         print("[INGEST] Nenhum concurso novo apos conciliacao.")
         return
 
-    merged = merge_results(existing_df, new_results)
+    merged = merge_results(read_existing(), new_results)
     save_results(merged)
     save_last(new_results[-1])
     print(f"[INGEST] Concursos inseridos/atualizados: {len(new_results)}")
 
 
 if __name__ == "__main__":
-    main()
+    from core.profiling import run_main
+
+    run_main(main)
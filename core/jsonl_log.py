@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import json
+import os
+import zlib
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO
+
+from core import metrics
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - plataformas sem fcntl (Windows)
+    fcntl = None
+
+REVERSE_BLOCK_SIZE = 64 * 1024
+TAIL_CRC_WINDOW = 4096
+FSYNC_ENV = "MEGA_JSONL_FSYNC"
+
+
+def encode_jsonl_line(obj: dict[str, Any]) -> bytes:
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def parse_jsonl_line(raw: bytes) -> dict[str, Any] | None:
+    raw = raw.strip()
+    if not raw:
+        return None
+    try:
+        parsed = json.loads(raw.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+def tail_crc32(f: BinaryIO, size: int) -> int:
+    """CRC dos ultimos bytes ate `size`; detecta reescritas de um log ja consumido."""
+    start = max(0, size - TAIL_CRC_WINDOW)
+    f.seek(start)
+    return zlib.crc32(f.read(size - start))
+
+
+def _fsync_default() -> bool:
+    return os.environ.get(FSYNC_ENV, "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _is_current_file(f: BinaryIO, path: Path) -> bool:
+    try:
+        current = os.stat(path)
+    except FileNotFoundError:
+        return False
+    opened = os.fstat(f.fileno())
+    return (opened.st_dev, opened.st_ino) == (current.st_dev, current.st_ino)
+
+
+@contextmanager
+def locked(f: BinaryIO, *, exclusive: bool = True) -> Iterator[BinaryIO]:
+    """Lock consultivo (flock) sobre um arquivo ja aberto; no-op sem fcntl."""
+    if fcntl is None:
+        yield f
+        return
+    fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+    try:
+        yield f
+    finally:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def file_lock(lock_path: Path) -> Iterator[None]:
+    """Serializa uma secao critica entre processos usando um arquivo .lock dedicado."""
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with lock_path.open("ab") as f, locked(f):
+        yield
+
+
+@metrics.timed("io.jsonl_append")
+def append_jsonl_many(path: Path, objs: Iterable[dict[str, Any]], *, fsync: bool | None = None) -> int:
+    """Grava varios eventos em um unico write sob lock exclusivo (group commit).
+
+    Se o arquivo terminar em uma linha incompleta (escritor interrompido), ela
+    e fechada com "\n" antes, para que as linhas novas continuem validas.
+    """
+    payload = b"".join(encode_jsonl_line(obj) for obj in objs)
+    if not payload:
+        return 0
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    while True:
+        with path.open("ab") as f, locked(f):
+            if not _is_current_file(f, path):
+                # O log foi substituido (rename atomico) enquanto esperavamos o lock.
+                continue
+            end = f.seek(0, 2)
+            if end > 0:
+                with path.open("rb") as reader:
+                    reader.seek(end - 1)
+                    if reader.read(1) != b"\n":
+                        payload = b"\n" + payload
+            f.write(payload)
+            f.flush()
+            if _fsync_default() if fsync is None else fsync:
+                os.fsync(f.fileno())
+            return len(payload)
+
+
+def append_jsonl(path: Path, obj: dict[str, Any], *, fsync: bool | None = None) -> None:
+    append_jsonl_many(path, [obj], fsync=fsync)
+
+
+def iter_jsonl(path: Path) -> Iterator[dict[str, Any]]:
+    """Leitura sequencial tolerante: ignora linhas invalidas e a linha final incompleta.
+
+    O tamanho visivel e fixado sob lock compartilhado; como os escritores so
+    acrescentam bytes, o restante da leitura dispensa o lock e usa memoria constante.
+    """
+    if not path.exists():
+        return
+
+    with path.open("rb") as f:
+        with locked(f, exclusive=False):
+            end = f.seek(0, 2)
+        f.seek(0)
+        position = 0
+        while position < end:
+            raw = f.readline()
+            if not raw.endswith(b"\n"):
+                break
+            position += len(raw)
+            event = parse_jsonl_line(raw)
+            if event is not None:
+                yield event
+
+
+def iter_jsonl_reverse(path: Path, *, block_size: int = REVERSE_BLOCK_SIZE) -> Iterator[dict[str, Any]]:
+    """Percorre o JSONL do fim para o inicio lendo blocos, sem carregar o arquivo inteiro."""
+    if not path.exists():
+        return
+
+    with path.open("rb") as f:
+        f.seek(0, 2)
+        position = f.tell()
+        pending = b""
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            pending = f.read(read_size) + pending
+            lines = pending.split(b"\n")
+            pending = lines[0]
+            for raw in reversed(lines[1:]):
+                event = parse_jsonl_line(raw)
+                if event is not None:
+                    yield event
+
+        event = parse_jsonl_line(pending)
+        if event is not None:
+            yield event
+
+
+@metrics.timed("io.jsonl_tail")
+def read_last_jsonl(
+    path: Path,
+    *,
+    predicate: Callable[[dict[str, Any]], bool] | None = None,
+) -> dict[str, Any] | None:
+    """Ultima linha JSON valida (e aceita pelo predicado), com custo independente do tamanho do log."""
+    for event in iter_jsonl_reverse(path):
+        if predicate is None or predicate(event):
+            return event
+    return None
+
+
+@metrics.timed("io.jsonl_tail")
+def read_jsonl_tail(
+    path: Path,
+    n: int,
+    *,
+    predicate: Callable[[dict[str, Any]], bool] | None = None,
+) -> list[dict[str, Any]]:
+    if n <= 0:
+        return []
+
+    tail: list[dict[str, Any]] = []
+    for event in iter_jsonl_reverse(path):
+        if predicate is not None and not predicate(event):
+            continue
+        tail.append(event)
+        if len(tail) >= n:
+            break
+    tail.reverse()
+    return tail
@@ -15,6 +15,7 @@ from core.config import (
     get_learning,
     load_config,
 )
+from core.event_store import LEARNING_STREAM, record_event
 from core.time_utils import utc_now_pair
 from core.versioning import _config_hash, register_strategy
 
@@ -26,12 +27,6 @@ def _load_optional_json(path: Path) -> dict[str, Any] | None:
         return json.load(f)
 
 
-def _append_jsonl(path: Path, obj: dict[str, Any]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(obj, ensure_ascii=False) + "\n")
-
-
 def _blend_value(current: float, target: float, ratio: float) -> float:
     return current + ((target - current) * ratio)
 
@@ -136,11 +131,11 @@ def write_learning_artifacts(
     next_config_path.parent.mkdir(parents=True, exist_ok=True)
     next_config_path.write_text(json.dumps(decision["next_config"], indent=2, ensure_ascii=False), encoding="utf-8")
 
-    _append_jsonl(log_path, decision)
+    record_event(LEARNING_STREAM, decision, path=log_path)
 
 
-def main() -> None:
-    current_config = load_config()
+def main(*, config: dict[str, Any] | None = None) -> None:
+    current_config = config or load_config()
     recommended_config = _load_optional_json(RECOMMENDED_CONFIG_PATH)
     promotion_decision = _load_optional_json(PROMOTION_DECISION_PATH)
     monitor_report = _load_optional_json(MONITOR_REPORT_PATH)
@@ -165,4 +160,6 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    from core.profiling import run_main
+
+    run_main(main)
@@ -0,0 +1,231 @@
+"""Timers e contadores leves gravados em `data/metrics_log.jsonl`.
+
+Desligado por padrao: `timer()` devolve um contexto nulo compartilhado, o
+wrapper de `timed` so testa uma flag e `count()` retorna na hora, sem ler o
+relogio nem alocar nada. Liga com `MEGA_ENGINE_METRICS=1` (ou `enable()`,
+usado pelo `--metrics` do pipeline); as medicoes ficam em memoria e, ao fim
+do processo, cada nome vira uma linha com chamadas, total e p50/p95 da
+execucao.
+
+    with metrics.timer("generator.score"):
+        ...
+
+    @metrics.timed("features.build")
+    def build_features(...): ...
+
+    python -m core.metrics summarize
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import json
+import math
+import os
+import sys
+import time
+import uuid
+from collections import defaultdict
+from collections.abc import Callable, Iterable
+from contextlib import nullcontext
+from functools import wraps
+from pathlib import Path
+from typing import Any, TypeVar
+
+from core.config import METRICS_LOG_PATH
+
+METRICS_ENV = "MEGA_ENGINE_METRICS"
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_NULL = nullcontext()
+_enabled = False
+_log_path = METRICS_LOG_PATH
+_run_id = ""
+_timers: defaultdict[str, list[float]] = defaultdict(list)
+_counters: defaultdict[str, int] = defaultdict(int)
+_atexit_registered = False
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(log_path: Path | None = None) -> None:
+    """Liga a coleta neste processo e grava as medicoes na saida (ou em `flush()`)."""
+    global _enabled, _log_path, _run_id, _atexit_registered
+    _enabled = True
+    _log_path = log_path or METRICS_LOG_PATH
+    _run_id = _run_id or uuid.uuid4().hex[:12]
+    if not _atexit_registered:
+        atexit.register(flush)
+        _atexit_registered = True
+
+
+def disable() -> None:
+    """Desliga a coleta e descarta o que ainda nao foi gravado."""
+    global _enabled, _run_id
+    _enabled = False
+    _run_id = ""
+    _timers.clear()
+    _counters.clear()
+
+
+class _Timer:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.started = 0.0
+
+    def __enter__(self) -> _Timer:
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        _timers[self.name].append(time.perf_counter() - self.started)
+
+
+def timer(name: str) -> Any:
+    """Context manager que mede o bloco com o nome `name`."""
+    return _Timer(name) if _enabled else _NULL
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Decorator equivalente a envolver cada chamada em `timer(name)`."""
+
+    def decorator(fn: F) -> F:
+        @wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Timer(name):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def count(name: str, value: int = 1) -> None:
+    if _enabled:
+        _counters[name] += value
+
+
+def percentile(values: Iterable[float], q: float) -> float:
+    """Percentil com interpolacao linear (mesma regra padrao do NumPy)."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * q / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def snapshot() -> list[dict[str, Any]]:
+    """Uma linha por timer/contador com o acumulado desta execucao."""
+    recorded_at = time.time()
+    entrypoint = Path(sys.argv[0]).name if sys.argv and sys.argv[0] else ""
+    base = {"run_id": _run_id, "recorded_at": round(recorded_at, 3), "entrypoint": entrypoint}
+    records = []
+    for name, samples in sorted(_timers.items()):
+        records.append(
+            {
+                **base,
+                "kind": "timer",
+                "name": name,
+                "calls": len(samples),
+                "total_seconds": round(sum(samples), 6),
+                "p50_seconds": round(percentile(samples, 50), 6),
+                "p95_seconds": round(percentile(samples, 95), 6),
+                "max_seconds": round(max(samples), 6),
+            }
+        )
+    for name, value in sorted(_counters.items()):
+        records.append({**base, "kind": "counter", "name": name, "value": value})
+    return records
+
+
+def flush() -> int:
+    """Acrescenta as medicoes pendentes ao log e zera os acumuladores."""
+    global _enabled
+    if not _enabled or not (_timers or _counters):
+        return 0
+    from core.jsonl_log import append_jsonl_many
+
+    records = snapshot()
+    _timers.clear()
+    _counters.clear()
+    # a propria escrita do log e instrumentada; nao deve entrar na proxima leva
+    _enabled = False
+    try:
+        append_jsonl_many(_log_path, records)
+    finally:
+        _enabled = True
+    return len(records)
+
+
+def summarize(records: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+    """p50/p95 entre execucoes do tempo total por etapa (e do valor de cada contador)."""
+    per_name: dict[tuple[str, str], dict[str, list[float]]] = {}
+    for record in records:
+        kind, name = record.get("kind"), record.get("name")
+        if kind not in ("timer", "counter") or not name:
+            continue
+        bucket = per_name.setdefault((kind, name), {"values": [], "calls": [], "runs": []})
+        bucket["values"].append(float(record["total_seconds"] if kind == "timer" else record["value"]))
+        bucket["calls"].append(float(record.get("calls", 0)))
+        bucket["runs"].append(record.get("run_id"))
+
+    rows = []
+    for (kind, name), bucket in sorted(per_name.items(), key=lambda item: (item[0][0] != "timer", item[0][1])):
+        values = bucket["values"]
+        row: dict[str, Any] = {
+            "kind": kind,
+            "name": name,
+            "runs": len(set(bucket["runs"])),
+            "p50": round(percentile(values, 50), 6),
+            "p95": round(percentile(values, 95), 6),
+        }
+        if kind == "timer":
+            row["calls_p50"] = percentile(bucket["calls"], 50)
+        rows.append(row)
+    return rows
+
+
+def main(argv: list[str] | None = None) -> None:
+    from core.jsonl_log import iter_jsonl
+
+    parser = argparse.ArgumentParser(description="Metricas de tempo e contadores do mega-engine.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    summary = sub.add_parser("summarize", help="p50/p95 por etapa entre execucoes.")
+    summary.add_argument("--path", type=Path, default=METRICS_LOG_PATH)
+    summary.add_argument("--prefix", default="", help="So nomes que comecam com este prefixo (ex.: pipeline.).")
+    summary.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    records = iter_jsonl(args.path) if args.path.exists() else []
+    rows = [row for row in summarize(records) if row["name"].startswith(args.prefix)]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    if not rows:
+        print(f"[METRICS] Nenhuma medicao em {args.path}")
+        return
+    width = max(len(row["name"]) for row in rows)
+    print(f"{'nome':<{width}}  {'runs':>5}  {'p50':>10}  {'p95':>10}")
+    for row in rows:
+        unit = "s" if row["kind"] == "timer" else ""
+        print(f"{row['name']:<{width}}  {row['runs']:>5}  {row['p50']:>9.4f}{unit:1}  {row['p95']:>9.4f}{unit:1}")
+
+
+if os.environ.get(METRICS_ENV, "").strip().lower() in ("1", "true", "yes"):
+    enable()
+
+
+if __name__ == "__main__":
+    from core.profiling import run_main
+
+    run_main(main)
@@ -9,46 +9,17 @@ from core.config import (
     get_monitoring,
     load_config,
 )
+from core.event_store import PERFORMANCE_STREAM, open_event_store
+from core.jsonl_log import iter_jsonl
+from core.performance_index import PerformanceLogIndex, is_canonical_event
 
 
 def load_events() -> list[dict]:
-    if not PERFORMANCE_LOG_PATH.exists():
-        return []
-
-    events = []
-    with PERFORMANCE_LOG_PATH.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                event = json.loads(line)
-            except json.JSONDecodeError:
-                continue
-            if is_canonical_event(event):
-                events.append(event)
-
+    events = [event for event in iter_jsonl(PERFORMANCE_LOG_PATH) if is_canonical_event(event)]
     events.sort(key=lambda event: int(event.get("concurso", 0)))
     return events
 
 
-def is_canonical_event(event: dict) -> bool:
-    if int(event.get("n_games", 0)) <= 0:
-        return False
-
-    meta = event.get("meta", {})
-    if not isinstance(meta, dict):
-        meta = {}
-
-    if bool(meta.get("manual_patch")):
-        return False
-
-    if str(meta.get("snapshot_source", "")).strip() == "manual_patch_noncanonical":
-        return False
-
-    return True
-
-
 def summarize_window(events: list[dict]) -> dict:
     draws = len(events)
     if draws == 0:
@@ -115,9 +86,9 @@ def evaluate_recalibration(recent: dict, baseline: dict, monitoring: dict) -> di
     }
 
 
-def build_monitor_report(config: dict, events: list[dict]) -> dict:
+def build_monitor_report(config: dict, events: list[dict], *, total_events: int | None = None) -> dict:
     monitoring = get_monitoring(config)
-    total_events = len(events)
+    total_events = len(events) if total_events is None else int(total_events)
     min_draws_required = int(monitoring["min_draws_required"])
     recent_window = int(monitoring["recent_window"])
     baseline_window = int(monitoring["baseline_window"])
@@ -164,10 +135,21 @@ def build_monitor_report(config: dict, events: list[dict]) -> dict:
     }
 
 
-def main() -> None:
-    config = load_config()
-    events = load_events()
-    report = build_monitor_report(config, events)
+def main(*, config: dict | None = None) -> None:
+    config = config or load_config()
+    monitoring = get_monitoring(config)
+    window = int(monitoring["recent_window"]) + int(monitoring["baseline_window"])
+    store = open_event_store(PERFORMANCE_STREAM, PERFORMANCE_LOG_PATH)
+    if store is not None:
+        with store:
+            stored = store.tail(PERFORMANCE_STREAM, window, canonical_only=True, by_concurso=True)
+            events = [event.payload for event in stored]
+            total_events = store.count(PERFORMANCE_STREAM, canonical_only=True)
+    else:
+        perf_index = PerformanceLogIndex(PERFORMANCE_LOG_PATH)
+        events = perf_index.tail(window, canonical_only=True)
+        total_events = perf_index.canonical_entries
+    report = build_monitor_report(config, events, total_events=total_events)
 
     MONITOR_REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
     with MONITOR_REPORT_PATH.open("w", encoding="utf-8") as f:
@@ -191,4 +173,6 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    from core.profiling import run_main
+
+    run_main(main)
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import json
 from itertools import product
+from typing import TYPE_CHECKING, Any
 
 import pandas as pd
 
@@ -14,16 +15,17 @@ from core.config import (
     DEFAULT_TICKET_SIZE,
     OPTIMIZATION_REPORT_PATH as OUT_PATH,
     RECOMMENDED_CONFIG_PATH,
-    RESULTS_PATH,
     get_structural_rules,
     get_promotion_guard,
     get_optimization_grid,
     get_parameters,
-    load_config,
 )
 from core.promotion import evaluate_promotion_guard, write_promotion_artifacts
 from core.versioning import _config_hash
 
+if TYPE_CHECKING:
+    from core.engine import Engine
+
 
 def build_grid(config: dict) -> list[dict]:
     grid = get_optimization_grid(config)
@@ -53,7 +55,13 @@ def rank_key(candidate: dict) -> tuple[float, float, float, float]:
     )
 
 
-def run_optimization(results_df: pd.DataFrame, config: dict) -> dict:
+def run_optimization(results_df: pd.DataFrame, config: dict, *, engine: Engine | None = None) -> dict:
+    """Backtest de cada combinacao da grade sobre o recorte `optimization_history_limit`.
+
+    Com `engine` (e `results_df = engine.results_df`), os caches vem de
+    `Engine.backtest_caches` e ficam para as etapas seguintes; sem ele, sao
+    montados aqui para todas as janelas da grade.
+    """
     params = get_parameters(config)
     ticket_size = int(params.get("ticket_size", DEFAULT_TICKET_SIZE))
     min_history = int(params.get("min_history", DEFAULT_MIN_HISTORY))
@@ -69,23 +77,29 @@ def run_optimization(results_df: pd.DataFrame, config: dict) -> dict:
     current_max_intersection = int(params.get("max_intersection", 3))
 
     combinations = build_grid(config)
-    probability_cache = build_probability_cache(
-        results_df,
-        windows=[int(item["window"]) for item in combinations] + [current_window],
-        min_history=min_history,
-        config=config,
-    )
-    structural_rules = get_structural_rules(config)
-    weak_pair_cache = build_weak_pair_cache(
-        results_df,
-        min_history=min_history,
-        bottom_pairs=int(structural_rules["bottom_pairs"]),
-    )
+    if engine is None:
+        probability_block = build_probability_cache(
+            results_df,
+            windows=[int(item["window"]) for item in combinations] + [current_window],
+            min_history=min_history,
+            config=config,
+        )
+        shared_weak_pair_cache = build_weak_pair_cache(
+            results_df,
+            min_history=min_history,
+            bottom_pairs=int(get_structural_rules(config)["bottom_pairs"]),
+        )
+
+    def caches(window: int) -> tuple[Any, Any]:
+        if engine is not None:
+            return engine.backtest_caches(results_df, window=window, min_history=max(min_history, window), config=config)
+        return probability_block.get(window), shared_weak_pair_cache
 
     candidates = []
     current_summary = None
     for combination in combinations:
         window = int(combination["window"])
+        probability_cache, weak_pair_cache = caches(window)
         summary_report = run_backtest(
             results_df,
             window=window,
@@ -95,7 +109,7 @@ def run_optimization(results_df: pd.DataFrame, config: dict) -> dict:
             n_sim=backtest_n_sim,
             max_intersection=int(combination["max_intersection"]),
             config=config,
-            probability_cache=probability_cache.get(window),
+            probability_cache=probability_cache,
             include_per_draw=False,
             weak_pair_cache=weak_pair_cache,
         )
@@ -130,6 +144,7 @@ def run_optimization(results_df: pd.DataFrame, config: dict) -> dict:
         "parameters": recommended_parameters,
     }
     if current_summary is None:
+        probability_cache, weak_pair_cache = caches(current_window)
         current_report = run_backtest(
             results_df,
             window=current_window,
@@ -139,7 +154,7 @@ def run_optimization(results_df: pd.DataFrame, config: dict) -> dict:
             n_sim=backtest_n_sim,
             max_intersection=current_max_intersection,
             config=config,
-            probability_cache=probability_cache.get(current_window),
+            probability_cache=probability_cache,
             include_per_draw=False,
             weak_pair_cache=weak_pair_cache,
         )
@@ -186,10 +201,12 @@ def run_optimization(results_df: pd.DataFrame, config: dict) -> dict:
     }
 
 
-def main() -> None:
-    config = load_config()
-    results_df = pd.read_csv(RESULTS_PATH)
-    report = run_optimization(results_df, config)
+def main(*, engine: Engine | None = None) -> None:
+    from core.engine import Engine
+
+    engine = engine or Engine()
+    config = engine.config
+    report = run_optimization(engine.results_df, config, engine=engine)
 
     OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
     with OUT_PATH.open("w", encoding="utf-8") as f:
@@ -219,4 +236,6 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    from core.profiling import run_main
+
+    run_main(main)
@@ -0,0 +1,327 @@
+"""Baselines de desempenho versionadas e comparacao com intervalo de confianca.
+
+Uma baseline junta as amostras de tempo (e o pico de memoria) de um
+relatorio de `python -m benchmarks` e/ou os totais por execucao de
+`data/metrics_log.jsonl`, e fica em
+`out/perf/<fingerprint da maquina>/<versao do codigo>.json`, ou seja, so se compara
+codigo diferente na mesma maquina.
+
+A comparacao usa o intervalo de confianca de Welch para a diferenca das
+medias (atual - baseline): uma metrica fica `slower` quando o limite inferior
+do intervalo passa de `threshold` da media da baseline, `faster` quando o
+limite superior fica abaixo de `-threshold`, e `inconclusive` quando algum lado
+tem menos de duas amostras. Para memoria, `memory_growth` significa que o menor
+pico atual supera o maior pico da baseline por mais de `memory_threshold`.
+O veredito vai para `out/perf_regression_report.json`.
+
+    python -m benchmarks --repeats 5 --out out/bench.json
+    python -m core.perf save --bench out/bench.json
+    ... (mudanca de codigo) ...
+    python -m benchmarks --repeats 5 --out out/bench.json
+    python -m core.perf compare --bench out/bench.json --fail-on-regression
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import platform
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from core.config import METRICS_LOG_PATH, PERF_BASELINE_DIR, PERF_REPORT_PATH
+
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_THRESHOLD = 0.05
+DEFAULT_MEMORY_THRESHOLD = 0.10
+DEFAULT_METRICS_RUNS = 20
+
+# t de Student bicaudal a 95% (quantil 0.975) por graus de liberdade; acima de 30 usa a normal.
+T_975 = (
+    12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042,
+)  # fmt: skip
+Z_975 = 1.96
+
+
+def _cpu_model() -> str:
+    try:
+        for line in Path("/proc/cpuinfo").read_text(encoding="utf-8").splitlines():
+            if line.startswith("model name"):
+                return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor()
+
+
+def machine_info() -> dict[str, Any]:
+    import numpy as np
+
+    return {
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "cpu_model": _cpu_model(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+    }
+
+
+def machine_fingerprint(info: dict[str, Any] | None = None) -> str:
+    """Hash curto de arquitetura, CPU e versoes de Python/NumPy."""
+    info = info or machine_info()
+    return hashlib.sha256(json.dumps(info, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def samples_from_benchmarks(report: dict[str, Any]) -> dict[str, dict[str, list[float]]]:
+    samples: dict[str, dict[str, list[float]]] = {}
+    for row in report.get("results", []):
+        entry: dict[str, list[float]] = {"seconds": [float(value) for value in row["seconds"]]}
+        if row.get("peak_bytes") is not None:
+            entry["peak_bytes"] = [float(row["peak_bytes"])]
+        samples[f"bench:{row['benchmark']}@{row['size']}"] = entry
+    return samples
+
+
+def samples_from_metrics(records: Iterable[dict[str, Any]], *, last_runs: int = DEFAULT_METRICS_RUNS) -> dict[str, dict[str, list[float]]]:
+    """Totais por execucao de cada timer, so das `last_runs` execucoes mais recentes."""
+    timers = [record for record in records if record.get("kind") == "timer" and record.get("name")]
+    runs: list[str] = []
+    for record in timers:
+        if record.get("run_id") not in runs:
+            runs.append(record.get("run_id"))
+    keep = set(runs[-last_runs:]) if last_runs > 0 else set()
+    samples: dict[str, dict[str, list[float]]] = {}
+    for record in timers:
+        if record.get("run_id") in keep:
+            entry = samples.setdefault(f"metrics:{record['name']}", {"seconds": []})
+            entry["seconds"].append(float(record["total_seconds"]))
+    return samples
+
+
+def build_baseline(samples: dict[str, dict[str, list[float]]], *, code_version: str | None = None) -> dict[str, Any]:
+    if code_version is None:
+        from core.pipeline import code_version as current_code_version
+
+        code_version = current_code_version()
+    info = machine_info()
+    return {
+        "code_version": code_version,
+        "fingerprint": machine_fingerprint(info),
+        "machine": info,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "samples": samples,
+    }
+
+
+def baseline_path(baseline: dict[str, Any], out_dir: Path = PERF_BASELINE_DIR) -> Path:
+    return out_dir / baseline["fingerprint"] / f"{baseline['code_version'][:16]}.json"
+
+
+def save_baseline(baseline: dict[str, Any], out_dir: Path = PERF_BASELINE_DIR) -> Path:
+    """Grava (ou substitui) a baseline da versao de codigo nesta maquina."""
+    path = baseline_path(baseline, out_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".json.tmp")
+    tmp_path.write_text(json.dumps(baseline, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp_path, path)
+    return path
+
+
+def latest_baseline(
+    fingerprint: str,
+    *,
+    exclude_code_version: str | None = None,
+    out_dir: Path = PERF_BASELINE_DIR,
+) -> dict[str, Any] | None:
+    """Baseline mais recente desta maquina, de preferencia de outra versao de codigo."""
+    candidates = []
+    for path in (out_dir / fingerprint).glob("*.json"):
+        try:
+            candidates.append(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, json.JSONDecodeError):
+            continue
+    others = [item for item in candidates if item.get("code_version") != exclude_code_version]
+    pool = others or candidates
+    return max(pool, key=lambda item: item.get("created_at", "")) if pool else None
+
+
+def _t_critical(df: float) -> float:
+    if not math.isfinite(df) or df >= len(T_975):
+        return Z_975
+    return T_975[max(int(math.floor(df)), 1) - 1]
+
+
+def _mean_var(values: list[float]) -> tuple[float, float]:
+    mean = sum(values) / len(values)
+    var = sum((value - mean) ** 2 for value in values) / (len(values) - 1) if len(values) > 1 else 0.0
+    return mean, var
+
+
+def welch_interval(baseline: list[float], current: list[float]) -> tuple[float, float] | None:
+    """IC de 95% para media(current) - media(baseline); None com menos de 2 amostras em um dos lados."""
+    if len(baseline) < 2 or len(current) < 2:
+        return None
+    base_mean, base_var = _mean_var(baseline)
+    cur_mean, cur_var = _mean_var(current)
+    base_se2, cur_se2 = base_var / len(baseline), cur_var / len(current)
+    se = math.sqrt(base_se2 + cur_se2)
+    diff = cur_mean - base_mean
+    if se == 0:
+        return diff, diff
+    df = (base_se2 + cur_se2) ** 2 / (
+        (base_se2**2 / (len(baseline) - 1) if base_se2 else 0.0) + (cur_se2**2 / (len(current) - 1) if cur_se2 else 0.0)
+    )
+    half = _t_critical(df) * se
+    return diff - half, diff + half
+
+
+def compare_samples(
+    baseline: dict[str, dict[str, list[float]]],
+    current: dict[str, dict[str, list[float]]],
+    *,
+    threshold: float = DEFAULT_THRESHOLD,
+    memory_threshold: float = DEFAULT_MEMORY_THRESHOLD,
+) -> list[dict[str, Any]]:
+    rows = []
+    for key in sorted(set(baseline) & set(current)):
+        base_seconds, cur_seconds = baseline[key].get("seconds", []), current[key].get("seconds", [])
+        if base_seconds and cur_seconds:
+            base_mean, cur_mean = _mean_var(base_seconds)[0], _mean_var(cur_seconds)[0]
+            interval = welch_interval(base_seconds, cur_seconds)
+            margin = threshold * base_mean
+            if interval is None:
+                status = "inconclusive"
+            elif interval[0] > margin:
+                status = "slower"
+            elif interval[1] < -margin:
+                status = "faster"
+            else:
+                status = "unchanged"
+            rows.append(
+                {
+                    "key": key,
+                    "metric": "seconds",
+                    "baseline_mean": round(base_mean, 6),
+                    "current_mean": round(cur_mean, 6),
+                    "ratio": round(cur_mean / base_mean, 4) if base_mean > 0 else None,
+                    "diff_ci": [round(value, 6) for value in interval] if interval is not None else None,
+                    "status": status,
+                }
+            )
+        base_peak, cur_peak = baseline[key].get("peak_bytes", []), current[key].get("peak_bytes", [])
+        if base_peak and cur_peak:
+            grew = min(cur_peak) > max(base_peak) * (1 + memory_threshold)
+            shrank = max(cur_peak) < min(base_peak) * (1 - memory_threshold)
+            rows.append(
+                {
+                    "key": key,
+                    "metric": "peak_bytes",
+                    "baseline_mean": round(_mean_var(base_peak)[0], 1),
+                    "current_mean": round(_mean_var(cur_peak)[0], 1),
+                    "ratio": round(min(cur_peak) / max(base_peak), 4) if max(base_peak) > 0 else None,
+                    "diff_ci": None,
+                    "status": "memory_growth" if grew else "memory_drop" if shrank else "unchanged",
+                }
+            )
+    return rows
+
+
+def compare_baselines(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    *,
+    threshold: float = DEFAULT_THRESHOLD,
+    memory_threshold: float = DEFAULT_MEMORY_THRESHOLD,
+) -> dict[str, Any]:
+    """Relatorio com uma linha por metrica comum e o veredito geral."""
+    rows = compare_samples(
+        baseline["samples"], current["samples"], threshold=threshold, memory_threshold=memory_threshold
+    )
+    regressions = [row["key"] for row in rows if row["status"] in ("slower", "memory_growth")]
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "baseline": {key: baseline.get(key) for key in ("code_version", "fingerprint", "created_at")},
+        "current": {key: current.get(key) for key in ("code_version", "fingerprint", "created_at")},
+        "same_machine": baseline.get("fingerprint") == current.get("fingerprint"),
+        "confidence": DEFAULT_CONFIDENCE,
+        "threshold": threshold,
+        "memory_threshold": memory_threshold,
+        "rows": rows,
+        "regressions": sorted(set(regressions)),
+        "verdict": "regression" if regressions else "ok",
+    }
+
+
+def _current_samples(args: argparse.Namespace) -> dict[str, dict[str, list[float]]]:
+    from core.jsonl_log import iter_jsonl
+
+    samples: dict[str, dict[str, list[float]]] = {}
+    if args.bench is not None:
+        samples.update(samples_from_benchmarks(json.loads(args.bench.read_text(encoding="utf-8"))))
+    if args.metrics is not None and args.metrics.exists():
+        samples.update(samples_from_metrics(iter_jsonl(args.metrics), last_runs=args.metrics_runs))
+    if not samples:
+        raise SystemExit("[PERF] Nenhuma amostra: informe --bench e/ou --metrics.")
+    return samples
+
+
+def main(argv: list[str] | None = None) -> dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Baselines de desempenho e comparacao entre versoes do codigo.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (
+        ("save", "Grava as amostras atuais como baseline desta versao do codigo nesta maquina."),
+        ("compare", "Compara as amostras atuais com uma baseline e grava o veredito."),
+    ):
+        command = sub.add_parser(name, help=help_text)
+        command.add_argument("--bench", type=Path, help="JSON de `python -m benchmarks --out`.")
+        command.add_argument("--metrics", type=Path, nargs="?", const=METRICS_LOG_PATH, help="Inclui os timers do metrics log.")
+        command.add_argument("--metrics-runs", type=int, default=DEFAULT_METRICS_RUNS)
+        command.add_argument("--out-dir", type=Path, default=PERF_BASELINE_DIR)
+    compare = sub.choices["compare"]
+    compare.add_argument("--baseline", type=Path, help="Baseline especifica (padrao: a mais recente desta maquina).")
+    compare.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    compare.add_argument("--memory-threshold", type=float, default=DEFAULT_MEMORY_THRESHOLD)
+    compare.add_argument("--report", type=Path, default=PERF_REPORT_PATH)
+    compare.add_argument("--fail-on-regression", action="store_true", help="Sai com codigo 1 se houver regressao.")
+    args = parser.parse_args(argv)
+
+    current = build_baseline(_current_samples(args))
+    if args.command == "save":
+        path = save_baseline(current, args.out_dir)
+        print(f"[PERF] Baseline gravada em {path} ({len(current['samples'])} metricas)")
+        return current
+
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    else:
+        baseline = latest_baseline(
+            current["fingerprint"], exclude_code_version=current["code_version"], out_dir=args.out_dir
+        )
+    if baseline is None:
+        raise SystemExit(f"[PERF] Nenhuma baseline para a maquina {current['fingerprint']} em {args.out_dir}.")
+
+    report = compare_baselines(
+        baseline, current, threshold=args.threshold, memory_threshold=args.memory_threshold
+    )
+    args.report.parent.mkdir(parents=True, exist_ok=True)
+    args.report.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    for row in report["rows"]:
+        if row["status"] != "unchanged":
+            print(f"[PERF] {row['key']} {row['metric']}: {row['status']} (x{row['ratio']})")
+    print(f"[PERF] Veredito: {report['verdict']} ({len(report['rows'])} comparacoes) -> {args.report}")
+    if args.fail_on_regression and report["verdict"] == "regression":
+        raise SystemExit(1)
+    return report
+
+
+if __name__ == "__main__":
+    from core.profiling import run_main
+
+    run_main(main)
@@ -0,0 +1,281 @@
+"""Indice lateral do performance_log.jsonl (concurso -> offset e tamanho em bytes)."""
+
+from __future__ import annotations
+
+import os
+import struct
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, BinaryIO
+
+from core.config import PERFORMANCE_LOG_PATH
+from core.jsonl_log import append_jsonl, file_lock, parse_jsonl_line, tail_crc32
+
+INDEX_MAGIC = b"MEPLIDX1"
+# magic, bytes indexados do log, crc32 da cauda indexada, entradas, entradas canonicas
+HEADER = struct.Struct("<8sQIII")
+# concurso, offset da linha, tamanho da linha (com "\n")
+RECORD = struct.Struct("<iqi")
+
+
+def is_canonical_event(event: dict) -> bool:
+    if int(event.get("n_games", 0)) <= 0:
+        return False
+
+    meta = event.get("meta", {})
+    if not isinstance(meta, dict):
+        meta = {}
+
+    if bool(meta.get("manual_patch")):
+        return False
+
+    if str(meta.get("snapshot_source", "")).strip() == "manual_patch_noncanonical":
+        return False
+
+    return True
+
+
+def index_path_for(log_path: Path) -> Path:
+    return log_path.with_suffix(".idx")
+
+
+def _scan_records(
+    log: BinaryIO,
+    start: int,
+    canonical_predicate: Callable[[dict[str, Any]], bool] | None,
+) -> tuple[list[tuple[int, int, int]], int, int]:
+    log.seek(start)
+    offset = start
+    records: list[tuple[int, int, int]] = []
+    canonical = 0
+    while True:
+        raw = log.readline()
+        if not raw or not raw.endswith(b"\n"):
+            # Linha incompleta no fim do arquivo fica para o proximo refresh.
+            break
+        event = parse_jsonl_line(raw)
+        if event is not None:
+            try:
+                concurso = int(event.get("concurso"))
+            except (TypeError, ValueError):
+                concurso = None
+            if concurso is not None:
+                records.append((concurso, offset, len(raw)))
+                canonical += int(canonical_predicate is not None and canonical_predicate(event))
+        offset += len(raw)
+    return records, canonical, offset
+
+
+class ConcursoIndex:
+    """Mantem um indice binario ordenado por concurso ao lado de um JSONL.
+
+    O indice acompanha o arquivo de forma incremental: linhas novas sao indexadas
+    no proximo refresh e qualquer reescrita detectada reconstroi o indice.
+    Um concurso pode aparecer mais de uma vez; `get` devolve a linha mais recente.
+    """
+
+    canonical_predicate: Callable[[dict[str, Any]], bool] | None = None
+
+    def __init__(self, log_path: Path, index_path: Path | None = None) -> None:
+        self.log_path = log_path
+        self.index_path = index_path or index_path_for(log_path)
+        self.entries = 0
+        self.canonical_entries = 0
+        self.refresh()
+
+    def __len__(self) -> int:
+        return self.entries
+
+    def _read_header(self) -> tuple[int, int, int, int] | None:
+        try:
+            with self.index_path.open("rb") as f:
+                raw = f.read(HEADER.size)
+                f.seek(0, 2)
+                file_size = f.tell()
+        except OSError:
+            return None
+        if len(raw) != HEADER.size:
+            return None
+        magic, indexed_size, tail_crc, entries, canonical = HEADER.unpack(raw)
+        if magic != INDEX_MAGIC or file_size < HEADER.size + entries * RECORD.size:
+            return None
+        return indexed_size, tail_crc, entries, canonical
+
+    def _record_at(self, f: BinaryIO, position: int) -> tuple[int, int, int]:
+        f.seek(HEADER.size + position * RECORD.size)
+        return RECORD.unpack(f.read(RECORD.size))
+
+    def _lock_path(self) -> Path:
+        return self.index_path.with_name(self.index_path.name + ".lock")
+
+    def refresh(self) -> None:
+        if not self.log_path.exists():
+            self.entries = 0
+            self.canonical_entries = 0
+            return
+
+        with file_lock(self._lock_path()):
+            self._refresh()
+
+    def _refresh(self) -> None:
+        header = self._read_header()
+        with self.log_path.open("rb") as log:
+            log_size = os.fstat(log.fileno()).st_size
+            if header is None:
+                self._rebuild(log)
+                return
+
+            indexed_size, tail_crc, entries, canonical = header
+            if indexed_size > log_size or tail_crc32(log, indexed_size) != tail_crc:
+                self._rebuild(log)
+                return
+
+            self.entries = entries
+            self.canonical_entries = canonical
+            if indexed_size == log_size:
+                return
+
+            records, new_canonical, consumed = _scan_records(log, indexed_size, self.canonical_predicate)
+            if consumed == indexed_size:
+                return
+
+            last_concurso = self.latest_concurso()
+            ordered = all(records[i][0] <= records[i + 1][0] for i in range(len(records) - 1))
+            if not ordered or (records and last_concurso is not None and records[0][0] < last_concurso):
+                self._rebuild(log)
+                return
+
+            entries += len(records)
+            canonical += new_canonical
+            with self.index_path.open("r+b") as f:
+                f.truncate(HEADER.size + self.entries * RECORD.size)
+                f.seek(0, 2)
+                f.write(b"".join(RECORD.pack(*record) for record in records))
+                f.seek(0)
+                f.write(HEADER.pack(INDEX_MAGIC, consumed, tail_crc32(log, consumed), entries, canonical))
+            self.entries = entries
+            self.canonical_entries = canonical
+
+    def rebuild(self) -> None:
+        if not self.log_path.exists():
+            self.entries = 0
+            self.canonical_entries = 0
+            return
+        with file_lock(self._lock_path()), self.log_path.open("rb") as log:
+            self._rebuild(log)
+
+    def _rebuild(self, log: BinaryIO) -> None:
+        records, canonical, consumed = _scan_records(log, 0, self.canonical_predicate)
+        records.sort(key=lambda record: (record[0], record[1]))
+        payload = HEADER.pack(INDEX_MAGIC, consumed, tail_crc32(log, consumed), len(records), canonical)
+        payload += b"".join(RECORD.pack(*record) for record in records)
+
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        tmp_path.write_bytes(payload)
+        os.replace(tmp_path, self.index_path)
+        self.entries = len(records)
+        self.canonical_entries = canonical
+
+    def _bisect_left(self, f: BinaryIO, concurso: int) -> int:
+        lo, hi = 0, self.entries
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._record_at(f, mid)[0] < concurso:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _read_line(self, log: BinaryIO, offset: int, length: int) -> dict[str, Any] | None:
+        log.seek(offset)
+        return parse_jsonl_line(log.read(length))
+
+    def contains(self, concurso: int) -> bool:
+        if self.entries == 0:
+            return False
+        with self.index_path.open("rb") as f:
+            position = self._bisect_left(f, int(concurso))
+            return position < self.entries and self._record_at(f, position)[0] == int(concurso)
+
+    def get(self, concurso: int) -> dict[str, Any] | None:
+        if self.entries == 0:
+            return None
+        with self.index_path.open("rb") as f:
+            position = self._bisect_left(f, int(concurso) + 1) - 1
+            if position < 0:
+                return None
+            found, offset, length = self._record_at(f, position)
+        if found != int(concurso):
+            return None
+        with self.log_path.open("rb") as log:
+            return self._read_line(log, offset, length)
+
+    def range(self, start: int, end: int) -> dict[int, dict[str, Any]]:
+        """Linhas mais recentes de cada concurso em [start, end], com leitura sequencial no arquivo."""
+        if self.entries == 0 or end < start:
+            return {}
+        with self.index_path.open("rb") as f:
+            first = self._bisect_left(f, int(start))
+            last = self._bisect_left(f, int(end) + 1)
+            f.seek(HEADER.size + first * RECORD.size)
+            records = list(RECORD.iter_unpack(f.read((last - first) * RECORD.size)))
+
+        latest: dict[int, tuple[int, int]] = {}
+        for concurso, offset, length in records:
+            latest[concurso] = (offset, length)
+
+        found: dict[int, dict[str, Any]] = {}
+        with self.log_path.open("rb") as log:
+            for concurso, (offset, length) in sorted(latest.items(), key=lambda item: item[1][0]):
+                event = self._read_line(log, offset, length)
+                if event is not None:
+                    found[concurso] = event
+        return dict(sorted(found.items()))
+
+    def latest_concurso(self) -> int | None:
+        if self.entries == 0:
+            return None
+        with self.index_path.open("rb") as f:
+            return self._record_at(f, self.entries - 1)[0]
+
+    def concursos(self) -> list[int]:
+        if self.entries == 0:
+            return []
+        with self.index_path.open("rb") as f:
+            f.seek(HEADER.size)
+            raw = f.read(self.entries * RECORD.size)
+        return [record[0] for record in RECORD.iter_unpack(raw)]
+
+    def tail(self, n: int, *, canonical_only: bool = False) -> list[dict[str, Any]]:
+        """Ultimos n eventos em ordem crescente de concurso."""
+        if n <= 0 or self.entries == 0:
+            return []
+
+        events: list[dict[str, Any]] = []
+        with self.index_path.open("rb") as f, self.log_path.open("rb") as log:
+            for position in range(self.entries - 1, -1, -1):
+                _concurso, offset, length = self._record_at(f, position)
+                event = self._read_line(log, offset, length)
+                if event is None or (canonical_only and not self.is_canonical(event)):
+                    continue
+                events.append(event)
+                if len(events) >= n:
+                    break
+        events.reverse()
+        return events
+
+    def is_canonical(self, event: dict[str, Any]) -> bool:
+        """Aplica o `canonical_predicate` do indice (sem predicado, nenhum evento e canonico)."""
+        return self.canonical_predicate is not None and self.canonical_predicate(event)
+
+    def append(self, event: dict[str, Any]) -> None:
+        append_jsonl(self.log_path, event)
+        self.refresh()
+
+
+class PerformanceLogIndex(ConcursoIndex):
+    canonical_predicate = staticmethod(is_canonical_event)
+
+    def __init__(self, log_path: Path = PERFORMANCE_LOG_PATH, index_path: Path | None = None) -> None:
+        super().__init__(log_path, index_path)
@@ -0,0 +1,333 @@
+"""Executa uma lista nomeada de etapas em um unico processo.
+
+Cada workflow chamava varios `python -m core.<modulo>` seguidos, e cada um
+reimportava pandas/NumPy, relia a config e reparseava o mesmo CSV. Aqui as
+etapas recebem um `core.engine.Engine` que carrega config, resultados e
+features uma vez so (e os recarrega quando uma etapa reescreve o arquivo), e o
+runner informa o tempo de cada etapa.
+
+Cada etapa declara suas entradas (conteudo de arquivos, a parte da config que
+usa e a versao do codigo) e suas saidas. Depois de rodar, o hash de tudo vai
+para `out/.stamps/<etapa>.json`; na proxima execucao a etapa e pulada se as
+entradas e as saidas continuam iguais (`--force` ignora os stamps).
+
+    python -m core.pipeline daily
+    python -m core.pipeline recalibration_full
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from core import metrics
+from core.config import (
+    BACKTEST_REPORT_PATH,
+    FEATURES_PATH,
+    LAST_RESULT_PATH,
+    LEARNING_DECISION_PATH,
+    MONITOR_REPORT_PATH,
+    NEXT_STRATEGY_CONFIG_PATH,
+    OPTIMIZATION_REPORT_PATH,
+    OUT_GAMES_PATH,
+    OUT_HISTORY_ARCHIVE_PATH,
+    OUT_HISTORY_DIR,
+    PERFORMANCE_LOG_PATH,
+    PIPELINE_STAMPS_DIR,
+    PROMOTION_DECISION_PATH,
+    RECALIBRATION_SIGNAL_PATH,
+    RECOMMENDED_CONFIG_PATH,
+    REPO_ROOT,
+    RESULTS_PATH,
+    get_bayesian,
+    get_parameters,
+)
+
+if TYPE_CHECKING:
+    from core.engine import Engine
+
+
+def _stage_ingest(state: Engine) -> None:
+    from core import ingest_megasena
+
+    ingest_megasena.main()
+
+
+def _stage_features(state: Engine) -> None:
+    from core import features_megasena
+
+    # O gerador le o CSV gravado (o Engine percebe a nova mtime): o arredondamento do CSV
+    # faz parte do contrato e o DataFrame em memoria poderia mudar o ultimo bit das probabilidades.
+    features_megasena.main(config=state.config, results_df=state.results_df)
+
+
+def _stage_generate(state: Engine) -> None:
+    from core import generator
+
+    generator.main(engine=state)
+
+
+def _stage_compare(state: Engine) -> None:
+    from core import compare_results
+
+    compare_results.main()
+
+
+def _stage_backtest(state: Engine) -> None:
+    from core import backtest
+
+    backtest.main([], engine=state)
+
+
+def _stage_optimize(state: Engine) -> None:
+    from core import optimize
+
+    optimize.main(engine=state)
+
+
+def _stage_monitor(state: Engine) -> None:
+    from core import monitor_performance
+
+    monitor_performance.main(config=state.config)
+
+
+def _stage_learning(state: Engine) -> None:
+    from core import learning
+
+    learning.main(config=state.config)
+
+
+def file_digest(path: Path) -> str | None:
+    if not path.exists():
+        return None
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+@lru_cache(maxsize=1)
+def code_version() -> str:
+    """Hash dos fontes de `core/`: qualquer mudanca de codigo invalida os stamps."""
+    digest = hashlib.sha256()
+    for path in sorted((REPO_ROOT / "core").glob("*.py")):
+        digest.update(path.name.encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _latest_concurso() -> int | None:
+    # last_result.json muda a cada poll (fetched_at); so o concurso importa para as etapas.
+    if not LAST_RESULT_PATH.exists():
+        return None
+    return json.loads(LAST_RESULT_PATH.read_text(encoding="utf-8")).get("concurso")
+
+
+def _features_inputs(state: Engine) -> dict[str, Any]:
+    params = get_parameters(state.config)
+    return {"results": file_digest(RESULTS_PATH), "window": params.get("window"), "bayesian": get_bayesian(state.config)}
+
+
+def _generate_inputs(state: Engine) -> dict[str, Any]:
+    return {
+        "results": file_digest(RESULTS_PATH),
+        "features": file_digest(FEATURES_PATH),
+        "latest_concurso": _latest_concurso(),
+        "config": state.config,
+    }
+
+
+def history_snapshots_digest(after: int, history_dir: Path = OUT_HISTORY_DIR) -> str:
+    """Digest dos `jogos_concurso_<n>.json` com concurso acima de `after` (os que o compare ainda le)."""
+    from core.history_archive import SNAPSHOT_FILE_RE
+
+    digest = hashlib.sha256()
+    if history_dir.exists():
+        snapshots = []
+        for path in history_dir.iterdir():
+            match = SNAPSHOT_FILE_RE.match(path.name)
+            if match is not None and int(match.group(1)) > after:
+                snapshots.append((int(match.group(1)), path))
+        for _concurso, path in sorted(snapshots):
+            digest.update(path.name.encode("utf-8"))
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _compare_inputs(state: Engine) -> dict[str, Any]:
+    from core.performance_index import PerformanceLogIndex
+
+    # O compare prefere o arquivo de out/history ao arquivo compactado, entao os dois entram no stamp.
+    last_logged = PerformanceLogIndex(PERFORMANCE_LOG_PATH).latest_concurso() or 0
+    return {
+        "results": file_digest(RESULTS_PATH),
+        "latest_concurso": _latest_concurso(),
+        "games": file_digest(OUT_GAMES_PATH),
+        "archive": file_digest(OUT_HISTORY_ARCHIVE_PATH),
+        "history_snapshots": history_snapshots_digest(last_logged),
+        "performance_log": file_digest(PERFORMANCE_LOG_PATH),
+    }
+
+
+def _monitor_inputs(state: Engine) -> dict[str, Any]:
+    return {"performance_log": file_digest(PERFORMANCE_LOG_PATH), "config": state.config}
+
+
+def _backtest_inputs(state: Engine) -> dict[str, Any]:
+    return {"results": file_digest(RESULTS_PATH), "config": state.config}
+
+
+def _learning_inputs(state: Engine) -> dict[str, Any]:
+    return {
+        "config": state.config,
+        "recommended": file_digest(RECOMMENDED_CONFIG_PATH),
+        "promotion": file_digest(PROMOTION_DECISION_PATH),
+        "monitor": file_digest(MONITOR_REPORT_PATH),
+    }
+
+
+@dataclass(frozen=True)
+class Stage:
+    """Etapa do pipeline; sem `inputs` ela sempre roda (ex.: ingest, que depende da API)."""
+
+    run: Callable[[Engine], None]
+    inputs: Callable[[Engine], dict[str, Any]] | None = None
+    outputs: tuple[Path, ...] = ()
+
+
+STAGES: dict[str, Stage] = {
+    "ingest": Stage(_stage_ingest),
+    "features": Stage(_stage_features, _features_inputs, (FEATURES_PATH,)),
+    "generate": Stage(_stage_generate, _generate_inputs, (OUT_GAMES_PATH,)),
+    "compare": Stage(_stage_compare, _compare_inputs, (PERFORMANCE_LOG_PATH,)),
+    "backtest": Stage(_stage_backtest, _backtest_inputs, (BACKTEST_REPORT_PATH,)),
+    "optimize": Stage(
+        _stage_optimize,
+        _backtest_inputs,
+        (OPTIMIZATION_REPORT_PATH, RECOMMENDED_CONFIG_PATH, PROMOTION_DECISION_PATH),
+    ),
+    "monitor": Stage(_stage_monitor, _monitor_inputs, (MONITOR_REPORT_PATH, RECALIBRATION_SIGNAL_PATH)),
+    "learning": Stage(_stage_learning, _learning_inputs, (LEARNING_DECISION_PATH, NEXT_STRATEGY_CONFIG_PATH)),
+}
+
+
+def _rel(path: Path) -> str:
+    try:
+        return str(path.relative_to(REPO_ROOT))
+    except ValueError:
+        return str(path)
+
+
+def stage_stamp(stage: Stage, state: Engine) -> dict[str, Any]:
+    """Hash das entradas declaradas (mais a versao do codigo) e das saidas atuais."""
+    inputs = {**stage.inputs(state), "code": code_version()} if stage.inputs is not None else {}
+    return {
+        "inputs": {
+            name: hashlib.sha256(json.dumps(value, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+            for name, value in sorted(inputs.items())
+        },
+        "outputs": {_rel(path): file_digest(path) for path in stage.outputs},
+    }
+
+
+def _stamp_path(name: str, stamps_dir: Path) -> Path:
+    return stamps_dir / f"{name}.json"
+
+
+def is_fresh(name: str, stage: Stage, state: Engine, stamps_dir: Path = PIPELINE_STAMPS_DIR) -> bool:
+    if stage.inputs is None:
+        return False
+    try:
+        stored = json.loads(_stamp_path(name, stamps_dir).read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return False
+    current = stage_stamp(stage, state)
+    return stored == {"stage": name, **current} and all(digest is not None for digest in current["outputs"].values())
+
+
+def write_stamp(name: str, stage: Stage, state: Engine, stamps_dir: Path = PIPELINE_STAMPS_DIR) -> None:
+    # Calculado depois da etapa: entradas que ela mesma reescreve (ex.: performance_log) entram no estado final.
+    if stage.inputs is None:
+        return
+    stamps_dir.mkdir(parents=True, exist_ok=True)
+    path = _stamp_path(name, stamps_dir)
+    tmp_path = path.with_suffix(".json.tmp")
+    tmp_path.write_text(json.dumps({"stage": name, **stage_stamp(stage, state)}, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+# Mesma sequencia de comandos de cada workflow em .github/workflows.
+PROFILES: dict[str, tuple[str, ...]] = {
+    "daily": ("ingest", "features", "generate"),
+    "compare": ("ingest", "compare", "monitor"),
+    "backtest": ("backtest",),
+    "optimize": ("optimize",),
+    "recalibration": ("monitor", "learning"),
+    "recalibration_full": ("backtest", "optimize", "monitor", "learning"),
+}
+
+
+def run_pipeline(
+    stages: list[str] | tuple[str, ...],
+    state: Engine | None = None,
+    *,
+    force: bool = False,
+    stamps_dir: Path = PIPELINE_STAMPS_DIR,
+) -> list[dict[str, Any]]:
+    """Executa as etapas em ordem e devolve `[{"stage", "seconds", "skipped"}]`."""
+    unknown = [name for name in stages if name not in STAGES]
+    if unknown:
+        raise ValueError(f"Etapas desconhecidas: {unknown}")
+
+    if state is None:
+        from core.engine import Engine
+
+        state = Engine()
+    timings = []
+    for name in stages:
+        stage = STAGES[name]
+        started = time.perf_counter()
+        skipped = not force and is_fresh(name, stage, state, stamps_dir)
+        if not skipped:
+            with metrics.timer(f"pipeline.{name}"):
+                stage.run(state)
+            write_stamp(name, stage, state, stamps_dir)
+        metrics.count(f"pipeline.{name}.skipped", int(skipped))
+        seconds = round(time.perf_counter() - started, 4)
+        timings.append({"stage": name, "seconds": seconds, "skipped": skipped})
+        if skipped:
+            print(f"[PIPELINE] {name}: entradas inalteradas, etapa pulada.")
+        else:
+            print(f"[PIPELINE] {name}: {seconds:.3f}s")
+    return timings
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Executa um perfil de etapas do mega-engine em um unico processo.")
+    parser.add_argument("profile", choices=sorted(PROFILES))
+    parser.add_argument("--json", action="store_true", help="Imprime os tempos por etapa em JSON ao final.")
+    parser.add_argument("--force", action="store_true", help="Roda todas as etapas mesmo com stamps validos.")
+    parser.add_argument("--metrics", action="store_true", help="Grava timers e contadores em data/metrics_log.jsonl.")
+    args = parser.parse_args(argv)
+
+    if args.metrics:
+        metrics.enable()
+
+    started = time.perf_counter()
+    timings = run_pipeline(PROFILES[args.profile], force=args.force)
+    total = round(time.perf_counter() - started, 4)
+    if args.json:
+        print(json.dumps({"profile": args.profile, "stages": timings, "total_seconds": total}))
+    else:
+        print(f"[PIPELINE] {args.profile} OK: total={total:.3f}s")
+
+
+if __name__ == "__main__":
+    from core.profiling import run_main
+
+    run_main(main)
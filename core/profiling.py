@@ -0,0 +1,153 @@
+"""Perfil de CPU (cProfile) e memoria (tracemalloc) para qualquer `python -m core.<modulo>`.
+
+Todo `__main__` de `core` chama `run_main(main)`. Sem pedido de perfil ele so
+chama `main()`. Com `--profile` (removido de `sys.argv` antes do argparse do
+modulo) ou `MEGA_ENGINE_PROFILE=1`, a execucao roda sob cProfile e
+tracemalloc e grava em `out/profiles/`:
+
+    <modulo>_<timestamp>.prof   pstats (snakeviz, `python -m pstats`)
+    <modulo>_<timestamp>.json   pico de memoria, maiores alocacoes e hotspots
+
+e imprime um resumo curto no stderr. `MEGA_ENGINE_PROFILE=cpu` ou `=memory`
+liga so um dos dois (tracemalloc deixa o codigo varias vezes mais lento e
+distorce os tempos do cProfile).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from core.config import PROFILES_DIR, REPO_ROOT
+
+PROFILE_ENV = "MEGA_ENGINE_PROFILE"
+PROFILE_FLAG = "--profile"
+TOP_N = 10
+
+
+def requested_modes(argv: list[str] | None = None, environ: dict[str, str] | None = None) -> set[str]:
+    """{"cpu", "memory"} pedidos por `--profile` ou pela variavel de ambiente."""
+    argv = sys.argv if argv is None else argv
+    value = (os.environ if environ is None else environ).get(PROFILE_ENV, "").strip().lower()
+    if PROFILE_FLAG in argv[1:] or value in ("1", "true", "yes", "all"):
+        return {"cpu", "memory"}
+    return {mode for mode in ("cpu", "memory") if mode == value}
+
+
+def _module_name(fn: Callable[..., Any]) -> str:
+    spec = getattr(sys.modules.get(fn.__module__), "__spec__", None)
+    return spec.name if spec is not None else fn.__module__
+
+
+def _relative(path: str | Path) -> str:
+    try:
+        return str(Path(path).resolve().relative_to(REPO_ROOT))
+    except ValueError:
+        return str(path)
+
+
+def _site(filename: str, lineno: int) -> str:
+    return f"{_relative(filename)}:{lineno}"
+
+
+def hotspots(stats: Any, limit: int = TOP_N) -> list[dict[str, Any]]:
+    """Funcoes com mais tempo proprio (tottime) em um `pstats.Stats`."""
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+    return [
+        {
+            # builtins aparecem como ("~", 0, "<built-in method ...>")
+            "function": name if filename == "~" else f"{_site(filename, lineno)}({name})",
+            "calls": calls,
+            "self_seconds": round(tottime, 6),
+            "cumulative_seconds": round(cumtime, 6),
+        }
+        for (filename, lineno, name), (_primitive, calls, tottime, cumtime, _callers) in rows
+    ]
+
+
+def top_allocations(snapshot: Any, limit: int = TOP_N) -> list[dict[str, Any]]:
+    return [
+        {"site": _site(stat.traceback[0].filename, stat.traceback[0].lineno), "size_bytes": stat.size, "count": stat.count}
+        for stat in snapshot.statistics("lineno")[:limit]
+    ]
+
+
+def profile_call(
+    fn: Callable[[], Any],
+    *,
+    module: str,
+    modes: set[str],
+    out_dir: Path = PROFILES_DIR,
+) -> dict[str, Any]:
+    """Executa `fn` sob os perfis pedidos e grava os artefatos; devolve o relatorio JSON."""
+    import cProfile
+    import pstats
+    import tracemalloc
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    prof_path = out_dir / f"{module}_{stamp}.prof"
+    report_path = out_dir / f"{module}_{stamp}.json"
+    profiler = cProfile.Profile() if "cpu" in modes else None
+    if "memory" in modes:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        if profiler is not None:
+            profiler.runcall(fn)
+        else:
+            fn()
+    finally:
+        report: dict[str, Any] = {
+            "module": module,
+            "argv": sys.argv[1:],
+            "modes": sorted(modes),
+            "wall_seconds": round(time.perf_counter() - started, 6),
+        }
+        if "memory" in modes:
+            snapshot = tracemalloc.take_snapshot()
+            _current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            report["tracemalloc_peak_bytes"] = peak
+            report["top_allocations"] = top_allocations(snapshot)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        if profiler is not None:
+            profiler.dump_stats(prof_path)
+            report["pstats_path"] = _relative(prof_path)
+            report["hotspots"] = hotspots(pstats.Stats(profiler))
+        report_path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print_summary(report)
+    return report
+
+
+def print_summary(report: dict[str, Any]) -> None:
+    err = sys.stderr
+    print(f"[PROFILE] {report['module']}: {report['wall_seconds']:.3f}s", file=err)
+    if "tracemalloc_peak_bytes" in report:
+        print(f"[PROFILE] pico tracemalloc: {report['tracemalloc_peak_bytes'] / 2**20:.1f} MiB", file=err)
+        for row in report["top_allocations"][:5]:
+            print(f"[PROFILE]   {row['size_bytes'] / 2**10:>10.1f} KiB  {row['site']}", file=err)
+    for row in report.get("hotspots", [])[:5]:
+        print(
+            f"[PROFILE]   {row['self_seconds']:>8.3f}s proprio {row['cumulative_seconds']:>8.3f}s acumulado"
+            f"  {row['calls']:>8} chamadas  {row['function']}",
+            file=err,
+        )
+    if "pstats_path" in report:
+        print(f"[PROFILE] pstats em {report['pstats_path']}", file=err)
+
+
+def run_main(main: Callable[[], Any]) -> None:
+    """Ponto de entrada comum dos `__main__` de `core`."""
+    modes = requested_modes()
+    if PROFILE_FLAG in sys.argv[1:]:
+        sys.argv = [arg for arg in sys.argv if arg != PROFILE_FLAG]
+    if not modes:
+        main()
+        return
+    profile_call(main, module=_module_name(main), modes=modes)
@@ -5,6 +5,7 @@ from pathlib import Path
 from typing import Any
 
 from core.config import CONFIG_PROMOTION_LOG_PATH, PROMOTION_DECISION_PATH
+from core.event_store import PROMOTION_STREAM, record_event
 from core.time_utils import utc_now_pair
 from core.versioning import _config_hash
 
@@ -85,6 +86,4 @@ def write_promotion_artifacts(
     report_path.parent.mkdir(parents=True, exist_ok=True)
     report_path.write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8")
 
-    log_path.parent.mkdir(parents=True, exist_ok=True)
-    with log_path.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(payload, ensure_ascii=False) + "\n")
+    record_event(PROMOTION_STREAM, payload, path=log_path)
@@ -0,0 +1,343 @@
+"""Servidor HTTP local com o estado do engine mantido em memoria.
+
+O n8n so via dados novos depois que um workflow fazia commit de
+`out/jogos_gerados.json` e do `performance_log.jsonl`. Aqui um unico processo
+mantem um `Engine` aquecido e os indices do arquivo de snapshots e do log de
+performance abertos, e responde em milissegundos:
+
+    GET  /health
+    GET  /games                          jogos atuais (out/jogos_gerados.json)
+    GET  /snapshot/<concurso>            snapshot do concurso (out/history, senao o arquivo compactado)
+    GET  /performance?last=N             ultimos N eventos (ou ?start=&end=, &canonical=1)
+    POST /generate   {"parameters": {...}, "seed": n}
+    POST /evaluate   {"tickets": [[...], ...], "last": N}
+
+Cada resposta e cacheada pela chave da requisicao mais a assinatura (mtime +
+tamanho) dos arquivos de que depende -- no /generate, o hash da config efetiva --
+e leva um ETag; `If-None-Match` igual devolve 304 sem corpo.
+
+    python -m core.serve --port 8765
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+from core.config import LAST_RESULT_PATH, OUT_GAMES_PATH, OUT_HISTORY_ARCHIVE_PATH, OUT_HISTORY_DIR, PERFORMANCE_LOG_PATH
+from core.engine import Engine, file_signature
+from core.history_archive import read_snapshot, snapshot_filename
+from core.performance_index import ConcursoIndex, PerformanceLogIndex
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+CACHE_SIZE = 256
+MAX_BODY_BYTES = 1 << 20
+
+
+class RequestError(ValueError):
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class ServeState:
+    """Engine, indices e cache de respostas compartilhados por todas as requisicoes."""
+
+    def __init__(
+        self,
+        engine: Engine | None = None,
+        *,
+        games_path: Path = OUT_GAMES_PATH,
+        archive_path: Path = OUT_HISTORY_ARCHIVE_PATH,
+        history_dir: Path = OUT_HISTORY_DIR,
+        performance_log_path: Path = PERFORMANCE_LOG_PATH,
+        last_result_path: Path = LAST_RESULT_PATH,
+        cache_size: int = CACHE_SIZE,
+    ) -> None:
+        self.engine = engine or Engine()
+        self.games_path = games_path
+        self.archive = ConcursoIndex(archive_path)
+        self.history_dir = history_dir
+        self.performance = PerformanceLogIndex(performance_log_path)
+        self.last_result_path = last_result_path
+        self.cache_size = cache_size
+        self._cache: OrderedDict[Any, tuple[str, bytes]] = OrderedDict()
+        # Engine e indices nao sao thread-safe; o servidor atende uma requisicao de cada vez.
+        self.lock = threading.Lock()
+
+    def cached(self, key: Any, build: Callable[[], Any]) -> tuple[str, bytes]:
+        """(ETag, corpo JSON) da chave, calculando e guardando (LRU) se ainda nao existe."""
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        body = (json.dumps(build(), ensure_ascii=False) + "\n").encode("utf-8")
+        entry = (f'"{hashlib.sha256(body).hexdigest()[:32]}"', body)
+        self._cache[key] = entry
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return entry
+
+    def games(self) -> tuple[str, bytes]:
+        def build() -> Any:
+            if not self.games_path.exists():
+                raise RequestError(HTTPStatus.NOT_FOUND, "Nenhum jogo gerado ainda.")
+            return json.loads(self.games_path.read_text(encoding="utf-8"))
+
+        return self.cached(("games", file_signature(self.games_path)), build)
+
+    def snapshot(self, concurso: int) -> tuple[str, bytes]:
+        """Mesma ordem do compare (`read_snapshot`): o arquivo de out/history vence o arquivado."""
+        self.archive.refresh()
+        history_path = self.history_dir / snapshot_filename(concurso)
+
+        def build() -> Any:
+            record = self.archive.get(concurso)
+            archived = {concurso: record["snapshot"]} if record is not None else {}
+            payload = read_snapshot(concurso, out_dir=self.history_dir, archived=archived)
+            if payload is None:
+                raise RequestError(HTTPStatus.NOT_FOUND, f"Concurso {concurso} nao arquivado.")
+            return payload
+
+        key = ("snapshot", concurso, file_signature(history_path), file_signature(self.archive.log_path))
+        return self.cached(key, build)
+
+    def performance_window(self, query: dict[str, list[str]]) -> tuple[str, bytes]:
+        self.performance.refresh()
+        canonical = query.get("canonical", ["0"])[0] in ("1", "true")
+        try:
+            if "start" in query or "end" in query:
+                concursos = self.performance.concursos()
+                start = int(query["start"][0]) if "start" in query else (concursos[0] if concursos else 0)
+                end = int(query["end"][0]) if "end" in query else (concursos[-1] if concursos else -1)
+                window: tuple[Any, ...] = ("range", start, end)
+            else:
+                window = ("last", int(query.get("last", ["20"])[0]))
+        except ValueError:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "start/end/last devem ser inteiros.") from None
+
+        def build() -> Any:
+            if window[0] == "last":
+                return self.performance.tail(window[1], canonical_only=canonical)
+            events = list(self.performance.range(window[1], window[2]).values())
+            if canonical:
+                events = [event for event in events if self.performance.is_canonical(event)]
+            return events
+
+        key = ("performance", window, canonical, file_signature(self.performance.log_path))
+        return self.cached(key, build)
+
+    def _data_signature(self) -> tuple[Any, ...]:
+        engine = self.engine
+        return (
+            file_signature(engine.results_path),
+            file_signature(engine.features_path),
+            file_signature(self.last_result_path),
+        )
+
+    def generate(self, payload: dict[str, Any]) -> tuple[str, bytes]:
+        from core.generator import derive_generation_seed
+        from core.versioning import _config_hash
+
+        params = payload.get("parameters") or {}
+        if not isinstance(params, dict):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "parameters deve ser um objeto.")
+        config = self.engine.with_parameters(params)
+        config_hash = _config_hash(config)
+        seed = payload.get("seed")
+        if seed is None:
+            last_result = (
+                json.loads(self.last_result_path.read_text(encoding="utf-8"))
+                if self.last_result_path.exists()
+                else {}
+            )
+            seed = derive_generation_seed(config, last_result)
+        elif not isinstance(seed, int):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "seed deve ser inteiro.")
+
+        def build() -> Any:
+            return {"config_hash": config_hash, "seed": seed, "games": self.engine.generate(seed, config=config)}
+
+        try:
+            return self.cached(("generate", config_hash, seed, self._data_signature()), build)
+        except RequestError:
+            raise
+        except (TypeError, ValueError) as exc:
+            # parametros com tipo ou valor invalido so falham ao gerar
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"Parametros invalidos: {exc}") from None
+
+    def evaluate(self, payload: dict[str, Any]) -> tuple[str, bytes]:
+        tickets = payload.get("tickets")
+        if not isinstance(tickets, list) or not tickets:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "tickets deve ser uma lista de jogos.")
+        try:
+            tickets = [[int(n) for n in ticket] for ticket in tickets]
+            last = int(payload.get("last", 1))
+        except (TypeError, ValueError):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "tickets e last devem conter inteiros.") from None
+
+        def build() -> Any:
+            results_df = self.engine.results_df.tail(max(last, 0))
+            draws = self.engine.draws[len(self.engine.draws) - len(results_df) :]
+            summaries = self.engine.evaluate(tickets, draws)
+            return [
+                {"concurso": int(concurso), **summary}
+                for concurso, summary in zip(results_df["concurso"], summaries)
+            ]
+
+        key = ("evaluate", json.dumps(tickets), last, file_signature(self.engine.results_path))
+        return self.cached(key, build)
+
+
+class Handler(BaseHTTPRequestHandler):
+    server: MegaEngineServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status: HTTPStatus, body: bytes, etag: str | None = None) -> None:
+        self.send_response(status)
+        if etag is not None:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: HTTPStatus, message: str) -> None:
+        self._send(status, (json.dumps({"error": message}, ensure_ascii=False) + "\n").encode("utf-8"))
+
+    def _respond(self, route: Callable[[], tuple[str, bytes]]) -> None:
+        try:
+            with self.server.state.lock:
+                etag, body = route()
+        except RequestError as exc:
+            self._send_error(exc.status, str(exc))
+            return
+        except Exception as exc:
+            # sem isso o cliente so ve a conexao cair
+            self.log_error("Erro ao atender %s: %r", self.path, exc)
+            self._send_error(HTTPStatus.INTERNAL_SERVER_ERROR, f"Erro interno: {type(exc).__name__}: {exc}")
+            return
+        if self.headers.get("If-None-Match") == etag:
+            self._send(HTTPStatus.NOT_MODIFIED, b"", etag)
+        else:
+            self._send(HTTPStatus.OK, body, etag)
+
+    def _content_length(self) -> int:
+        """Content-Length validado; fora de [0, MAX_BODY_BYTES] o corpo nao e lido e a conexao fecha."""
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Content-Length invalido.")
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Corpo grande demais.")
+        return length
+
+    def _json_body(self) -> dict[str, Any]:
+        length = self._content_length()
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Corpo nao e JSON valido.") from None
+        if not isinstance(payload, dict):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Corpo deve ser um objeto JSON.")
+        return payload
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        state = self.server.state
+        parts = [part for part in url.path.split("/") if part]
+        if parts == ["health"]:
+            self._respond(lambda: state.cached(("health",), lambda: {"status": "ok"}))
+        elif parts == ["games"]:
+            self._respond(state.games)
+        elif len(parts) == 2 and parts[0] == "snapshot" and parts[1].isdigit():
+            self._respond(lambda: state.snapshot(int(parts[1])))
+        elif parts == ["performance"]:
+            self._respond(lambda: state.performance_window(parse_qs(url.query)))
+        else:
+            self._respond(self._not_found)
+
+    def do_POST(self) -> None:
+        path = urlsplit(self.path).path.rstrip("/")
+        state = self.server.state
+        routes = {"/generate": state.generate, "/evaluate": state.evaluate}
+        # O corpo e lido fora do lock do estado: um cliente lento nao segura as outras requisicoes.
+        try:
+            if path in routes:
+                payload = self._json_body()
+            else:
+                # o corpo precisa ser consumido para manter a conexao utilizavel
+                self.rfile.read(self._content_length())
+        except RequestError as exc:
+            self._send_error(exc.status, str(exc))
+            return
+        if path not in routes:
+            self._respond(self._not_found)
+            return
+        self._respond(lambda: routes[path](payload))
+
+    def _not_found(self) -> tuple[str, bytes]:
+        raise RequestError(HTTPStatus.NOT_FOUND, f"Rota desconhecida: {self.command} {self.path}")
+
+
+class MegaEngineServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], state: ServeState, *, verbose: bool = False) -> None:
+        super().__init__(address, Handler)
+        self.state = state
+        self.verbose = verbose
+
+
+def make_server(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    state: ServeState | None = None,
+    *,
+    verbose: bool = False,
+) -> MegaEngineServer:
+    """Servidor pronto para `serve_forever()`; `port=0` escolhe uma porta livre."""
+    return MegaEngineServer((host, port), state or ServeState(), verbose=verbose)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Servidor HTTP local do mega-engine com estado em memoria.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--verbose", action="store_true", help="Loga cada requisicao no stderr.")
+    args = parser.parse_args(argv)
+
+    server = make_server(args.host, args.port, verbose=args.verbose)
+    host, port = server.server_address[:2]
+    print(f"[SERVE] Ouvindo em http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    from core.profiling import run_main
+
+    run_main(main)
@@ -0,0 +1,189 @@
+"""Indice invertido de pares, ternos e quadras dos sorteios historicos.
+
+Cada k-subconjunto (k=2..4) das dezenas sorteadas recebe um rank combinatorio
+(ordem colex) e aponta para a lista ordenada de concursos em que saiu, no
+formato CSR: `offsets[rank]:offsets[rank + 1]` delimita o trecho de `concursos`.
+Os arrays ficam em `data/subset_index/` como .npy e sao abertos por memory-map.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+from collections.abc import Iterable, Sequence
+from itertools import combinations
+from math import comb
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from core.config import MAX_NUMBER, MIN_NUMBER, RESULTS_PATH, SUBSET_INDEX_DIR
+
+DRAW_SIZE = 6
+SUBSET_SIZES = (2, 3, 4)
+N_NUMBERS = MAX_NUMBER - MIN_NUMBER + 1
+META_FILENAME = "meta.json"
+INDEX_VERSION = 1
+
+# BINOMIAL[n, k] = C(n, k) para o ranking colex.
+BINOMIAL = np.array([[comb(n, k) for k in range(DRAW_SIZE + 1)] for n in range(N_NUMBERS + 1)], dtype=np.int64)
+
+
+def subset_rank(subsets: np.ndarray) -> np.ndarray:
+    """Rank colex de subconjuntos (N, k) com dezenas distintas, em qualquer ordem por linha."""
+    values = np.sort(np.asarray(subsets, dtype=np.int64), axis=-1) - MIN_NUMBER
+    if values.size and (values.min() < 0 or values.max() >= N_NUMBERS):
+        raise ValueError("Dezena fora da faixa.")
+    k = values.shape[-1]
+    return BINOMIAL[values, np.arange(1, k + 1)].sum(axis=-1)
+
+
+def _source_digest(results_path: Path) -> str:
+    return hashlib.sha256(results_path.read_bytes()).hexdigest()
+
+
+def _draws_from_results(results_df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    draws = results_df[[f"d{i}" for i in range(1, DRAW_SIZE + 1)]].to_numpy(dtype=np.int64)
+    return np.sort(draws, axis=1), results_df["concurso"].to_numpy(dtype=np.int32)
+
+
+class SubsetIndex:
+    """Consultas `count`/`concursos` por subconjunto sem varrer o CSV de resultados."""
+
+    def __init__(self, arrays: dict[int, tuple[np.ndarray, np.ndarray]], meta: dict) -> None:
+        self._arrays = arrays
+        self.meta = meta
+
+    @classmethod
+    def build(cls, results_df: pd.DataFrame, *, source_sha256: str | None = None) -> "SubsetIndex":
+        draws, concursos = _draws_from_results(results_df)
+        arrays: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+        for k in SUBSET_SIZES:
+            positions = np.array(list(combinations(range(DRAW_SIZE), k)), dtype=np.int64)
+            ranks = subset_rank(draws[:, positions].reshape(-1, k))
+            owners = np.repeat(concursos, len(positions))
+            order = np.lexsort((owners, ranks))
+            counts = np.bincount(ranks, minlength=comb(N_NUMBERS, k))
+            offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+            np.cumsum(counts, out=offsets[1:])
+            arrays[k] = (offsets, owners[order].astype(np.int32))
+
+        meta = {
+            "version": INDEX_VERSION,
+            "draws": int(len(concursos)),
+            "last_concurso": int(concursos.max()) if len(concursos) else None,
+            "source_sha256": source_sha256,
+        }
+        return cls(arrays, meta)
+
+    def save(self, index_dir: Path = SUBSET_INDEX_DIR) -> None:
+        index_dir.mkdir(parents=True, exist_ok=True)
+        (index_dir / META_FILENAME).unlink(missing_ok=True)
+        for k, (offsets, concursos) in self._arrays.items():
+            np.save(index_dir / f"k{k}_offsets.npy", offsets)
+            np.save(index_dir / f"k{k}_concursos.npy", concursos)
+        # meta.json sai antes e volta por ultimo: so marca o indice como valido com os arrays completos.
+        (index_dir / META_FILENAME).write_text(json.dumps(self.meta, indent=2), encoding="utf-8")
+
+    @classmethod
+    def load(cls, index_dir: Path = SUBSET_INDEX_DIR) -> "SubsetIndex":
+        meta = json.loads((index_dir / META_FILENAME).read_text(encoding="utf-8"))
+        arrays = {
+            k: (
+                np.load(index_dir / f"k{k}_offsets.npy", mmap_mode="r"),
+                np.load(index_dir / f"k{k}_concursos.npy", mmap_mode="r"),
+            )
+            for k in SUBSET_SIZES
+        }
+        return cls(arrays, meta)
+
+    def _slice(self, subset: Sequence[int]) -> np.ndarray:
+        k = len(subset)
+        if k not in self._arrays or len(set(subset)) != k:
+            raise ValueError(f"Subconjunto deve ter {SUBSET_SIZES} dezenas distintas.")
+        offsets, concursos = self._arrays[k]
+        rank = int(subset_rank(np.array([subset]))[0])
+        return concursos[offsets[rank] : offsets[rank + 1]]
+
+    def concursos(self, subset: Sequence[int]) -> np.ndarray:
+        """Concursos (ordenados) em que todas as dezenas do subconjunto sairam juntas."""
+        return np.array(self._slice(subset))
+
+    def count(self, subset: Sequence[int], *, before: int | None = None) -> int:
+        """Ocorrencias do subconjunto; `before` limita a concursos anteriores (walk-forward)."""
+        hits = self._slice(subset)
+        if before is None:
+            return int(len(hits))
+        return int(np.searchsorted(hits, int(before), side="left"))
+
+    def bulk_counts(self, subsets: np.ndarray, *, before: int | None = None) -> np.ndarray:
+        """Contagem vetorizada para N subconjuntos de mesmo tamanho (array N x k)."""
+        subsets = np.asarray(subsets, dtype=np.int64)
+        offsets, concursos = self._arrays[subsets.shape[1]]
+        ranks = subset_rank(subsets)
+        starts, ends = offsets[ranks], offsets[ranks + 1]
+        if before is None:
+            return (ends - starts).astype(np.int64)
+        return np.array(
+            [np.searchsorted(concursos[s:e], int(before), side="left") for s, e in zip(starts, ends)],
+            dtype=np.int64,
+        )
+
+    def ticket_counts(
+        self,
+        ticket: Iterable[int],
+        k: int,
+        *,
+        before: int | None = None,
+    ) -> dict[tuple[int, ...], int]:
+        """Contagem de todos os k-subconjuntos de um jogo candidato em uma unica consulta."""
+        subsets = list(combinations(sorted(int(n) for n in ticket), k))
+        if not subsets:
+            return {}
+        counts = self.bulk_counts(np.array(subsets), before=before)
+        return {subset: int(count) for subset, count in zip(subsets, counts)}
+
+
+def load_or_build(
+    results_path: Path = RESULTS_PATH,
+    index_dir: Path = SUBSET_INDEX_DIR,
+    *,
+    force: bool = False,
+) -> SubsetIndex:
+    """Abre o indice persistido; reconstroi se o CSV de resultados mudou."""
+    digest = _source_digest(results_path)
+    if not force:
+        try:
+            index = SubsetIndex.load(index_dir)
+            if index.meta.get("version") == INDEX_VERSION and index.meta.get("source_sha256") == digest:
+                return index
+        except (OSError, ValueError, json.JSONDecodeError):
+            pass
+
+    index = SubsetIndex.build(pd.read_csv(results_path), source_sha256=digest)
+    index.save(index_dir)
+    return SubsetIndex.load(index_dir)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Indice invertido de pares, ternos e quadras historicos.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("build", help="Reconstroi o indice a partir de data/results/megasena.csv.")
+    query = sub.add_parser("query", help="Mostra contagem e concursos de um subconjunto.")
+    query.add_argument("numbers", nargs="+", type=int)
+    args = parser.parse_args(argv)
+
+    index = load_or_build(force=args.command == "build")
+    if args.command == "build":
+        print(f"[SUBSETS] Indice com {index.meta['draws']} sorteios em {SUBSET_INDEX_DIR}")
+        return
+    concursos = index.concursos(args.numbers)
+    print(json.dumps({"subset": sorted(args.numbers), "count": len(concursos), "concursos": concursos.tolist()}))
+
+
+if __name__ == "__main__":
+    from core.profiling import run_main
+
+    run_main(main)
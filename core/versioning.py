@@ -7,6 +7,8 @@ import json
 import os
 
 from core.config import MODEL_HISTORY_PATH
+from core.event_store import MODEL_HISTORY_STREAM, open_event_store, record_event
+from core.jsonl_log import read_last_jsonl
 from core.time_utils import utc_now_pair
 
 
@@ -20,21 +22,17 @@ def _last_hash() -> str | None:
     if not MODEL_HISTORY_PATH.exists():
         return None
 
+    store = open_event_store(MODEL_HISTORY_STREAM, MODEL_HISTORY_PATH)
+    if store is not None:
+        with store:
+            stored = store.latest(MODEL_HISTORY_STREAM)
+        return stored.payload.get("config_hash") if stored is not None else None
+
     try:
-        with MODEL_HISTORY_PATH.open("r", encoding="utf-8") as f:
-            for line in reversed(f.readlines()):
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    entry = json.loads(line)
-                except json.JSONDecodeError:
-                    continue
-                return entry.get("config_hash")
+        latest = read_last_jsonl(MODEL_HISTORY_PATH)
     except OSError:
         return None
-
-    return None
+    return latest.get("config_hash") if latest is not None else None
 
 
 
@@ -58,8 +56,7 @@ def register_strategy(config: dict, execution_type: str = "production") -> None:
     }
 
     try:
-        with MODEL_HISTORY_PATH.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        record_event(MODEL_HISTORY_STREAM, entry, path=MODEL_HISTORY_PATH)
         print("[VERSIONING] Nova estrategia registrada.")
     except OSError as exc:
         print(f"[VERSIONING] Falha ao registrar estrategia: {exc}")
@@ -0,0 +1,180 @@
+import json
+import subprocess
+import unittest
+from contextlib import ExitStack
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from core.audit_performance_log import GitBatchReader, audit_and_repair
+
+
+def _git(root: Path, *args: str) -> str:
+    return subprocess.check_output(["git", *args], cwd=root, text=True).strip()
+
+
+def _commit_payload(root: Path, payload: dict, message: str) -> str:
+    target = root / "out" / "jogos_gerados.json"
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(json.dumps(payload), encoding="utf-8")
+    _git(root, "add", "-A")
+    _git(root, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "--allow-empty", "-m", message)
+    return _git(root, "rev-parse", "HEAD")
+
+
+class GitBatchReaderTests(unittest.TestCase):
+    def test_reads_payloads_once_per_blob_and_reports_missing_refs(self):
+        with TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            _git(root, "init", "-q")
+            first = _commit_payload(root, {"games": [{"id": "J01", "numbers": [1, 2, 3]}]}, "a")
+            (root / "notes.txt").write_text("x", encoding="utf-8")
+            same_blob = _commit_payload(root, {"games": [{"id": "J01", "numbers": [1, 2, 3]}]}, "b")
+            changed = _commit_payload(root, {"games": [{"id": "J01", "numbers": [4, 5, 6]}]}, "c")
+
+            with GitBatchReader(root) as reader:
+                self.assertEqual(reader.read_json(first, "out/jogos_gerados.json")["games"][0]["numbers"], [1, 2, 3])
+                self.assertEqual(reader.read_json(same_blob[:10], "out/jogos_gerados.json")["games"][0]["numbers"], [1, 2, 3])
+                self.assertEqual(reader.read_json(changed, "out/jogos_gerados.json")["games"][0]["numbers"], [4, 5, 6])
+                self.assertIsNone(reader.read_json(first, "out/missing.json"))
+                self.assertIsNone(reader.read_json(first, "out"))
+                self.assertIsNone(reader.read_json(first, "out/no such file.json"))
+                self.assertIsNone(reader.read_json("0" * 40, "out/jogos_gerados.json"))
+                self.assertEqual(reader.blobs_read, 2)
+
+    def test_outside_a_repository_every_lookup_misses(self):
+        with TemporaryDirectory() as tmpdir:
+            with GitBatchReader(Path(tmpdir)) as reader:
+                self.assertIsNone(reader.read_json("abcdef1", "out/jogos_gerados.json"))
+
+
+def _event(concurso: int) -> dict:
+    return {
+        "concurso": concurso,
+        "data_sorteio": "19/02/2026",
+        "dezenas_sorteadas": [1, 2, 3, 4, 5, 6],
+        "ticket_size": 9,
+        "n_games": 1,
+        "games": [{"id": "J01", "numbers": [1, 2, 3, 4, 10, 11, 12, 13, 14], "hits": 0}],
+        "meta": {},
+    }
+
+
+class IncrementalAuditTests(unittest.TestCase):
+    def _patched(self, stack: ExitStack, root: Path) -> Path:
+        log_path = root / "data" / "performance_log.jsonl"
+        log_path.parent.mkdir(parents=True)
+        for name, value in {
+            "REPO_ROOT": root,
+            "PERFORMANCE_LOG_PATH": log_path,
+            "AUDIT_REPORT_PATH": root / "out" / "performance_audit.json",
+            "OUT_HISTORY_DIR": root / "out" / "history",
+            "OUT_HISTORY_ARCHIVE_PATH": root / "out" / "history_archive.jsonl",
+        }.items():
+            stack.enter_context(patch(f"core.audit_performance_log.{name}", value))
+        return log_path
+
+    def test_audit_verifies_only_new_events_after_checkpoint(self):
+        with TemporaryDirectory() as tmpdir, ExitStack() as stack:
+            log_path = self._patched(stack, Path(tmpdir))
+            log_path.write_text("".join(json.dumps(_event(c)) + "\n" for c in (10, 11)), encoding="utf-8")
+
+            first = audit_and_repair()
+            repaired_bytes = log_path.read_bytes()
+            with log_path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(_event(12)) + "\n")
+            second = audit_and_repair()
+
+            self.assertEqual(first["checkpoint"]["mode"], "full")
+            self.assertEqual(second["checkpoint"]["mode"], "incremental")
+            self.assertEqual(second["checkpoint"]["entries_verified"], 1)
+            self.assertEqual([row["concurso"] for row in second["rows"]], [12])
+            self.assertEqual(second["entries_audited"], 3)
+            self.assertEqual(second["checkpoint"]["entries_audited"], 3)
+            self.assertTrue(second["all_entries_match_snapshots"])
+            self.assertTrue(log_path.read_bytes().startswith(repaired_bytes))
+            self.assertEqual(second["checkpoint"]["log_offset"], log_path.stat().st_size)
+            events = [json.loads(line) for line in log_path.read_text(encoding="utf-8").splitlines()]
+            self.assertEqual([e["max_hits"] for e in events], [4, 4, 4])
+            self.assertTrue(all(e["meta"]["snapshot_source"] == "performance_log" for e in events))
+
+    def test_rewritten_log_or_full_flag_forces_full_audit(self):
+        with TemporaryDirectory() as tmpdir, ExitStack() as stack:
+            log_path = self._patched(stack, Path(tmpdir))
+            log_path.write_text(json.dumps(_event(10)) + "\n", encoding="utf-8")
+            audit_and_repair()
+
+            self.assertEqual(audit_and_repair(full=True)["checkpoint"]["entries_verified"], 1)
+
+            log_path.write_text(json.dumps(_event(20)) + "\n", encoding="utf-8")
+            report = audit_and_repair()
+            self.assertEqual(report["checkpoint"]["mode"], "full")
+            self.assertEqual([row["concurso"] for row in report["rows"]], [20])
+
+    def test_repeated_full_audit_appends_nothing_to_the_archive(self):
+        with TemporaryDirectory() as tmpdir, ExitStack() as stack:
+            root = Path(tmpdir)
+            log_path = self._patched(stack, root)
+            log_path.write_text("".join(json.dumps(_event(c)) + "\n" for c in (10, 11)), encoding="utf-8")
+            archive = root / "out" / "history_archive.jsonl"
+
+            audit_and_repair(full=True)
+            archived = archive.read_bytes()
+            history = {path.name: path.stat().st_mtime_ns for path in (root / "out" / "history").iterdir()}
+            audit_and_repair(full=True)
+
+            self.assertEqual(archive.read_bytes(), archived)
+            self.assertEqual({path.name: path.stat().st_mtime_ns for path in (root / "out" / "history").iterdir()}, history)
+
+    def test_invalid_lines_and_torn_tail_are_kept_and_reported(self):
+        with TemporaryDirectory() as tmpdir, ExitStack() as stack:
+            log_path = self._patched(stack, Path(tmpdir))
+            torn = b'{"concurso": 12, "da'
+            log_path.write_bytes(
+                json.dumps(_event(10)).encode() + b"\n" + b"not json\n" + json.dumps(_event(11)).encode() + b"\n" + torn
+            )
+
+            report = audit_and_repair()
+
+            content = log_path.read_bytes()
+            self.assertEqual(report["entries_audited"], 2)
+            self.assertEqual(len(report["invalid_line_offsets"]), 1)
+            self.assertEqual(content[report["invalid_line_offsets"][0] :].split(b"\n")[0], b"not json")
+            self.assertEqual(report["torn_tail"], {"offset": len(content) - len(torn), "bytes": len(torn)})
+            self.assertTrue(content.endswith(torn))
+            self.assertEqual(report["checkpoint"]["log_offset"], len(content) - len(torn))
+
+            again = audit_and_repair()
+            self.assertEqual(again["checkpoint"]["mode"], "incremental")
+            self.assertEqual(again["invalid_line_offsets"], report["invalid_line_offsets"])
+            self.assertEqual(again["entries_audited"], 2)
+
+    def test_append_waiting_on_the_lock_lands_in_the_rewritten_log(self):
+        import threading
+        import time
+
+        from core import audit_performance_log
+        from core.jsonl_log import append_jsonl_many
+
+        with TemporaryDirectory() as tmpdir, ExitStack() as stack:
+            log_path = self._patched(stack, Path(tmpdir))
+            log_path.write_text(json.dumps(_event(10)) + "\n", encoding="utf-8")
+            repair = audit_performance_log._repair_event
+            appender = threading.Thread(target=append_jsonl_many, args=(log_path, [_event(11)]))
+
+            def repair_while_appending(event, reader):
+                appender.start()
+                time.sleep(0.2)  # o append abre o log antigo e fica esperando o lock
+                return repair(event, reader)
+
+            stack.enter_context(patch.object(audit_performance_log, "_repair_event", repair_while_appending))
+            audit_and_repair()
+            appender.join(5)
+
+            events = [json.loads(line) for line in log_path.read_text(encoding="utf-8").splitlines()]
+            self.assertEqual([e["concurso"] for e in events], [10, 11])
+            self.assertIn("max_hits", events[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
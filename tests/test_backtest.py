@@ -4,7 +4,14 @@ from unittest.mock import patch
 import numpy as np
 import pandas as pd
 
-from core.backtest import build_probability_cache, build_weak_pair_cache, run_backtest, slice_results_for_backtest
+from core.backtest import (
+    build_probability_cache,
+    build_weak_pair_cache,
+    compare_warm_start,
+    measure_key_sampler_variance,
+    run_backtest,
+    slice_results_for_backtest,
+)
 
 
 def _sample_results_df() -> pd.DataFrame:
@@ -114,6 +121,89 @@ class BacktestTests(unittest.TestCase):
 
         self.assertEqual(report["summary"]["draws_evaluated"], 4)
 
+    def test_measure_key_sampler_variance_reports_each_sampler_against_iid(self):
+        results_df = _sample_results_df()
+        probability_cache = {idx: np.linspace(1.0, 2.0, 60) for idx in range(2, len(results_df))}
+
+        report = measure_key_sampler_variance(
+            results_df,
+            key_samplers=("iid", "stratified", "antithetic"),
+            repeats=3,
+            window=2,
+            min_history=2,
+            n_games=2,
+            ticket_size=6,
+            n_sim=8,
+            max_intersection=3,
+            probability_cache=probability_cache,
+            config={},
+        )
+
+        self.assertEqual([row["key_sampler"] for row in report["rows"]], ["iid", "stratified", "antithetic"])
+        self.assertEqual(report["n_sim"], 8)
+        for row in report["rows"]:
+            self.assertEqual(row["repeats"], 3)
+            self.assertGreaterEqual(row["avg_score_std"], 0.0)
+            self.assertIn("rate_ge4_variance_ratio", row)
+
+    def test_warm_start_reuses_pool_and_full_refresh_matches_cold_start(self):
+        results_df = _sample_results_df()
+        probability_cache = {idx: np.linspace(1.0, 2.0 + idx, 60) for idx in range(2, len(results_df))}
+        kwargs = dict(
+            window=2,
+            min_history=2,
+            n_games=2,
+            ticket_size=6,
+            n_sim=10,
+            max_intersection=3,
+            probability_cache=probability_cache,
+            config={},
+        )
+
+        cold = run_backtest(results_df, **kwargs)
+        full_refresh = run_backtest(results_df, warm_start=1.0, **kwargs)
+        self.assertEqual(
+            [draw["games"] for draw in cold["per_draw"]],
+            [draw["games"] for draw in full_refresh["per_draw"]],
+        )
+
+        warm = run_backtest(results_df, warm_start=0.2, **kwargs)
+        self.assertEqual(warm["summary"]["warm_start"], 0.2)
+        self.assertEqual(warm["summary"]["candidates_sampled"], 10 + 3 * 2)
+        self.assertNotIn("warm_start", cold["summary"])
+
+        drift = compare_warm_start(results_df, refresh=0.2, **kwargs)
+        self.assertEqual(drift["candidates_sampled"], {"cold": 40, "warm": 16})
+        self.assertEqual(set(drift["metrics"]), {"avg_max_hits", "avg_score", "rate_ge4", "avg_coverage_rate"})
+
+        with self.assertRaises(ValueError):
+            run_backtest(results_df, warm_start=0.2, **{**kwargs, "config": {"parameters": {"optimizer": "anneal"}}})
+
+    def test_n_sim_sweep_matches_separate_backtests_from_one_sampling_pass(self):
+        results_df = _sample_results_df()
+        probability_cache = {idx: np.linspace(1.0, 2.0 + idx, 60) for idx in range(2, len(results_df))}
+        kwargs = dict(
+            window=2,
+            min_history=2,
+            n_games=2,
+            ticket_size=6,
+            max_intersection=3,
+            probability_cache=probability_cache,
+            config={},
+        )
+
+        report = run_backtest(results_df, n_sim=5, n_sim_sweep=[12, 5, 30], **kwargs)
+
+        self.assertEqual([row["n_sim"] for row in report["n_sim_sweep"]], [5, 12, 30])
+        self.assertEqual(report["summary"]["candidates_sampled"], 4 * 30)
+        self.assertEqual(report["per_draw"], run_backtest(results_df, n_sim=5, **kwargs)["per_draw"])
+        for row in report["n_sim_sweep"]:
+            single = run_backtest(results_df, n_sim=row["n_sim"], **kwargs)["summary"]
+            self.assertEqual({key: single[key] for key in row}, row)
+
+        with self.assertRaises(ValueError):
+            run_backtest(results_df, n_sim=5, n_sim_sweep=[10], key_sampler="stratified", **kwargs)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,85 @@
+import pickle
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_history
+from core.backtest import build_probability_cache, build_weak_pair_cache, run_backtest
+from core.backtest_cache import ProbabilityBlock, WeakPairMasks
+from core.generator import build_weak_pair_set
+
+CONFIG = {"parameters": {"window": 5}}
+
+
+def _sum_weak_pairs(descriptor: dict) -> int:
+    masks = WeakPairMasks.attach(descriptor)
+    return sum(len(masks[idx]) for idx in masks)
+
+
+class BacktestCacheTests(unittest.TestCase):
+    def test_weak_pair_masks_match_the_pair_count_scan(self):
+        results_df = synthetic_history(60)
+        masks = build_weak_pair_cache(results_df, min_history=20, bottom_pairs=40)
+
+        self.assertEqual(list(masks), list(range(20, 60)))
+        for idx in (20, 41, 59):
+            self.assertEqual(masks[idx], build_weak_pair_set(results_df.iloc[:idx], 40))
+            matrix = masks.matrix(idx)
+            self.assertEqual({(a + 1, b + 1) for a, b in combinations(range(60), 2) if matrix[a, b]}, masks[idx])
+        self.assertEqual(len(build_weak_pair_cache(results_df, min_history=20, bottom_pairs=0)), 0)
+
+    def test_probability_block_looks_up_like_the_dict_cache(self):
+        results_df = synthetic_history(30)
+        block = build_probability_cache(results_df, windows=[5, 12], min_history=8, config=CONFIG)
+
+        self.assertEqual(block.values.shape, (2, 22, 60))
+        self.assertEqual(block.values.dtype, np.float64)
+        self.assertEqual(list(block[5]), list(range(8, 30)))
+        self.assertEqual(list(block[12]), list(range(12, 30)))
+        self.assertNotIn(8, block[12])
+        self.assertIsNone(block.get(7))
+        self.assertEqual(block[5][10].dtype, np.float64)
+
+    def test_default_block_reproduces_the_uncached_backtest(self):
+        results_df = synthetic_history(60)
+        block = build_probability_cache(results_df, windows=[5], min_history=20, config=CONFIG)
+        kwargs = {"window": 5, "min_history": 20, "n_games": 3, "n_sim": 40, "config": CONFIG, "seed_base": 7}
+        self.assertEqual(run_backtest(results_df, probability_cache=block[5], **kwargs), run_backtest(results_df, **kwargs))
+
+        compact = build_probability_cache(results_df, windows=[5], min_history=20, config=CONFIG, dtype=np.float32)
+        self.assertEqual((compact.values.dtype, compact.nbytes * 2), (np.float32, block.nbytes))
+
+    def test_caches_pickle_and_share_memory(self):
+        results_df = synthetic_history(200)
+        masks = build_weak_pair_cache(results_df, min_history=20, bottom_pairs=60)
+        as_sets = {idx: masks[idx] for idx in masks}
+        self.assertEqual(masks.nbytes, 180 * 222)
+        self.assertLess(len(pickle.dumps(masks)), len(pickle.dumps(as_sets)))
+        self.assertEqual(pickle.loads(pickle.dumps(masks))[150], as_sets[150])
+
+        shm, descriptor = masks.share()
+        try:
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                total = pool.submit(_sum_weak_pairs, descriptor).result()
+            self.assertEqual(total, sum(len(pairs) for pairs in as_sets.values()))
+        finally:
+            shm.close()
+            shm.unlink()
+
+        block = ProbabilityBlock([3], [0], base=0, stop=4)
+        block.set(3, 2, np.linspace(0.0, 1.0, 60))
+        shm, descriptor = block.share()
+        try:
+            attached = ProbabilityBlock.attach(descriptor)
+            np.testing.assert_allclose(attached[3][2], np.linspace(0.0, 1.0, 60), rtol=1e-6)
+            self.assertFalse(attached.values.flags.writeable)
+            attached._shm.close()
+        finally:
+            shm.close()
+            shm.unlink()
+
+
+if __name__ == "__main__":
+    unittest.main()
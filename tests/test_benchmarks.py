@@ -0,0 +1,42 @@
+import unittest
+
+import numpy as np
+
+from benchmarks.suite import eval_draws, run_suite
+from benchmarks.synthetic import synthetic_draws, synthetic_history
+
+
+class BenchmarkSuiteTests(unittest.TestCase):
+    def test_synthetic_history_is_deterministic_and_valid(self):
+        draws = synthetic_draws(1_000, seed=3)
+        np.testing.assert_array_equal(draws, synthetic_draws(1_000, seed=3))
+        self.assertFalse(np.array_equal(draws, synthetic_draws(1_000, seed=4)))
+        self.assertTrue((np.diff(draws, axis=1) > 0).all())
+        self.assertEqual((draws.min(), draws.max()), (1, 60))
+
+        history = synthetic_history(5)
+        self.assertEqual(list(history.columns), ["concurso", "data", "d1", "d2", "d3", "d4", "d5", "d6"])
+        self.assertEqual(history["concurso"].tolist(), [1, 2, 3, 4, 5])
+
+    def test_run_suite_reports_time_memory_and_throughput(self):
+        report = run_suite([300], names=["build_features", "build_weak_pair_cache"], repeats=2)
+
+        self.assertIn("code_version", report["environment"])
+        self.assertEqual([(row["benchmark"], row["size"]) for row in report["results"]], [
+            ("build_features", 300),
+            ("build_weak_pair_cache", 300),
+        ])
+        for row in report["results"]:
+            self.assertEqual(len(row["seconds"]), 2)
+            self.assertGreater(row["peak_bytes"], 0)
+            self.assertGreater(row["throughput"]["draws_per_s"], 0)
+        self.assertEqual([row["walk_forward_steps"] for row in report["results"]], [None, 20])
+        with self.assertRaises(ValueError):
+            run_suite([300], names=["nope"])
+
+    def test_walk_forward_steps_grow_with_history_size(self):
+        self.assertEqual([eval_draws(size) for size in (300, 3_000, 30_000, 300_000)], [20, 20, 40, 60])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -58,5 +58,51 @@ class CompareSnapshotTests(unittest.TestCase):
             out_history.__truediv__.return_value.exists.return_value = False
             with self.assertRaises(ValueError):
                 load_generated_games(1234)
+
+    def test_load_generated_games_prefers_the_snapshot_file_over_the_archive(self):
+        import json
+        from pathlib import Path
+        from tempfile import TemporaryDirectory
+
+        from core.compare_results import load_generated_games
+
+        def payload(numbers):
+            return {"game": "megasena", "ticket_size": 9, "games": [{"id": "J01", "numbers": numbers}], "metadata": {}}
+
+        stale = payload([1, 2, 3, 4, 5, 6, 7, 8, 9])
+        edited = payload([11, 12, 13, 14, 15, 16, 17, 18, 19])
+        with TemporaryDirectory() as tmpdir, patch("core.compare_results.OUT_HISTORY", Path(tmpdir)):
+            _info, games = load_generated_games(50, {50: stale, 51: stale})
+            self.assertEqual(games[0][1], stale["games"][0]["numbers"])
+
+            (Path(tmpdir) / "jogos_concurso_50.json").write_text(json.dumps(edited), encoding="utf-8")
+            _info, games = load_generated_games(50, {50: stale})
+            self.assertEqual(games[0][1], edited["games"][0]["numbers"])
+
+    def test_main_records_processed_draws_when_a_later_draw_fails(self):
+        from core import compare_results
+
+        draws = [
+            LatestDraw(concurso=10, data="01/01/2026", dezenas=(1, 2, 3, 4, 5, 6)),
+            LatestDraw(concurso=11, data="03/01/2026", dezenas=(7, 8, 9, 10, 11, 12)),
+        ]
+        good = ({"ticket_size": 9, "n_games": 1, "metadata": {}}, [("J01", [1, 2, 3, 4, 5, 6, 7, 8, 9])])
+        broken = ({"ticket_size": 9, "n_games": 1}, good[1])
+
+        with patch.object(compare_results, "load_latest_draw_from_file", return_value=draws[-1]), patch.object(
+            compare_results, "read_last_jsonl", return_value=None
+        ), patch.object(compare_results, "latest_logged_concurso", return_value=None), patch.object(
+            compare_results, "load_pending_draws", return_value=draws
+        ), patch.object(compare_results, "already_logged", return_value=False), patch.object(
+            compare_results, "load_recent_events", return_value=[]
+        ), patch.object(compare_results, "load_archived_snapshots", return_value={}), patch.object(
+            compare_results, "load_generated_games", side_effect=[good, broken]
+        ), patch.object(compare_results, "record_events") as recorded:
+            with self.assertRaises(KeyError):
+                compare_results.main()
+
+        self.assertEqual([event["concurso"] for event in recorded.call_args.args[1]], [10])
+
+
 if __name__ == "__main__":
     unittest.main()
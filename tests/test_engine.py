@@ -0,0 +1,98 @@
+import os
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_history
+from core.backtest import build_weak_pair_cache, run_backtest
+from core.engine import Engine
+from core.features_megasena import build_features
+from core.generator import build_weak_pair_set, generate_games_from_probs, generation_kwargs, load_probs
+from core.hit_matrix import summarize_draws
+
+CONFIG = {"parameters": {"window": 10, "min_history": 10, "num_games": 3, "n_sim": 40, "bottom_pairs": 30}}
+
+
+class EngineTests(unittest.TestCase):
+    def setUp(self):
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.results_path = Path(tmp.name) / "megasena.csv"
+        self.features_path = Path(tmp.name) / "dezenas.csv"
+        self.results_df = synthetic_history(40)
+        self.results_df.to_csv(self.results_path, index=False)
+        build_features(self.results_df, window=10).to_csv(self.features_path, index=False)
+        self.engine = Engine(CONFIG, results_path=self.results_path, features_path=self.features_path)
+
+    def test_results_are_loaded_once_and_reloaded_when_the_file_changes(self):
+        first = self.engine.results_df
+        cooccurrence = self.engine.cooccurrence
+        self.assertIs(self.engine.results_df, first)
+        self.assertIs(self.engine.cooccurrence, cooccurrence)
+
+        synthetic_history(41).to_csv(self.results_path, index=False)
+        stat = self.results_path.stat()
+        os.utime(self.results_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        self.assertEqual(len(self.engine.results_df), 41)
+        self.assertEqual(int(self.engine.cooccurrence.trace()), 41 * 6)
+
+    def test_weak_pairs_match_the_pair_count_scan(self):
+        for bottom_pairs in (0, 1, 30, 2000):
+            self.assertEqual(self.engine.weak_pairs(bottom_pairs), build_weak_pair_set(self.results_df, bottom_pairs))
+
+    def test_generate_matches_the_file_based_generator(self):
+        expected = generate_games_from_probs(
+            load_probs(self.features_path, config=CONFIG),
+            seed=7,
+            weak_pairs=build_weak_pair_set(self.results_df, 30),
+            **generation_kwargs(CONFIG),
+        )
+        self.assertEqual(self.engine.generate(7), expected)
+
+    def test_backtest_matches_run_backtest_and_reuses_caches(self):
+        expected = run_backtest(
+            self.results_df,
+            window=10,
+            min_history=10,
+            n_games=3,
+            n_sim=20,
+            config=CONFIG,
+            weak_pair_cache=build_weak_pair_cache(self.results_df, min_history=10, bottom_pairs=30),
+        )
+        report = self.engine.backtest()
+        self.assertEqual(report["summary"], expected["summary"])
+        self.assertEqual(report["per_draw"], expected["per_draw"])
+        self.assertEqual(report["strategy"]["source_draws_used"], 40)
+
+        caches = dict(self.engine._derived)
+        self.engine.backtest({"num_games": 2})
+        self.assertEqual({key: value for key, value in self.engine._derived.items() if key in caches}, caches)
+        self.assertEqual(len(self.engine._derived), len(caches))
+
+    def test_optimization_takes_its_caches_from_the_engine(self):
+        from core.optimize import run_optimization
+
+        grid = {"window": [10], "num_games": [3], "max_intersection": [3, 4]}
+        config = {"parameters": {**CONFIG["parameters"], "backtest_n_sim": 20, "optimization_grid": grid}}
+        engine = Engine(config, results_path=self.results_path, features_path=self.features_path)
+        engine.backtest()
+        caches = dict(engine._derived)
+
+        report = run_optimization(engine.results_df, config, engine=engine)
+        self.assertEqual(engine._derived, caches)
+        self.assertEqual(report, run_optimization(self.results_df, config))
+
+    def test_evaluate_and_features_at(self):
+        tickets = [[1, 2, 3, 4, 5, 6, 7, 8, 9], [10, 20, 30, 40, 50, 60, 11, 12, 13]]
+        self.assertEqual(self.engine.evaluate(tickets), summarize_draws(tickets, self.engine.draws))
+        self.assertEqual(self.engine.evaluate(tickets, [[1, 2, 3, 4, 5, 6]])[0]["max_hits"], 6)
+
+        features = self.engine.features_at(25)
+        pd.testing.assert_frame_equal(features, build_features(self.results_df.iloc[:25], window=10))
+        self.assertIs(self.engine.features_at(25), features)
+
+
+if __name__ == "__main__":
+    unittest.main()
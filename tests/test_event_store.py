@@ -0,0 +1,121 @@
+import io
+import json
+import unittest
+from contextlib import redirect_stderr
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from core import event_store
+from core.event_store import (
+    MODEL_HISTORY_STREAM,
+    PERFORMANCE_STREAM,
+    EventStore,
+    close_event_stores,
+    open_event_store,
+    record_events,
+)
+
+
+def _stream_paths(tmpdir: str) -> dict[str, Path]:
+    root = Path(tmpdir)
+    return {
+        PERFORMANCE_STREAM: root / "performance_log.jsonl",
+        MODEL_HISTORY_STREAM: root / "model_history.jsonl",
+    }
+
+
+class EventStoreTests(unittest.TestCase):
+    def test_sync_indexes_performance_events_and_queries_windows(self):
+        with TemporaryDirectory() as tmpdir:
+            paths = _stream_paths(tmpdir)
+            events = [
+                {"concurso": 10, "n_games": 2, "score": 1},
+                {"concurso": 11, "n_games": 0, "score": 0},
+                {"concurso": 12, "n_games": 2, "score": 5},
+            ]
+            paths[PERFORMANCE_STREAM].write_text("".join(json.dumps(e) + "\n" for e in events), encoding="utf-8")
+
+            with EventStore(Path(tmpdir) / "events.sqlite", paths) as store:
+                self.assertTrue(store.has_concurso(PERFORMANCE_STREAM, 11))
+                self.assertEqual(store.latest_concurso(PERFORMANCE_STREAM), 12)
+                self.assertEqual(store.count(PERFORMANCE_STREAM, canonical_only=True), 2)
+                tail = store.tail(PERFORMANCE_STREAM, 2, canonical_only=True, by_concurso=True)
+                self.assertEqual([event.concurso for event in tail], [10, 12])
+
+                store.append(PERFORMANCE_STREAM, {"concurso": 13, "n_games": 2, "score": 0})
+                self.assertEqual(store.latest(PERFORMANCE_STREAM).payload["concurso"], 13)
+
+    def test_sync_picks_up_external_appends_and_rewrites(self):
+        with TemporaryDirectory() as tmpdir:
+            paths = _stream_paths(tmpdir)
+            history = paths[MODEL_HISTORY_STREAM]
+            history.write_text(json.dumps({"config_hash": "a"}) + "\n", encoding="utf-8")
+            db_path = Path(tmpdir) / "events.sqlite"
+
+            with EventStore(db_path, paths) as store:
+                self.assertEqual(store.latest(MODEL_HISTORY_STREAM).config_hash, "a")
+
+            with history.open("a", encoding="utf-8") as f:
+                f.write(json.dumps({"config_hash": "b"}) + "\n")
+            with EventStore(db_path, paths) as store:
+                self.assertEqual(store.latest(MODEL_HISTORY_STREAM).config_hash, "b")
+                self.assertEqual(len(store.by_config_hash(MODEL_HISTORY_STREAM, "a")), 1)
+
+            history.write_text(json.dumps({"config_hash": "c"}) + "\n", encoding="utf-8")
+            with EventStore(db_path, paths) as store:
+                self.assertEqual(store.count(MODEL_HISTORY_STREAM), 1)
+                self.assertEqual(store.latest(MODEL_HISTORY_STREAM).config_hash, "c")
+
+    def test_export_jsonl_regenerates_file_byte_for_byte(self):
+        with TemporaryDirectory() as tmpdir:
+            paths = _stream_paths(tmpdir)
+            original = '{"concurso": 1, "meta": {"nota": "acao"}}\n\nnot-json\n{"b":2,"concurso":2}\n'.encode("utf-8")
+            paths[PERFORMANCE_STREAM].write_bytes(original)
+            exported_path = Path(tmpdir) / "exported.jsonl"
+
+            with EventStore(Path(tmpdir) / "events.sqlite", paths) as store:
+                store.export_jsonl(PERFORMANCE_STREAM, exported_path)
+                self.assertEqual(store.concursos(PERFORMANCE_STREAM), [1, 2])
+
+            self.assertEqual(exported_path.read_bytes(), original)
+
+    def test_torn_last_line_is_reported_and_kept_on_export(self):
+        with TemporaryDirectory() as tmpdir:
+            paths = _stream_paths(tmpdir)
+            original = b'{"concurso": 1}\n{"concurso": 2'
+            paths[PERFORMANCE_STREAM].write_bytes(original)
+
+            stderr = io.StringIO()
+            with EventStore(Path(tmpdir) / "events.sqlite", paths) as store, redirect_stderr(stderr):
+                self.assertEqual(store.count(PERFORMANCE_STREAM), 1)
+                self.assertEqual(store.torn_tails[PERFORMANCE_STREAM], (16, 14))
+                store.export_jsonl(PERFORMANCE_STREAM)
+
+            self.assertIn("offset 16", stderr.getvalue())
+            self.assertEqual(paths[PERFORMANCE_STREAM].read_bytes(), original)
+
+    def test_open_event_store_reuses_one_connection_and_skips_unchanged_syncs(self):
+        with TemporaryDirectory() as tmpdir:
+            paths = _stream_paths(tmpdir)
+            db_path = Path(tmpdir) / "events.sqlite"
+            self.addCleanup(close_event_stores)
+            with patch.dict("os.environ", {"MEGA_EVENT_STORE": str(db_path)}), patch.dict(
+                event_store.STREAM_PATHS, paths
+            ):
+                record_events(PERFORMANCE_STREAM, [{"concurso": 1}])
+                store = open_event_store(PERFORMANCE_STREAM, paths[PERFORMANCE_STREAM])
+                with store:
+                    self.assertEqual(store.latest_concurso(PERFORMANCE_STREAM), 1)
+                self.assertIs(open_event_store(), store)
+
+                with patch.object(store, "_sync_stream", wraps=store._sync_stream) as synced:
+                    self.assertTrue(store.has_concurso(PERFORMANCE_STREAM, 1))
+                    self.assertEqual(synced.call_count, 0)
+                    record_events(PERFORMANCE_STREAM, [{"concurso": 2}, {"concurso": 3}])
+                    self.assertEqual(synced.call_count, 1)
+                self.assertEqual(store.concursos(PERFORMANCE_STREAM), [1, 2, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
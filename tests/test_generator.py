@@ -8,13 +8,21 @@ import pandas as pd
 
 from core.generator import (
     _is_materially_equal_output,
+    available_key_samplers,
     build_output_payload,
     build_weak_pair_set,
     check_max_consecutive,
+    constrained_sample,
     count_weak_pairs_in_game,
     export_json,
     generate_games_from_probs,
+    key_uniforms,
+    score_game,
     scores_from_features,
+    unique_weighted_samples,
+    warm_start_pool,
+    weighted_sample,
+    weighted_samples,
 )
 
 
@@ -45,6 +53,157 @@ class GeneratorTests(unittest.TestCase):
             self.assertTrue(check_max_consecutive(game, 2))
         self.assertGreaterEqual(len(set(games[0]).difference(games[1])), 3)
 
+    def test_constrained_sampler_enforces_tight_rules_without_waste(self):
+        probs = np.random.default_rng(1).random(60) ** 3
+        probs = probs / probs.sum()
+        kwargs = dict(n_games=6, ticket_size=9, n_sim=600, max_intersection=1, max_seq=1, min_diff=8)
+
+        stats: dict = {}
+        games = generate_games_from_probs(probs, seed=5, sampler="constrained", stats=stats, **kwargs)
+
+        self.assertEqual(games, generate_games_from_probs(probs, seed=5, sampler="constrained", **kwargs))
+        self.assertEqual(len(games), 6)
+        for i, game in enumerate(games):
+            self.assertTrue(check_max_consecutive(game, 1))
+            for other in games[i + 1 :]:
+                self.assertLessEqual(len(set(game) & set(other)), 1)
+        self.assertEqual(stats["sampler"], "constrained")
+        self.assertLess(stats["rejection_rate"], 0.01)
+
+    def test_constrained_sample_without_rules_keeps_weighted_marginals(self):
+        probs = np.linspace(1.0, 4.0, 60)
+        rng = np.random.default_rng(0)
+        weighted = np.zeros(60)
+        constrained = np.zeros(60)
+        for _ in range(4000):
+            weighted[np.array(weighted_sample(probs, 9, rng)) - 1] += 1
+            constrained[np.array(constrained_sample(probs, 9, rng)[0]) - 1] += 1
+
+        self.assertLess(np.abs(weighted - constrained).max() / 4000, 0.05)
+
+    def test_constrained_sample_terminates_when_rules_are_infeasible(self):
+        rng = np.random.default_rng(3)
+        selected = [list(range(1, 31)), list(range(31, 61))]
+
+        game, rejected = constrained_sample(np.ones(60), 9, rng, max_seq=1, selected=selected, cap=2, max_attempts=3)
+
+        self.assertEqual(len(set(game)), 9)
+        self.assertGreaterEqual(rejected, 3)
+
+    def test_anneal_optimizer_is_deterministic_valid_and_beats_sampling(self):
+        probs = np.random.default_rng(1).random(60) ** 3
+        probs = probs / probs.sum()
+        weak_pairs = {(1, 2), (3, 5), (10, 20)}
+        kwargs = dict(
+            n_games=6,
+            ticket_size=9,
+            max_intersection=3,
+            max_seq=2,
+            min_diff=6,
+            weak_pairs=weak_pairs,
+            penalty_weak_pair=0.01,
+        )
+
+        def objective(games):
+            return sum(score_game(game, probs, weak_pairs=weak_pairs, penalty_weak_pair=0.01) for game in games)
+
+        annealed = [generate_games_from_probs(probs, seed=seed, optimizer="anneal", **kwargs) for seed in range(3)]
+        sampled = [generate_games_from_probs(probs, seed=seed, n_sim=5000, **kwargs) for seed in range(3)]
+
+        self.assertEqual(annealed[0], generate_games_from_probs(probs, seed=0, optimizer="anneal", **kwargs))
+        for games in annealed:
+            self.assertEqual(len({tuple(game) for game in games}), 6)
+            for i, game in enumerate(games):
+                self.assertTrue(check_max_consecutive(game, 2))
+                for other in games[i + 1 :]:
+                    self.assertLessEqual(len(set(game) & set(other)), 3)
+        self.assertGreater(sum(map(objective, annealed)), sum(map(objective, sampled)))
+
+    def test_weighted_samples_iid_matches_sequential_weighted_sample(self):
+        probs = np.linspace(1.0, 3.0, 60)
+        batch = weighted_samples(probs, 9, 25, np.random.default_rng(4))
+        rng = np.random.default_rng(4)
+        self.assertEqual(batch, [weighted_sample(probs, 9, rng) for _ in range(25)])
+
+    def test_unique_weighted_samples_tops_up_duplicates_until_n_or_cap(self):
+        probs = np.full(60, 1e-6)
+        probs[:8] = 1.0
+        candidates, drawn = unique_weighted_samples(probs, 6, 20, np.random.default_rng(2))
+        self.assertEqual(candidates.shape, (20, 6))
+        self.assertEqual(len({tuple(row) for row in candidates.tolist()}), 20)
+        self.assertGreater(drawn, 20)
+        # sem repetidos no primeiro lote, o resultado e o proprio fluxo de weighted_samples
+        flat = np.linspace(1.0, 3.0, 60)
+        unique, drawn = unique_weighted_samples(flat, 9, 30, np.random.default_rng(4))
+        self.assertEqual((unique.tolist(), drawn), (weighted_samples(flat, 9, 30, np.random.default_rng(4)), 30))
+
+        capped, drawn = unique_weighted_samples(np.ones(60), 59, 100, np.random.default_rng(0))
+        self.assertEqual(drawn, 400)
+        self.assertLessEqual(len(capped), 60)
+
+        stats: dict = {}
+        games = generate_games_from_probs(probs, seed=1, n_games=3, ticket_size=6, n_sim=20, stats=stats)
+        self.assertEqual(len(games), 3)
+        self.assertEqual(stats["candidates"], 20)
+        self.assertGreater(stats["duplicate_ratio"], 0.0)
+
+    def test_weighted_fallback_stops_when_rules_are_infeasible(self):
+        # 30 dezenas sem consecutivas so admitem 31 jogos e 3 jogos nao cabem com interseccao 0.
+        kwargs = dict(n_games=3, ticket_size=30, n_sim=4, max_intersection=0, max_seq=1)
+        with patch("core.generator.MAX_FALLBACK_DRAWS", 200), self.assertRaises(ValueError):
+            generate_games_from_probs(np.ones(60), seed=0, **kwargs)
+
+    def test_warm_start_pool_keeps_best_previous_candidates_and_refreshes_the_rest(self):
+        probs = np.linspace(1.0, 3.0, 60)
+        previous = np.array([[1, 2, 3, 4, 5, 6], [55, 56, 57, 58, 59, 60], [30, 31, 32, 33, 34, 35], [1, 2, 3, 4, 5, 7]])
+
+        pool, drawn = warm_start_pool(previous, probs, 6, 4, np.random.default_rng(0), refresh=0.5)
+
+        self.assertEqual(pool[:2].tolist(), [[55, 56, 57, 58, 59, 60], [30, 31, 32, 33, 34, 35]])
+        self.assertEqual((len(pool), drawn), (4, 2))
+        # com penalidade o criterio e o score_game do seletor, nao so a soma das probabilidades
+        penalized, _drawn = warm_start_pool(
+            previous, probs, 6, 4, np.random.default_rng(0), refresh=0.5, weak_pairs={(55, 56)}, penalty_weak_pair=100.0
+        )
+        self.assertEqual(penalized[:2].tolist(), [[30, 31, 32, 33, 34, 35], [1, 2, 3, 4, 5, 7]])
+        with self.assertRaises(ValueError):
+            warm_start_pool(previous, probs, 6, 4, np.random.default_rng(0), refresh=1.5)
+
+    def test_key_uniforms_variance_reduction_structure(self):
+        stratified = key_uniforms(16, np.random.default_rng(0), "stratified")
+        for column in stratified.T:
+            self.assertEqual(sorted(np.floor(column * 16).astype(int).tolist()), list(range(16)))
+
+        antithetic = key_uniforms(7, np.random.default_rng(0), "antithetic")
+        self.assertEqual(antithetic.shape, (7, 60))
+        np.testing.assert_allclose(antithetic[0::2][:3] + antithetic[1::2], 1.0)
+
+        with self.assertRaises(ValueError):
+            key_uniforms(4, np.random.default_rng(0), "halton")
+
+    def test_only_the_sobol_key_sampler_imports_scipy(self):
+        import subprocess
+        import sys
+
+        code = (
+            "import sys, numpy as np; from core.generator import key_uniforms; "
+            "[key_uniforms(4, np.random.default_rng(0), m) for m in ('iid', 'stratified', 'antithetic')]; "
+            "print('scipy' in sys.modules)"
+        )
+        completed = subprocess.run(
+            [sys.executable, "-c", code], cwd=Path(__file__).resolve().parents[1], capture_output=True, text=True, check=True
+        )
+        self.assertEqual(completed.stdout.strip(), "False")
+
+    @unittest.skipIf("sobol" not in available_key_samplers(), "scipy nao instalado")
+    def test_sobol_key_sampler_is_seeded_and_usable_by_the_generator(self):
+        first = key_uniforms(10, np.random.default_rng(1), "sobol")
+        self.assertEqual(first.shape, (10, 60))
+        np.testing.assert_array_equal(first, key_uniforms(10, np.random.default_rng(1), "sobol"))
+
+        games = generate_games_from_probs(np.ones(60), seed=3, n_games=3, n_sim=64, key_sampler="sobol")
+        self.assertEqual(len(games), 3)
+
     def test_build_output_payload_keeps_n8n_contract_and_metadata(self):
         config = {"strategy_name": "megasena_v1", "model_version": "1.1.0", "parameters": {"ticket_size": 9}}
         payload = build_output_payload([[1, 2, 3, 4, 5, 6, 7, 8, 9]], config)
@@ -0,0 +1,62 @@
+import json
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from core.history_archive import (
+    archive_snapshot,
+    archive_snapshots,
+    export_snapshots,
+    import_history_dir,
+    load_snapshot,
+    load_snapshots,
+)
+
+
+def _snapshot(concurso: int, first: int = 1) -> dict:
+    return {
+        "game": "megasena",
+        "ticket_size": 9,
+        "games": [{"id": "J01", "numbers": list(range(first, first + 9))}],
+        "metadata": {"target_concurso": concurso, "nota": "acao"},
+    }
+
+
+class HistoryArchiveTests(unittest.TestCase):
+    def test_archive_dedupes_and_latest_version_wins(self):
+        with TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "history_archive.jsonl"
+
+            self.assertEqual(archive_snapshots([(10, _snapshot(10)), (11, _snapshot(11))], path), 2)
+            self.assertFalse(archive_snapshot(10, _snapshot(10), path))
+            self.assertTrue(archive_snapshot(10, _snapshot(10, first=5), path))
+
+            self.assertEqual(len(path.read_text(encoding="utf-8").splitlines()), 3)
+            self.assertEqual(load_snapshot(10, path)["games"][0]["numbers"][0], 5)
+            self.assertIsNone(load_snapshot(12, path))
+            self.assertEqual(sorted(load_snapshots(9, 11, path)), [10, 11])
+
+    def test_import_and_export_roundtrip_history_files(self):
+        with TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            history_dir = root / "history"
+            history_dir.mkdir()
+            for concurso in (2990, 2991, 2992):
+                (history_dir / f"jogos_concurso_{concurso}.json").write_text(
+                    json.dumps(_snapshot(concurso), indent=2, ensure_ascii=False), encoding="utf-8"
+                )
+            path = root / "history_archive.jsonl"
+
+            self.assertEqual(import_history_dir(history_dir, path), 3)
+            self.assertEqual(export_snapshots(history_dir, path), [])
+
+            exported = export_snapshots(root / "export", path, start=2991)
+            self.assertEqual([p.name for p in exported], ["jogos_concurso_2991.json", "jogos_concurso_2992.json"])
+            self.assertEqual(
+                exported[0].read_bytes(),
+                (history_dir / "jogos_concurso_2991.json").read_bytes(),
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
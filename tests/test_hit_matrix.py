@@ -0,0 +1,43 @@
+import unittest
+
+import numpy as np
+
+from core.compare_results import compute_hits
+from core.hit_matrix import evaluate_paired, hit_matrix, summarize_draws, to_bitmask
+
+
+def _random_rows(rng: np.random.Generator, count: int, size: int) -> list[list[int]]:
+    return [sorted(int(n) for n in rng.choice(np.arange(1, 61), size=size, replace=False)) for _ in range(count)]
+
+
+class HitMatrixTests(unittest.TestCase):
+    def test_summaries_match_compute_hits_for_lists_and_bitmasks(self):
+        rng = np.random.default_rng(7)
+        tickets = _random_rows(rng, 300, 9)
+        draws = _random_rows(rng, 40, 6) + [tickets[0][:6]]
+
+        hits = hit_matrix(tickets, draws)
+        from_lists = summarize_draws(tickets, draws, chunk_size=64)
+        from_masks = summarize_draws(to_bitmask(tickets), draws)
+
+        self.assertEqual(from_lists, from_masks)
+        for d, draw in enumerate(draws):
+            expected = compute_hits(set(draw), [(str(i), game) for i, game in enumerate(tickets)])
+            self.assertEqual(from_lists[d], expected["summary"])
+            self.assertEqual(hits[:, d].tolist(), [g["hits"] for g in expected["per_game"]])
+
+    def test_paired_evaluation_handles_ragged_and_empty_ticket_sets(self):
+        rng = np.random.default_rng(11)
+        draws = _random_rows(rng, 6, 6)
+        tickets_per_draw = [_random_rows(rng, size, 9) for size in (5, 0, 3, 5, 1, 2)]
+
+        hits, summaries = evaluate_paired(tickets_per_draw, draws)
+
+        for d, draw in enumerate(draws):
+            expected = compute_hits(set(draw), [(str(i), game) for i, game in enumerate(tickets_per_draw[d])])
+            self.assertEqual(summaries[d], expected["summary"])
+            self.assertEqual(hits[d].tolist(), [g["hits"] for g in expected["per_game"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import json
+import multiprocessing
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from core.jsonl_log import (
+    append_jsonl,
+    append_jsonl_many,
+    iter_jsonl,
+    iter_jsonl_reverse,
+    read_jsonl_tail,
+    read_last_jsonl,
+)
+
+
+def _append_worker(path: str, worker: int, batches: int) -> None:
+    for batch in range(batches):
+        events = [{"worker": worker, "batch": batch, "item": item, "pad": "x" * 2048} for item in range(5)]
+        append_jsonl_many(Path(path), events)
+
+
+class JsonlTailTests(unittest.TestCase):
+    def test_iter_jsonl_reverse_crosses_block_boundaries_and_skips_torn_lines(self):
+        with TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "log.jsonl"
+            path.write_text('{"a": 1}\nnot-json\n\n{"a": 2}\n{"a": 3', encoding="utf-8")
+
+            values = [event["a"] for event in iter_jsonl_reverse(path, block_size=4)]
+
+        self.assertEqual(values, [2, 1])
+
+    def test_read_jsonl_tail_returns_file_order(self):
+        with TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "log.jsonl"
+            for concurso in range(1, 8):
+                append_jsonl(path, {"concurso": concurso})
+
+            tail = read_jsonl_tail(path, 3)
+
+        self.assertEqual([e["concurso"] for e in tail], [5, 6, 7])
+
+    def test_read_last_jsonl_skips_trailing_garbage_and_honors_predicate(self):
+        with TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "log.jsonl"
+            path.write_text('{"config_hash": "a", "n": 1}\n{"config_hash": "b", "n": 0}\n\n{"config_', encoding="utf-8")
+
+            self.assertEqual(read_last_jsonl(path)["config_hash"], "b")
+            self.assertEqual(read_last_jsonl(path, predicate=lambda e: e["n"] > 0)["config_hash"], "a")
+            self.assertIsNone(read_last_jsonl(Path(tmpdir) / "missing.jsonl"))
+
+
+class JsonlAppendTests(unittest.TestCase):
+    def test_append_closes_torn_line_before_writing(self):
+        with TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "log.jsonl"
+            path.write_text('{"a": 1}\n{"a": ', encoding="utf-8")
+
+            self.assertEqual([e["a"] for e in iter_jsonl(path)], [1])
+            append_jsonl_many(path, [{"a": 2}, {"a": 3}], fsync=True)
+
+            self.assertEqual([e["a"] for e in iter_jsonl(path)], [1, 2, 3])
+
+    def test_parallel_writers_never_interleave_lines(self):
+        with TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "log.jsonl"
+            ctx = multiprocessing.get_context("fork")
+            workers = [ctx.Process(target=_append_worker, args=(str(path), worker, 10)) for worker in range(4)]
+            for process in workers:
+                process.start()
+            for process in workers:
+                process.join()
+
+            lines = path.read_text(encoding="utf-8").splitlines()
+            events = [json.loads(line) for line in lines]
+
+        self.assertEqual(len(events), 4 * 10 * 5)
+        for worker in range(4):
+            items = [(e["batch"], e["item"]) for e in events if e["worker"] == worker]
+            self.assertEqual(items, [(batch, item) for batch in range(10) for item in range(5)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from core import metrics
+from core.jsonl_log import iter_jsonl
+
+
+@metrics.timed("test.double")
+def _double(value):
+    return value * 2
+
+
+class MetricsTests(unittest.TestCase):
+    def tearDown(self):
+        metrics.disable()
+
+    def test_disabled_metrics_record_nothing(self):
+        self.assertFalse(metrics.enabled())
+        self.assertIs(metrics.timer("a"), metrics.timer("b"))
+        with metrics.timer("a"):
+            pass
+        metrics.count("c")
+        self.assertEqual(_double(3), 6)
+        self.assertEqual(metrics.snapshot(), [])
+        self.assertEqual(metrics.flush(), 0)
+
+    def test_enabled_metrics_are_flushed_and_summarized(self):
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp) / "metrics_log.jsonl"
+            for run in range(3):
+                metrics.disable()
+                metrics.enable(path)
+                for _ in range(run + 1):
+                    self.assertEqual(_double(2), 4)
+                    with metrics.timer("test.block"):
+                        pass
+                metrics.count("test.items", 10 * (run + 1))
+                self.assertEqual(metrics.flush(), 3)
+                self.assertEqual(metrics.flush(), 0)
+
+            records = list(iter_jsonl(path))
+            self.assertEqual(len(records), 9)
+            self.assertEqual(len({record["run_id"] for record in records}), 3)
+            self.assertEqual([r["calls"] for r in records if r["name"] == "test.double"], [1, 2, 3])
+
+            rows = {row["name"]: row for row in metrics.summarize(records)}
+            self.assertEqual(set(rows), {"test.block", "test.double", "test.items"})
+            self.assertEqual(rows["test.items"]["runs"], 3)
+            self.assertEqual(rows["test.items"]["p50"], 20.0)
+            self.assertEqual(rows["test.items"]["p95"], 29.0)
+            self.assertEqual(rows["test.double"]["calls_p50"], 2.0)
+
+    def test_percentile_matches_numpy(self):
+        values = [0.3, 5.0, 1.2, 9.9, 4.4, 2.0, 7.1]
+        for q in (0, 50, 90, 95, 100):
+            self.assertAlmostEqual(metrics.percentile(values, q), float(np.percentile(values, q)))
+
+
+if __name__ == "__main__":
+    unittest.main()
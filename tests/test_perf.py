@@ -0,0 +1,98 @@
+import json
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from core.perf import (
+    build_baseline,
+    compare_baselines,
+    compare_samples,
+    latest_baseline,
+    machine_fingerprint,
+    main,
+    samples_from_benchmarks,
+    samples_from_metrics,
+    save_baseline,
+    welch_interval,
+)
+
+BASE = [1.00, 1.02, 0.98, 1.01, 0.99]
+
+
+class PerfTests(unittest.TestCase):
+    def test_welch_interval_needs_two_samples_per_side(self):
+        self.assertIsNone(welch_interval([1.0], [1.0, 1.1]))
+        low, high = welch_interval(BASE, [value + 0.5 for value in BASE])
+        self.assertLess(low, 0.5)
+        self.assertGreater(high, 0.5)
+        self.assertGreater(low, 0.4)
+
+    def test_compare_flags_only_significant_slowdowns_and_memory_growth(self):
+        baseline = {
+            "bench:a@10": {"seconds": BASE, "peak_bytes": [1000.0]},
+            "bench:b@10": {"seconds": BASE, "peak_bytes": [1000.0]},
+            "bench:c@10": {"seconds": BASE},
+            "bench:d@10": {"seconds": [1.0]},
+        }
+        current = {
+            "bench:a@10": {"seconds": [value * 1.5 for value in BASE], "peak_bytes": [1050.0]},
+            "bench:b@10": {"seconds": [value * 1.01 for value in BASE], "peak_bytes": [2000.0]},
+            "bench:c@10": {"seconds": [value * 0.5 for value in BASE]},
+            "bench:d@10": {"seconds": [3.0]},
+        }
+        rows = {(row["key"], row["metric"]): row["status"] for row in compare_samples(baseline, current)}
+
+        self.assertEqual(rows[("bench:a@10", "seconds")], "slower")
+        self.assertEqual(rows[("bench:a@10", "peak_bytes")], "unchanged")
+        self.assertEqual(rows[("bench:b@10", "seconds")], "unchanged")
+        self.assertEqual(rows[("bench:b@10", "peak_bytes")], "memory_growth")
+        self.assertEqual(rows[("bench:c@10", "seconds")], "faster")
+        self.assertEqual(rows[("bench:d@10", "seconds")], "inconclusive")
+
+        report = compare_baselines({"samples": baseline}, {"samples": current})
+        self.assertEqual(report["verdict"], "regression")
+        self.assertEqual(report["regressions"], ["bench:a@10", "bench:b@10"])
+
+    def test_samples_from_benchmark_report_and_metrics_log(self):
+        bench = {"results": [{"benchmark": "run_backtest", "size": 3000, "seconds": [0.1, 0.2], "peak_bytes": 512}]}
+        self.assertEqual(
+            samples_from_benchmarks(bench), {"bench:run_backtest@3000": {"seconds": [0.1, 0.2], "peak_bytes": [512.0]}}
+        )
+        records = [
+            {"run_id": run, "kind": "timer", "name": "pipeline.generate", "total_seconds": seconds}
+            for run, seconds in (("r1", 1.0), ("r2", 2.0), ("r3", 3.0))
+        ] + [{"run_id": "r3", "kind": "counter", "name": "generator.candidates", "value": 10}]
+        self.assertEqual(
+            samples_from_metrics(records, last_runs=2), {"metrics:pipeline.generate": {"seconds": [2.0, 3.0]}}
+        )
+
+    def test_baselines_are_keyed_by_machine_and_code_version(self):
+        with TemporaryDirectory() as tmp:
+            out_dir = Path(tmp)
+            old = build_baseline({"bench:a@10": {"seconds": BASE}}, code_version="a" * 40)
+            old["created_at"] = "2026-01-01T00:00:00+00:00"
+            path = save_baseline(old, out_dir)
+            new = build_baseline({"bench:a@10": {"seconds": BASE}}, code_version="b" * 40)
+            save_baseline(new, out_dir)
+
+            self.assertEqual(path, out_dir / machine_fingerprint() / f"{'a' * 16}.json")
+            found = latest_baseline(new["fingerprint"], exclude_code_version=new["code_version"], out_dir=out_dir)
+            self.assertEqual(found["code_version"], "a" * 40)
+
+            bench_path = out_dir / "bench.json"
+            bench_path.write_text(
+                json.dumps({"results": [{"benchmark": "a", "size": 10, "seconds": [v * 2 for v in BASE]}]}),
+                encoding="utf-8",
+            )
+            report_path = out_dir / "report.json"
+            args = ["compare", "--bench", str(bench_path), "--out-dir", str(out_dir), "--report", str(report_path)]
+            args += ["--baseline", str(path)]
+            report = main(args)
+            self.assertEqual(json.loads(report_path.read_text(encoding="utf-8"))["verdict"], "regression")
+            self.assertEqual(report["rows"][0]["status"], "slower")
+            with self.assertRaises(SystemExit):
+                main(args + ["--fail-on-regression"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import json
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from core.performance_index import PerformanceLogIndex
+
+
+def _event(concurso: int, **extra) -> dict:
+    return {"concurso": concurso, "n_games": 2, "score": concurso % 3, **extra}
+
+
+def _write_log(path: Path, events: list[dict]) -> None:
+    path.write_text("".join(json.dumps(e) + "\n" for e in events), encoding="utf-8")
+
+
+class PerformanceLogIndexTests(unittest.TestCase):
+    def test_index_tracks_appends_incrementally(self):
+        with TemporaryDirectory() as tmpdir:
+            log_path = Path(tmpdir) / "performance_log.jsonl"
+            _write_log(log_path, [_event(10), _event(11)])
+
+            index = PerformanceLogIndex(log_path)
+            index.append(_event(12))
+            reopened = PerformanceLogIndex(log_path)
+
+            self.assertEqual(len(reopened), 3)
+            self.assertEqual(reopened.latest_concurso(), 12)
+            self.assertTrue(reopened.contains(11))
+            self.assertFalse(reopened.contains(13))
+            self.assertEqual(reopened.get(12)["concurso"], 12)
+
+    def test_index_rebuilds_after_rewrite_and_out_of_order_append(self):
+        with TemporaryDirectory() as tmpdir:
+            log_path = Path(tmpdir) / "performance_log.jsonl"
+            _write_log(log_path, [_event(10), _event(11)])
+            PerformanceLogIndex(log_path)
+
+            _write_log(log_path, [_event(20), _event(21)])
+            index = PerformanceLogIndex(log_path)
+            self.assertFalse(index.contains(10))
+            self.assertTrue(index.contains(21))
+
+            index.append(_event(15))
+            self.assertEqual(index.concursos(), [15, 20, 21])
+
+    def test_tail_filters_non_canonical_events_in_concurso_order(self):
+        with TemporaryDirectory() as tmpdir:
+            log_path = Path(tmpdir) / "performance_log.jsonl"
+            _write_log(
+                log_path,
+                [_event(1), _event(2), _event(3, meta={"manual_patch": True}), _event(4, n_games=0), _event(5)],
+            )
+
+            index = PerformanceLogIndex(log_path)
+            tail = index.tail(2, canonical_only=True)
+
+            self.assertEqual([e["concurso"] for e in tail], [2, 5])
+            self.assertEqual(index.canonical_entries, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from core import pipeline
+from core.engine import Engine
+from core.pipeline import PROFILES, STAGES, Stage, file_digest, history_snapshots_digest, run_pipeline
+
+
+class PipelineTests(unittest.TestCase):
+    def test_profiles_only_reference_known_stages(self):
+        for stages in PROFILES.values():
+            self.assertTrue(set(stages) <= set(STAGES))
+        with self.assertRaises(ValueError):
+            run_pipeline(["ingest", "nope"])
+
+    def test_run_pipeline_shares_state_and_reports_timings(self):
+        seen = []
+        stages = {
+            "a": Stage(lambda state: seen.append(("a", id(state)))),
+            "b": Stage(lambda state: seen.append(("b", id(state)))),
+        }
+        state = Engine(config={})
+
+        with TemporaryDirectory() as tmp, patch.dict(pipeline.STAGES, stages, clear=True):
+            timings = run_pipeline(["a", "b"], state, stamps_dir=Path(tmp))
+            timings = run_pipeline(["a", "b"], state, stamps_dir=Path(tmp))
+
+        # sem entradas declaradas a etapa sempre roda e nao grava stamp
+        self.assertEqual(seen, [("a", id(state)), ("b", id(state))] * 2)
+        self.assertEqual([row["stage"] for row in timings], ["a", "b"])
+        self.assertFalse(any(row["skipped"] for row in timings))
+
+    def test_stage_is_skipped_until_inputs_config_or_outputs_change(self):
+        with TemporaryDirectory() as tmp:
+            source = Path(tmp) / "source.txt"
+            target = Path(tmp) / "target.txt"
+            stamps_dir = Path(tmp) / ".stamps"
+            source.write_text("1", encoding="utf-8")
+            runs = []
+
+            def copy(state):
+                runs.append(state.config["k"])
+                target.write_text(source.read_text(encoding="utf-8"), encoding="utf-8")
+
+            stage = Stage(copy, lambda state: {"source": file_digest(source), "k": state.config["k"]}, (target,))
+
+            def run(config=None, **kwargs):
+                state = Engine(config=config or {"k": 1})
+                return run_pipeline(["copy"], state, stamps_dir=stamps_dir, **kwargs)[0]["skipped"]
+
+            with patch.dict(pipeline.STAGES, {"copy": stage}, clear=True):
+                self.assertFalse(run())
+                self.assertTrue(run())
+                source.write_text("2", encoding="utf-8")
+                self.assertFalse(run())
+                self.assertTrue(run())
+                self.assertFalse(run({"k": 2}))
+                target.unlink()
+                self.assertFalse(run({"k": 2}))
+                self.assertFalse(run({"k": 2}, force=True))
+                with patch.object(pipeline, "code_version", return_value="outra"):
+                    self.assertFalse(run({"k": 2}))
+
+            self.assertEqual(runs, [1, 1, 2, 2, 2, 2])
+            self.assertTrue((stamps_dir / "copy.json").exists())
+
+    def test_history_snapshot_digest_tracks_only_snapshots_compare_still_reads(self):
+        with TemporaryDirectory() as tmp:
+            history = Path(tmp)
+            for concurso in (10, 11):
+                (history / f"jogos_concurso_{concurso}.json").write_text("{}", encoding="utf-8")
+            (history / "notes.txt").write_text("x", encoding="utf-8")
+            before = history_snapshots_digest(10, history)
+
+            (history / "jogos_concurso_10.json").write_text('{"games": []}', encoding="utf-8")
+            self.assertEqual(history_snapshots_digest(10, history), before)
+            (history / "jogos_concurso_11.json").write_text('{"games": []}', encoding="utf-8")
+            self.assertNotEqual(history_snapshots_digest(10, history), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
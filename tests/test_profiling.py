@@ -0,0 +1,50 @@
+import json
+import sys
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from core import profiling
+from core.profiling import profile_call, requested_modes, run_main
+
+
+def _busy():
+    return sum(len(str(i)) for i in range(20_000))
+
+
+class ProfilingTests(unittest.TestCase):
+    def test_requested_modes(self):
+        self.assertEqual(requested_modes(["prog"], {}), set())
+        self.assertEqual(requested_modes(["prog", "--profile"], {}), {"cpu", "memory"})
+        self.assertEqual(requested_modes(["prog"], {"MEGA_ENGINE_PROFILE": "1"}), {"cpu", "memory"})
+        self.assertEqual(requested_modes(["prog"], {"MEGA_ENGINE_PROFILE": "memory"}), {"memory"})
+
+    def test_profile_call_writes_pstats_and_report(self):
+        with TemporaryDirectory() as tmp:
+            report = profile_call(_busy, module="core.fake", modes={"cpu", "memory"}, out_dir=Path(tmp))
+            files = sorted(path.suffix for path in Path(tmp).iterdir())
+            saved = json.loads(next(Path(tmp).glob("core.fake_*.json")).read_text(encoding="utf-8"))
+
+        self.assertEqual(files, [".json", ".prof"])
+        self.assertEqual(saved, report)
+        self.assertGreater(report["tracemalloc_peak_bytes"], 0)
+        self.assertTrue(report["top_allocations"])
+        self.assertTrue(any("_busy" in row["function"] or "genexpr" in row["function"] for row in report["hotspots"]))
+
+    def test_run_main_strips_the_flag_before_main_parses_argv(self):
+        seen = []
+        with patch("sys.argv", ["prog", "--profile", "--json"]), patch.dict("os.environ", {}, clear=True), patch.object(
+            profiling, "profile_call"
+        ) as profiled:
+            run_main(lambda: seen.append("ran"))
+            self.assertEqual(sys.argv, ["prog", "--json"])
+        self.assertEqual(profiled.call_args.kwargs["modes"], {"cpu", "memory"})
+
+        with patch("sys.argv", ["prog"]), patch.dict("os.environ", {}, clear=True):
+            run_main(lambda: seen.append("plain"))
+        self.assertEqual(seen, ["plain"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import json
+import threading
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from benchmarks.synthetic import synthetic_history
+from core.engine import Engine
+from core.features_megasena import build_features
+from core.history_archive import archive_snapshots
+from core.jsonl_log import append_jsonl_many
+from core.serve import ServeState, make_server
+
+CONFIG = {"parameters": {"window": 10, "min_history": 10, "num_games": 3, "n_sim": 40, "bottom_pairs": 30}}
+
+
+class ServeTests(unittest.TestCase):
+    def setUp(self):
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        root = Path(tmp.name)
+        results_df = synthetic_history(40)
+        results_df.to_csv(root / "megasena.csv", index=False)
+        build_features(results_df, window=10).to_csv(root / "dezenas.csv", index=False)
+        self.games_path = root / "jogos_gerados.json"
+        self.games_path.write_text(json.dumps({"games": [[1, 2, 3, 4, 5, 6, 7, 8, 9]]}), encoding="utf-8")
+        archive_snapshots([(10, {"concurso_alvo": 10}), (11, {"concurso_alvo": 11})], root / "archive.jsonl")
+        append_jsonl_many(root / "performance.jsonl", [{"concurso": n, "n_games": 1} for n in range(1, 6)])
+
+        self.engine = Engine(CONFIG, results_path=root / "megasena.csv", features_path=root / "dezenas.csv")
+        state = ServeState(
+            self.engine,
+            games_path=self.games_path,
+            archive_path=root / "archive.jsonl",
+            history_dir=root / "history",
+            performance_log_path=root / "performance.jsonl",
+            last_result_path=root / "last_result.json",
+        )
+        self.history_dir = root / "history"
+        self.server = make_server(port=0, state=state)
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def request(self, path, payload=None, headers=None):
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        try:
+            with urlopen(Request(self.base + path, data=data, headers=headers or {}), timeout=10) as response:
+                body = response.read()
+                return response.status, response.headers, json.loads(body) if body else None
+        except HTTPError as exc:
+            body = exc.read()
+            return exc.code, exc.headers, json.loads(body) if body else None
+
+    def test_read_routes(self):
+        status, headers, body = self.request("/games")
+        self.assertEqual((status, body["games"]), (200, [[1, 2, 3, 4, 5, 6, 7, 8, 9]]))
+        self.assertEqual(self.request("/snapshot/11")[2], {"concurso_alvo": 11})
+        self.assertEqual(self.request("/snapshot/12")[0], 404)
+        self.assertEqual([event["concurso"] for event in self.request("/performance?last=2")[2]], [4, 5])
+        self.assertEqual([event["concurso"] for event in self.request("/performance?start=2&end=3")[2]], [2, 3])
+        self.assertEqual(self.request("/performance?last=x")[0], 400)
+        self.assertEqual(self.request("/nope")[0], 404)
+
+    def test_etag_and_file_changes(self):
+        _status, headers, _body = self.request("/games")
+        etag = headers["ETag"]
+        self.assertEqual(self.request("/games", headers={"If-None-Match": etag})[0], 304)
+
+        games = {"games": [[1, 2, 3, 4, 5, 6, 7, 8, 10], [11, 12, 13, 14, 15, 16, 17, 18, 19]]}
+        self.games_path.write_text(json.dumps(games), encoding="utf-8")
+        status, headers, body = self.request("/games", headers={"If-None-Match": etag})
+        self.assertEqual(status, 200)
+        self.assertNotEqual(headers["ETag"], etag)
+        self.assertEqual(len(body["games"]), 2)
+
+    def test_generate_and_evaluate(self):
+        status, headers, body = self.request("/generate", {"seed": 7, "parameters": {"num_games": 2}})
+        self.assertEqual(status, 200)
+        config = self.engine.with_parameters({"num_games": 2})
+        self.assertEqual(body["games"], self.engine.generate(7, config=config))
+        self.assertEqual(
+            self.request("/generate", {"seed": 7, "parameters": {"num_games": 2}}, {"If-None-Match": headers["ETag"]})[0],
+            304,
+        )
+        self.assertNotEqual(self.request("/generate", {"seed": 7})[2]["config_hash"], body["config_hash"])
+        self.assertEqual(self.request("/generate", {"seed": "x"})[0], 400)
+        status, _headers, body = self.request("/generate", {"seed": 7, "parameters": {"num_games": "x"}})
+        self.assertEqual(status, 400)
+        self.assertIn("error", body)
+
+        draws = self.engine.draws[-2:].tolist()
+        status, _headers, summaries = self.request("/evaluate", {"tickets": draws, "last": 2})
+        self.assertEqual([row["concurso"] for row in summaries], [39, 40])
+        self.assertEqual([row["max_hits"] for row in summaries], [6, 6])
+
+    def test_snapshot_prefers_the_history_file_like_compare(self):
+        self.assertEqual(self.request("/snapshot/11")[2], {"concurso_alvo": 11})
+        self.history_dir.mkdir()
+        (self.history_dir / "jogos_concurso_11.json").write_text(json.dumps({"editado": True}), encoding="utf-8")
+        self.assertEqual(self.request("/snapshot/11")[2], {"editado": True})
+        (self.history_dir / "jogos_concurso_12.json").write_text(json.dumps({"so_em_disco": True}), encoding="utf-8")
+        self.assertEqual(self.request("/snapshot/12")[2], {"so_em_disco": True})
+
+    def test_invalid_content_length_is_rejected_without_reading_the_body(self):
+        from http.client import HTTPConnection
+
+        for path, length in (("/generate", "-1"), ("/nope", "-1"), ("/nope", "x"), ("/evaluate", str(2 << 20))):
+            with self.subTest(path=path, length=length):
+                connection = HTTPConnection("127.0.0.1", self.server.server_address[1], timeout=5)
+                connection.putrequest("POST", path)
+                connection.putheader("Content-Length", length)
+                connection.endheaders()
+                response = connection.getresponse()
+                self.assertEqual(response.status, 413 if length.isdigit() else 400)
+                self.assertIn("error", json.loads(response.read()))
+                connection.close()
+        self.assertEqual(self.request("/health")[0], 200)
+
+    def test_unexpected_errors_return_500_with_a_json_body(self):
+        with patch.object(self.engine, "generate", side_effect=KeyError("metadata")):
+            status, _headers, body = self.request("/generate", {"seed": 7})
+        self.assertEqual(status, 500)
+        self.assertIn("KeyError", body["error"])
+        self.assertEqual(self.request("/health")[0], 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
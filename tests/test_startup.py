@@ -0,0 +1,94 @@
+import json
+import subprocess
+import sys
+import unittest
+import warnings
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+# Nenhum modulo do core pode carregar estas dependencias so por ser importado.
+HEAVY_DEPENDENCIES = ("scipy", "pandas", "requests", "openai")
+
+# Dependencias extras proibidas em cada modulo e o tempo de referencia (ms,
+# cumulativo segundo `python -X importtime`). Passar da referencia gera um aviso;
+# nos modulos com saida rapida ("nada novo", "ja logado"), passar de
+# HARD_CEILING_FACTOR vezes a referencia reprova.
+STARTUP_BUDGET = {
+    "core.config": ((), 20),
+    "core.metrics": (("numpy", "core.jsonl_log"), 30),
+    "core.perf": (("pandas", "numpy"), 40),
+    "core.ingest_megasena": (("pandas", "numpy", "requests"), 40),
+    "core.compare_results": (("pandas", "numpy"), 80),
+    "core.monitor_performance": (("pandas", "numpy"), 80),
+    "core.learning": (("pandas", "numpy"), 80),
+    "core.image_generator": (("openai", "PIL"), 20),
+    "core.pipeline": (("pandas", "numpy"), 80),
+    # numpy fica: todo caminho do gerador sorteia com ele (ver core/generator.py)
+    "core.generator": (("pandas", "scipy", "core.features_megasena", "core.versioning"), 250),
+}
+FAST_EXIT_MODULES = (
+    "core.config",
+    "core.metrics",
+    "core.perf",
+    "core.ingest_megasena",
+    "core.compare_results",
+    "core.monitor_performance",
+    "core.learning",
+    "core.image_generator",
+    "core.pipeline",
+)
+HARD_CEILING_FACTOR = 3
+
+
+def import_profile(module: str) -> tuple[set[str], int]:
+    """`sys.modules` depois de `import module` e o tempo cumulativo (us) do proprio modulo."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import json, sys; import {module}; print(json.dumps(sorted(sys.modules)))"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative_us = 0
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _self_us, cumulative, name = (part.strip() for part in line[len("import time:") :].split("|"))
+        if name == module and cumulative.isdigit():
+            cumulative_us = int(cumulative)
+    return set(json.loads(completed.stdout)), cumulative_us
+
+
+class StartupBudgetTests(unittest.TestCase):
+    def test_core_modules_import_without_heavy_dependencies(self):
+        for module, (forbidden, budget_ms) in STARTUP_BUDGET.items():
+            with self.subTest(module=module):
+                loaded, cumulative_us = import_profile(module)
+                self.assertIn(module, loaded)
+                self.assertEqual([name for name in (*HEAVY_DEPENDENCIES, *forbidden) if name in loaded], [])
+                elapsed_ms = cumulative_us / 1000
+                if module in FAST_EXIT_MODULES:
+                    self.assertLessEqual(elapsed_ms, HARD_CEILING_FACTOR * budget_ms)
+                if elapsed_ms > budget_ms:
+                    # tempo de parede varia com a maquina: perto da referencia so avisa
+                    warnings.warn(f"import {module}: {elapsed_ms:.0f} ms (referencia {budget_ms} ms)")
+
+    def test_image_generator_import_has_no_side_effects(self):
+        completed = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "from unittest.mock import patch; from pathlib import Path; "
+                "mkdir = patch.object(Path, 'mkdir', side_effect=AssertionError('mkdir no import')); "
+                "mkdir.start(); import core.image_generator",
+            ],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
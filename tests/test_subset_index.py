@@ -0,0 +1,59 @@
+import unittest
+from itertools import combinations
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import pandas as pd
+
+from core.subset_index import SubsetIndex, load_or_build, subset_rank
+
+
+def _results(rows: list[list[int]]) -> pd.DataFrame:
+    return pd.DataFrame(
+        [{"concurso": i + 1, "data": "01/01/2020", **{f"d{j + 1}": n for j, n in enumerate(row)}} for i, row in enumerate(rows)]
+    )
+
+
+class SubsetIndexTests(unittest.TestCase):
+    def test_rank_is_a_bijection_onto_colex_positions(self):
+        pairs = np.array(list(combinations(range(1, 61), 2)))
+        ranks = subset_rank(pairs)
+        self.assertEqual(sorted(ranks.tolist()), list(range(1770)))
+        self.assertEqual(subset_rank(np.array([[53, 10]]))[0], subset_rank(np.array([[10, 53]]))[0])
+
+    def test_queries_match_brute_force_scan(self):
+        rng = np.random.default_rng(3)
+        rows = [sorted(rng.choice(np.arange(1, 61), size=6, replace=False).tolist()) for _ in range(400)]
+        index = SubsetIndex.build(_results(rows))
+
+        for subset in ([rows[0][0], rows[0][1]], rows[5][:3], rows[9][2:6], [1, 2]):
+            expected = [i + 1 for i, row in enumerate(rows) if set(subset) <= set(row)]
+            self.assertEqual(index.concursos(subset).tolist(), expected)
+            self.assertEqual(index.count(subset), len(expected))
+            self.assertEqual(index.count(subset, before=200), sum(1 for c in expected if c < 200))
+
+        ticket = rows[0] + [n for n in range(1, 61) if n not in rows[0]][:3]
+        counts = index.ticket_counts(ticket, 4, before=300)
+        self.assertEqual(len(counts), 126)
+        for subset, count in counts.items():
+            self.assertEqual(count, sum(1 for i, row in enumerate(rows) if i + 1 < 300 and set(subset) <= set(row)))
+
+    def test_load_or_build_persists_and_rebuilds_when_results_change(self):
+        with TemporaryDirectory() as tmpdir:
+            results_path = Path(tmpdir) / "megasena.csv"
+            index_dir = Path(tmpdir) / "subset_index"
+            _results([[1, 2, 3, 4, 5, 6]]).to_csv(results_path, index=False)
+
+            first = load_or_build(results_path, index_dir)
+            self.assertIsInstance(first._arrays[2][1], np.memmap)
+            self.assertEqual(first.count([1, 2]), 1)
+
+            _results([[1, 2, 3, 4, 5, 6], [1, 2, 10, 20, 30, 40]]).to_csv(results_path, index=False)
+            second = load_or_build(results_path, index_dir)
+            self.assertEqual(second.concursos([1, 2]).tolist(), [1, 2])
+            self.assertEqual(second.count([1, 2, 3, 4]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+import json
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from core import event_store, versioning
+from core.event_store import MODEL_HISTORY_STREAM, close_event_stores
+
+
+class VersioningTests(unittest.TestCase):
+    def test_last_hash_reads_through_the_event_store_when_enabled(self):
+        with TemporaryDirectory() as tmpdir:
+            history = Path(tmpdir) / "model_history.jsonl"
+            history.write_text(json.dumps({"config_hash": "a"}) + "\n" + json.dumps({"config_hash": "b"}) + "\n")
+            self.addCleanup(close_event_stores)
+            with patch.object(versioning, "MODEL_HISTORY_PATH", history), patch.dict(
+                event_store.STREAM_PATHS, {MODEL_HISTORY_STREAM: history}
+            ):
+                with patch.dict("os.environ", {"MEGA_EVENT_STORE": str(Path(tmpdir) / "events.sqlite")}):
+                    with patch.object(versioning, "read_last_jsonl") as tail_reader:
+                        self.assertEqual(versioning._last_hash(), "b")
+                    tail_reader.assert_not_called()
+
+                with patch.dict("os.environ", {"MEGA_EVENT_STORE": ""}):
+                    self.assertEqual(versioning._last_hash(), "b")
+
+
+if __name__ == "__main__":
+    unittest.main()